@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import glob
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from memory_budget import STAGE_OVERLAY, MemoryGovernor
+from ocr_cache import OcrResultCache
+from ocr_engine import OcrEngine
+from page_filters import BlankPageDetector
+from pipeline import OCRPipeline
+from progress import NullProgressSink
+
+
+def collect_inputs(source: str, output_dir: str) -> List[Tuple[str, str]]:
+    """
+    Resolve a batch source into ``(input_pdf, output_pdf)`` pairs.
+
+    ``source`` is a directory (its ``*.pdf`` files), a manifest file (one input per line, optionally
+    followed by a tab and an output path; ``#`` starts a comment) or a glob pattern. Outputs default to
+    ``output_dir/<name>.pdf``; clashing names get a ``-2``, ``-3``, ... suffix.
+
+    :param source: Directory, manifest path or glob pattern.
+    :param output_dir: Directory for default output paths.
+    :return: Input/output pairs in a stable order.
+    """
+    pairs: List[Tuple[str, Optional[str]]] = []
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(".pdf"))
+        pairs = [(os.path.join(source, n), None) for n in names]
+    elif os.path.isfile(source) and not source.lower().endswith(".pdf"):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, "r", encoding="utf-8") as fp:
+            for line in fp:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                src, _, dst = line.partition("\t")
+                src = os.path.join(base, src.strip())
+                pairs.append((src, dst.strip() or None))
+    else:
+        pairs = [(p, None) for p in sorted(glob.glob(source, recursive=True))]
+    out: List[Tuple[str, str]] = []
+    used = set()
+    for src, dst in pairs:
+        if dst is None:
+            stem = os.path.splitext(os.path.basename(src))[0]
+            dst = os.path.join(output_dir, stem + ".pdf")
+            n = 2
+            while dst in used:
+                dst = os.path.join(output_dir, f"{stem}-{n}.pdf")
+                n += 1
+        used.add(dst)
+        out.append((src, dst))
+    return out
+
+
+class _Doc:
+    """State of one document inside a batch run."""
+
+    def __init__(self, idx: int, input_pdf: str, output_pdf: str) -> None:
+        self.idx = idx
+        self.input_pdf = input_pdf
+        self.output_pdf = output_pdf
+        self.pipe: Optional[OCRPipeline] = None
+        self.pages: Optional[Iterator[Tuple[Any, np.ndarray]]] = None
+        self.remaining = 0
+        self.closed = False
+
+
+class BatchRunner:
+    """
+    OCR many PDFs with one loaded engine.
+
+    A few documents are rendered at a time and their pages are interleaved into a single OCR stream,
+    so batches stay full even when each document has only a couple of pages. Every document keeps its
+    own output PDF and CSV/NDJSON/result store files. A document that fails is closed and reported; the others
+    continue.
+    """
+
+    def __init__(
+            self,
+            jobs: List[Tuple[str, str]],
+            ocr: OcrEngine,
+            *,
+            csv_dir: Optional[str] = None,
+            ndjson_dir: Optional[str] = None,
+            store_dir: Optional[str] = None,
+            docs_in_flight: int = 4,
+            batch_size: int = 1,
+            reorder_window: int = 0,
+            max_batch_pixels: int = 0,
+            cache_dir: Optional[str] = None,
+            cache_max_mb: int = 1024,
+            skip_blank: bool = False,
+            blank_ink_ratio: float = 0.001,
+            blank_min_std: float = 3.0,
+            mem_budget_mb: int = 0,
+            **pipeline_kwargs: Any
+    ) -> None:
+        """
+        Configure the batch.
+
+        :param jobs: ``(input_pdf, output_pdf)`` pairs, e.g. from :func:`collect_inputs`.
+        :param ocr: Loaded engine shared by all documents; not closed by the runner.
+        :param csv_dir: Directory for per-document CSV files. ``None`` disables CSV.
+        :param ndjson_dir: Directory for per-document NDJSON files. ``None`` disables NDJSON.
+        :param store_dir: Directory for per-document columnar result stores. ``None`` disables them.
+        :param docs_in_flight: Documents rendered at the same time.
+        :param batch_size: OCR batch size across documents.
+        :param reorder_window: Pages OCR may hold back to batch similarly sized pages.
+        :param max_batch_pixels: Pixel budget per OCR batch. ``0`` caps by ``batch_size`` only.
+        :param cache_dir: Directory of the persistent OCR result cache. ``None`` disables caching.
+        :param cache_max_mb: Size budget of the OCR result cache in MiB.
+        :param skip_blank: Give blank or near-blank pages an empty result without running OCR.
+        :param blank_ink_ratio: Ink pixel fraction below which a page counts as blank.
+        :param blank_min_std: Grayscale standard deviation below which a page counts as blank.
+        :param mem_budget_mb: Memory budget in MiB shared by all documents' page images in flight;
+            ``0`` disables the governor.
+        :param pipeline_kwargs: Per-document :class:`OCRPipeline` options (``dpi``, ``font_path``, ...).
+        """
+        self.docs = [_Doc(i, src, dst) for i, (src, dst) in enumerate(jobs)]
+        self.ocr = ocr
+        self.csv_dir = csv_dir
+        self.ndjson_dir = ndjson_dir
+        self.store_dir = store_dir
+        self.docs_in_flight = max(1, docs_in_flight)
+        self.batch_size = max(1, batch_size)
+        self.reorder_window = max(0, reorder_window)
+        self.max_batch_pixels = max(0, max_batch_pixels)
+        self.pipeline_kwargs = pipeline_kwargs
+        self.blank: Optional[BlankPageDetector] = None
+        if skip_blank:
+            self.blank = BlankPageDetector(ink_ratio=blank_ink_ratio, min_std=blank_min_std)
+        self.cache: Optional[OcrResultCache] = None
+        if cache_dir:
+            self.cache = OcrResultCache(
+                cache_dir,
+                max_bytes=cache_max_mb << 20,
+                namespace=dict(ocr.config, dpi=pipeline_kwargs.get("dpi", 300)),
+            )
+        self.governor: Optional[MemoryGovernor] = None
+        if mem_budget_mb > 0:
+            self.governor = MemoryGovernor(mem_budget_mb << 20)
+        self.errors: Dict[str, str] = {}
+        self._queue: Deque[_Doc] = deque(self.docs)
+        self._rendering: List[_Doc] = []
+        self._owner: Dict[int, _Doc] = {}
+        self._bar: Optional[tqdm] = None
+
+    def _side_path(self, directory: Optional[str], doc: _Doc, ext: str) -> Optional[str]:
+        if not directory:
+            return None
+        stem = os.path.splitext(os.path.basename(doc.output_pdf))[0]
+        return os.path.join(directory, stem + ext)
+
+    def _open(self, doc: _Doc) -> None:
+        """Create the document's pipeline; documents without pages to OCR finish immediately."""
+        out_dir = os.path.dirname(doc.output_pdf)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        doc.pipe = OCRPipeline(
+            doc.input_pdf,
+            doc.output_pdf,
+            save_csv=self._side_path(self.csv_dir, doc, ".csv"),
+            save_ndjson=self._side_path(self.ndjson_dir, doc, ".ndjson"),
+            save_store=self._side_path(self.store_dir, doc, ".ocrs"),
+            ocr=self.ocr,
+            batch_size=self.batch_size,
+            reorder_window=self.reorder_window,
+            governor=self.governor,
+            sink=NullProgressSink(),
+            **self.pipeline_kwargs,
+        )
+        doc.remaining = len(doc.pipe.page_indices)
+        doc.pages = doc.pipe.render_units()
+        if doc.remaining == 0:
+            self._finish(doc)
+        else:
+            self._rendering.append(doc)
+
+    def _finish(self, doc: _Doc) -> None:
+        doc.pipe.finish()
+        self._retire(doc)
+
+    def _fail(self, doc: _Doc, exc: BaseException) -> None:
+        self.errors[doc.input_pdf] = f"{type(exc).__name__}: {exc}"
+        tqdm.write(f"FAILED {doc.input_pdf}: {self.errors[doc.input_pdf]}")
+        try:
+            self._retire(doc)
+        except Exception:
+            pass
+
+    def _retire(self, doc: _Doc) -> None:
+        """Stop rendering a document, close its outputs and count it as done."""
+        doc.pages = None
+        if doc in self._rendering:
+            self._rendering.remove(doc)
+        if doc.closed:
+            return
+        doc.closed = True
+        if self._bar is not None:
+            self._bar.update(1)
+        if doc.pipe is not None:
+            doc.pipe.close()
+
+    def _fill(self) -> None:
+        """Open queued documents until ``docs_in_flight`` are rendering."""
+        while self._queue and len(self._rendering) < self.docs_in_flight:
+            doc = self._queue.popleft()
+            try:
+                self._open(doc)
+            except Exception as exc:
+                self._fail(doc, exc)
+
+    def _pages(self) -> Iterator[Tuple[Tuple[int, Any], np.ndarray]]:
+        """
+        Interleave rendered pages round-robin across the documents being rendered.
+
+        :yield: ``((doc_index, unit_key), image)``; unit keys come from :meth:`OCRPipeline.render_units`.
+        """
+        while True:
+            self._fill()
+            if not self._rendering:
+                return
+            for doc in list(self._rendering):
+                try:
+                    unit, img = next(doc.pages)
+                except StopIteration:
+                    doc.pages = None
+                    self._rendering.remove(doc)
+                    continue
+                except Exception as exc:
+                    self._fail(doc, exc)
+                    continue
+                self._owner[id(img)] = doc
+                yield (doc.idx, unit), img
+
+    def _release(self, img: np.ndarray) -> None:
+        doc = self._owner.pop(id(img), None)
+        if doc is not None and doc.pipe is not None:
+            doc.pipe.streamer.release(img)
+
+    def _handle(self, key: Tuple[int, Any], items: List[Dict[str, Any]]) -> None:
+        doc = self.docs[key[0]]
+        if doc.closed:
+            return
+        try:
+            page = doc.pipe.assemble(key[1], items)
+            if page is None:
+                return
+            nbytes = MemoryGovernor.items_nbytes(page[1]) if self.governor is not None else 0
+            if nbytes:
+                self.governor.charge(STAGE_OVERLAY, nbytes)
+            try:
+                doc.pipe.handle_page(*page)
+            finally:
+                if nbytes:
+                    self.governor.discharge(STAGE_OVERLAY, nbytes)
+            doc.remaining -= 1
+            if doc.remaining == 0:
+                self._finish(doc)
+        except Exception as exc:
+            self._fail(doc, exc)
+
+    def run(self) -> Dict[str, str]:
+        """
+        Process every document.
+
+        An error from the OCR engine itself fails the documents with pages in flight and restarts the
+        stream for the rest.
+
+        :return: Mapping of failed input path to error message; empty if all documents succeeded.
+        """
+        self._bar = tqdm(total=len(self.docs), desc="Documents", unit="doc")
+        try:
+            while True:
+                try:
+                    for key, items in self.ocr.stream(
+                            self._pages(),
+                            batch_size=self.batch_size,
+                            cache=self.cache,
+                            blank=self.blank,
+                            release=self._release,
+                            reorder_window=self.reorder_window,
+                            max_batch_pixels=self.max_batch_pixels,
+                            governor=self.governor,
+                    ):
+                        self._handle(key, items)
+                except Exception as exc:
+                    for doc in self.docs:
+                        if doc.pipe is not None and not doc.closed:
+                            self._fail(doc, exc)
+                    self._owner.clear()
+                    if self._queue:
+                        continue
+                break
+            for doc in self.docs:
+                if doc.pipe is not None and not doc.closed:
+                    self._fail(doc, RuntimeError(f"{doc.remaining} pages were not recognized"))
+        finally:
+            for doc in self.docs:
+                if doc.pipe is not None and not doc.closed:
+                    doc.pipe.close()
+                    doc.closed = True
+            self._bar.close()
+            self._bar = None
+        stats: Dict[str, Any] = {"docs_ok": len(self.docs) - len(self.errors), "docs_failed": len(self.errors)}
+        if self.blank is not None:
+            stats.update(self.blank.stats())
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        if self.governor is not None:
+            stats.update(self.governor.stats())
+        stats.update(self.ocr.stats())
+        tqdm.write(" ".join(f"{k}={v}" for k, v in stats.items()))
+        return self.errors
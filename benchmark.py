@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pymupdf
+
+from ocr_engine import OcrEngine
+from overlay_writer import IncrementalOverlayWriter
+from pdf_streamer import PdfStreamer
+from pipeline import OCRPipeline
+from progress import NullProgressSink
+from result_writers import CsvStreamWriter, NdjsonStreamWriter
+
+PAGE_SIZES = {"a5": (420, 595), "a4": (595, 842), "letter": (612, 792), "a3": (842, 1191)}
+STAGES = ("render", "ocr", "results", "overlay", "pipeline")
+WORDS = (
+    "invoice", "total", "amount", "date", "account", "balance", "payment", "reference", "customer", "order",
+    "item", "quantity", "price", "tax", "net", "due", "number", "address", "phone", "service", "2024", "17.50",
+    "no.", "ltd", "charge", "period", "statement", "page", "summary", "credit",
+)
+
+
+def make_synthetic_pdf(
+        path: str,
+        *,
+        pages: int,
+        size: str = "a4",
+        dpi: int = 200,
+        lines: int = 30,
+        seed: int = 0,
+        noise: float = 8.0
+) -> str:
+    """
+    Write an image-only PDF that looks like a scan: typeset text rasterized at ``dpi`` with Gaussian noise.
+
+    The same arguments always produce the same file content.
+
+    :param path: Output PDF path.
+    :param pages: Number of pages.
+    :param size: Key of :data:`PAGE_SIZES`.
+    :param dpi: Scan resolution of the embedded images.
+    :param lines: Text lines per page.
+    :param seed: Random seed for words and noise.
+    :param noise: Standard deviation of the pixel noise.
+    :return: ``path``.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = PAGE_SIZES[size]
+    margin = 48.0
+    step = (height - 2 * margin) / max(1, lines)
+    fontsize = max(4.0, min(12.0, step * 0.7))
+    out = pymupdf.open()
+    for _ in range(pages):
+        src = pymupdf.open()
+        page = src.new_page(width=width, height=height)
+        for k in range(lines):
+            words: List[str] = []
+            while True:
+                words.append(str(rng.choice(WORDS)))
+                if pymupdf.get_text_length(" ".join(words), fontsize=fontsize) > width - 2 * margin:
+                    words.pop()
+                    break
+            page.insert_text((margin, margin + (k + 1) * step), " ".join(words), fontsize=fontsize)
+        pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+        arr = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width).astype(np.int16)
+        arr += rng.normal(0.0, noise, arr.shape).astype(np.int16)
+        img = np.clip(arr, 0, 255).astype(np.uint8)
+        scan = pymupdf.Pixmap(pymupdf.csGRAY, pix.width, pix.height, img.tobytes(), False)
+        dst = out.new_page(width=width, height=height)
+        dst.insert_image(dst.rect, pixmap=scan)
+        src.close()
+    out.save(path, garbage=3, deflate=True)
+    out.close()
+    return path
+
+
+class SyntheticOcrEngine(OcrEngine):
+    """
+    Deterministic stand-in for the OCR backend, for benchmarks without models or network.
+
+    Each band of dark rows becomes one item spanning the band's inked columns; its text is derived from
+    the band's pixels, so identical images give identical results.
+    """
+
+    def __init__(self, cost_ms_per_mpx: float = 0.0, threshold: int = 128) -> None:
+        """
+        Configure the stand-in.
+
+        :param cost_ms_per_mpx: Extra sleep per megapixel to emulate model latency.
+        :param threshold: Gray level below which a pixel counts as ink.
+        """
+        self.config: Dict[str, Any] = {"backend": "synthetic"}
+        self.cost_ms_per_mpx = cost_ms_per_mpx
+        self.threshold = threshold
+        self.in_flight = 1
+        self._predict_lock = threading.Lock()
+        self.load_seconds = None
+
+    def _page_items(self, img: np.ndarray) -> List[Dict[str, Any]]:
+        gray = img if img.ndim == 2 else img[:, :, 0]
+        ink = gray < self.threshold
+        rows = np.flatnonzero(ink.sum(axis=1) > max(1, gray.shape[1] // 500))
+        items: List[Dict[str, Any]] = []
+        if rows.size == 0:
+            return items
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]]))
+        for y0, y1 in zip(starts, ends):
+            cols = np.flatnonzero(ink[y0:y1 + 1].any(axis=0))
+            x0, x1 = int(cols[0]), int(cols[-1])
+            digest = zlib.crc32(ink[y0:y1 + 1, x0:x1 + 1].tobytes())
+            text = " ".join(WORDS[(digest >> s) % len(WORDS)] for s in (0, 5, 10, 15))
+            poly = [[x0, int(y0)], [x1, int(y0)], [x1, int(y1)], [x0, int(y1)]]
+            items.append({"poly": poly, "text": text, "score": 0.99})
+        return items
+
+    def predict_items(self, imgs: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """
+        Produce deterministic items for a batch of images.
+
+        :param imgs: Page images.
+        :return: One item list per image.
+        """
+        out = [self._page_items(img) for img in imgs]
+        if self.cost_ms_per_mpx:
+            mpx = sum(img.shape[0] * img.shape[1] for img in imgs) / 1e6
+            time.sleep(self.cost_ms_per_mpx * mpx / 1000.0)
+        return out
+
+
+def _timed(it: Iterable[Any]) -> Iterator[Tuple[float, Any]]:
+    """Yield ``(seconds_since_previous_item, item)``."""
+    t = time.perf_counter()
+    for x in it:
+        now = time.perf_counter()
+        yield now - t, x
+        t = time.perf_counter()
+
+
+def _bench_render(case: Dict[str, Any], pdf: str, tmp: str) -> Tuple[List[float], int]:
+    streamer = PdfStreamer(pdf, dpi=case["dpi"])
+    lat = []
+    for dt, (_, img) in _timed(streamer.iter_pages(range(case["pages"]))):
+        lat.append(dt)
+        streamer.release(img)
+    return lat, 0
+
+
+def _render_all(case: Dict[str, Any], pdf: str) -> List[Tuple[int, np.ndarray]]:
+    streamer = PdfStreamer(pdf, dpi=case["dpi"])
+    return list(streamer.iter_pages(range(case["pages"])))
+
+
+def _bench_ocr(case: Dict[str, Any], pdf: str, tmp: str) -> Tuple[List[float], int]:
+    pages = _render_all(case, pdf)
+    engine = SyntheticOcrEngine(case["cost_ms_per_mpx"])
+    stream = engine.stream(pages, batch_size=case["batch_size"])
+    return [dt for dt, _ in _timed(stream)], 0
+
+
+def _recognized(case: Dict[str, Any], pdf: str) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    engine = SyntheticOcrEngine()
+    return list(engine.stream(_render_all(case, pdf), batch_size=case["batch_size"]))
+
+
+def _bench_results(case: Dict[str, Any], pdf: str, tmp: str) -> Tuple[List[float], int]:
+    pages = _recognized(case, pdf)
+    csv_path, nd_path = os.path.join(tmp, "out.csv"), os.path.join(tmp, "out.ndjson")
+    csvw, ndjw = CsvStreamWriter(csv_path), NdjsonStreamWriter(nd_path)
+    lat = []
+    for pno, items in pages:
+        t = time.perf_counter()
+        csvw.write_page(pno + 1, items)
+        ndjw.write_page(pno + 1, items)
+        lat.append(time.perf_counter() - t)
+    t = time.perf_counter()
+    csvw.close()
+    ndjw.close()
+    lat[-1] += time.perf_counter() - t
+    return lat, os.path.getsize(csv_path) + os.path.getsize(nd_path)
+
+
+def _bench_overlay(case: Dict[str, Any], pdf: str, tmp: str) -> Tuple[List[float], int]:
+    pages = _recognized(case, pdf)
+    out = os.path.join(tmp, "out.pdf")
+    writer = IncrementalOverlayWriter(pdf, out, font_path=case["font_path"], dpi=case["dpi"])
+    lat = []
+    try:
+        for pno, items in pages:
+            t = time.perf_counter()
+            writer.apply_and_save(pno, items)
+            lat.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        writer.finalize()
+        lat[-1] += time.perf_counter() - t
+    finally:
+        writer.close()
+    return lat, os.path.getsize(out)
+
+
+def _bench_pipeline(case: Dict[str, Any], pdf: str, tmp: str) -> Tuple[List[float], int]:
+    out = os.path.join(tmp, "out.pdf")
+    t = time.perf_counter()
+    OCRPipeline(
+        pdf,
+        out,
+        dpi=case["dpi"],
+        font_path=case["font_path"],
+        batch_size=case["batch_size"],
+        save_csv=os.path.join(tmp, "out.csv"),
+        save_ndjson=os.path.join(tmp, "out.ndjson"),
+        ocr=SyntheticOcrEngine(case["cost_ms_per_mpx"]),
+        sink=NullProgressSink(),
+    ).run()
+    total = time.perf_counter() - t
+    return [total / case["pages"]] * case["pages"], os.path.getsize(out)
+
+
+_STAGE_FNS: Dict[str, Callable[[Dict[str, Any], str, str], Tuple[List[float], int]]] = {
+    "render": _bench_render,
+    "ocr": _bench_ocr,
+    "results": _bench_results,
+    "overlay": _bench_overlay,
+    "pipeline": _bench_pipeline,
+}
+
+
+def _run_stage(stage: str, case: Dict[str, Any], pdf: str) -> Dict[str, Any]:
+    """Run one stage of one case; called in a fresh process so peak RSS belongs to this stage."""
+    with tempfile.TemporaryDirectory(prefix="ocrbench-") as tmp:
+        t = time.perf_counter()
+        lat, size = _STAGE_FNS[stage](case, pdf, tmp)
+        seconds = time.perf_counter() - t
+    ms = sorted(x * 1000.0 for x in lat)
+    stage_s = sum(lat)
+    return {
+        "case": case["id"],
+        "stage": stage,
+        "pages": case["pages"],
+        "seconds": round(seconds, 4),
+        "pages_per_s": round(len(lat) / stage_s, 3) if stage_s > 0 else None,
+        "latency_ms_p50": round(ms[len(ms) // 2], 3),
+        "latency_ms_p95": round(ms[min(len(ms) - 1, int(0.95 * len(ms)))], 3),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "output_bytes": size,
+    }
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pymupdf": pymupdf.VersionBind,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmarks(
+        *,
+        workdir: str,
+        sizes: List[str],
+        dpis: List[int],
+        densities: List[int],
+        pages: int = 4,
+        stages: Iterable[str] = STAGES,
+        repeat: int = 1,
+        batch_size: int = 1,
+        cost_ms_per_mpx: float = 0.0,
+        font_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Generate the synthetic corpus and benchmark every stage of every case.
+
+    Each stage run happens in its own process; with ``repeat > 1`` the run with the median time is kept.
+
+    :param workdir: Directory for the generated PDFs; existing files are reused.
+    :param sizes: Page size keys.
+    :param dpis: Render DPIs; the synthetic scans use the same resolution.
+    :param densities: Text lines per page.
+    :param pages: Pages per document.
+    :param stages: Stage names from :data:`STAGES`.
+    :param repeat: Runs per stage.
+    :param batch_size: OCR batch size.
+    :param cost_ms_per_mpx: Emulated OCR model cost.
+    :param font_path: Overlay font; ``None`` uses Helvetica.
+    :return: ``{"meta": ..., "results": [...]}``.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    results: List[Dict[str, Any]] = []
+    for size in sizes:
+        for dpi in dpis:
+            for lines in densities:
+                case_id = f"{size}-{dpi}dpi-{lines}l"
+                pdf = os.path.join(workdir, f"{case_id}-{pages}p.pdf")
+                if not os.path.exists(pdf):
+                    make_synthetic_pdf(pdf, pages=pages, size=size, dpi=dpi, lines=lines)
+                case = dict(
+                    id=case_id, size=size, dpi=dpi, lines=lines, pages=pages, batch_size=batch_size,
+                    cost_ms_per_mpx=cost_ms_per_mpx, font_path=font_path,
+                )
+                for stage in stages:
+                    runs = []
+                    for _ in range(max(1, repeat)):
+                        with ProcessPoolExecutor(max_workers=1) as ex:
+                            runs.append(ex.submit(_run_stage, stage, case, pdf).result())
+                    runs.sort(key=lambda r: r["seconds"])
+                    rec = dict(runs[len(runs) // 2], size=size, dpi=dpi, lines=lines)
+                    results.append(rec)
+                    print(f"{case_id:<22} {stage:<9} {rec['pages_per_s']:>9} p/s  "
+                          f"p50 {rec['latency_ms_p50']:>9} ms  rss {rec['peak_rss_kb'] >> 10:>5} MiB")
+    return {"meta": _meta(), "results": results}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """
+    Format per-case, per-stage differences between two result files.
+
+    :param old: Baseline results.
+    :param new: Current results.
+    :return: Report lines; positive ``pages_per_s`` deltas and negative latency/RSS/size deltas are improvements.
+    """
+    base = {(r["case"], r["stage"]): r for r in old.get("results", [])}
+    lines = [f"{'case':<22} {'stage':<9} {'metric':<15} {'old':>12} {'new':>12} {'delta':>8}"]
+    for r in new.get("results", []):
+        b = base.get((r["case"], r["stage"]))
+        if b is None:
+            continue
+        for metric in ("pages_per_s", "latency_ms_p50", "latency_ms_p95", "peak_rss_kb", "output_bytes"):
+            o, n = b.get(metric), r.get(metric)
+            if not o or n is None:
+                continue
+            lines.append(f"{r['case']:<22} {r['stage']:<9} {metric:<15} {o:>12} {n:>12} {(n - o) / o:>+8.1%}")
+    return lines
+
+
+def main() -> None:
+    """
+    CLI entrypoint for the offline benchmark suite.
+
+    :return: ``None``
+    """
+    p = argparse.ArgumentParser(description="Offline benchmark of render / OCR / results / overlay / pipeline")
+    p.add_argument("--out", type=str, default="bench.json")
+    p.add_argument("--workdir", type=str, default=os.path.join(tempfile.gettempdir(), "ocr-bench"))
+    p.add_argument("--sizes", type=str, default="a4,letter,a3")
+    p.add_argument("--dpis", type=str, default="150,300")
+    p.add_argument("--densities", type=str, default="10,40")
+    p.add_argument("--pages", type=int, default=4)
+    p.add_argument("--stages", type=str, default=",".join(STAGES))
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--batch-size", type=int, default=1)
+    p.add_argument("--ocr-cost-ms-per-mpx", dest="cost_ms_per_mpx", type=float, default=0.0)
+    p.add_argument("--font", dest="font_path", type=str, default=None)
+    p.add_argument("--compare", type=str, default=None)
+
+    args = p.parse_args()
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown:
+        p.error(f"unknown stages: {', '.join(unknown)}")
+    report = run_benchmarks(
+        workdir=args.workdir,
+        sizes=[s for s in args.sizes.split(",") if s],
+        dpis=[int(x) for x in args.dpis.split(",") if x],
+        densities=[int(x) for x in args.densities.split(",") if x],
+        pages=args.pages,
+        stages=stages,
+        repeat=args.repeat,
+        batch_size=args.batch_size,
+        cost_ms_per_mpx=args.cost_ms_per_mpx,
+        font_path=args.font_path,
+    )
+    with open(args.out, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fp:
+            print("\n".join(compare(json.load(fp), report)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import pymupdf
+
+from pdf_streamer import PdfStreamer
+from result_store import ResultStoreReader
+from text_layer import TextLayerBuilder
+
+PageResults = Iterable[Tuple[int, List[Dict[str, Any]]]]
+
+
+def debug_path(output_pdf: str) -> str:
+    """
+    Derive the visible debug PDF path from the output path.
+
+    :param output_pdf: Target PDF path.
+    :return: Debug PDF path.
+    """
+    return output_pdf.replace('.pdf', '_debug.pdf')
+
+
+def select_debug_pages(input_pdf: str, page_range: Optional[str] = None,
+                       pages: Optional[str] = None) -> Optional[List[int]]:
+    """
+    Resolve the pages to include in a debug PDF.
+
+    :param input_pdf: Source PDF path.
+    :param page_range: Inclusive 1-based range like ``"10-50"``.
+    :param pages: Comma-separated 1-based list like ``"1,5,9"``.
+    :return: Sorted 0-based page indices, or ``None`` for every page if neither filter is given.
+    """
+    if not page_range and not pages:
+        return None
+    with pymupdf.open(input_pdf) as d:
+        return PdfStreamer.select_pages(d.page_count, page_range=page_range, pages=pages)
+
+
+def iter_store_pages(path: str, wanted: Optional[Set[int]] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Yield stored pages from a columnar result store, reading only the wanted row groups.
+
+    :param path: Result store path.
+    :param wanted: 1-based page numbers to read; ``None`` reads every page.
+    :yield: ``(page_no_one_based, items)`` in page order.
+    """
+    with ResultStoreReader(path) as store:
+        for page_no in store.pages:
+            if wanted is None or page_no in wanted:
+                yield page_no, store.page_items(page_no)
+
+
+def iter_ndjson_pages(path: str, wanted: Optional[Set[int]] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Yield pages from an NDJSON result file, grouping consecutive lines of the same page.
+
+    :param path: NDJSON path as written by :class:`result_writers.NdjsonStreamWriter`.
+    :param wanted: 1-based page numbers to read; ``None`` reads every page.
+    :yield: ``(page_no_one_based, items)`` in file order.
+    """
+    page_no: Optional[int] = None
+    items: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if rec["page"] != page_no:
+                if items:
+                    yield page_no, items
+                page_no, items = rec["page"], []
+            if wanted is None or page_no in wanted:
+                items.append({"text": rec.get("text"), "score": rec.get("score", 0.0), "poly": rec.get("poly") or None})
+    if items:
+        yield page_no, items
+
+
+def render_debug_pdf(
+        input_pdf: str,
+        output_pdf: str,
+        results: PageResults,
+        *,
+        pages: Optional[List[int]] = None,
+        dpi: int = 300,
+        font_path: Optional[str] = None,
+        subset_fonts: bool = True
+) -> Dict[str, Any]:
+    """
+    Write a PDF showing OCR results as visible red text over the source pages.
+
+    Runs after OCR from stored results, so the main pipeline never pays for it; with ``pages`` only those
+    pages are copied into the debug PDF.
+
+    :param input_pdf: Source PDF path.
+    :param output_pdf: Debug PDF path.
+    :param results: ``(page_no_one_based, items)`` with polygons in pixels at ``dpi``, e.g. from
+        :func:`iter_store_pages` or :func:`iter_ndjson_pages`. Pages outside ``pages`` are ignored.
+    :param pages: Sorted 0-based page indices to include; ``None`` includes every page.
+    :param dpi: DPI the result coordinates refer to.
+    :param font_path: Font file used for all text.
+    :param subset_fonts: Subset the embedded font to the used glyphs.
+    :return: ``debug_pages``, ``debug_items`` and ``debug_s``.
+    """
+    t0 = time.perf_counter()
+    layer = TextLayerBuilder(font_path)
+    scale = dpi / 72.0
+    drawn = items_drawn = 0
+    with pymupdf.open(input_pdf) as doc:
+        if pages is not None and len(pages) != doc.page_count:
+            doc.select(pages)
+        position = {p: i for i, p in enumerate(pages if pages is not None else range(doc.page_count))}
+        for page_no, items in results:
+            pos = position.get(page_no - 1)
+            if pos is None:
+                continue
+            page = doc.load_page(pos)
+            page.wrap_contents()
+            items_drawn += layer.write(page, items, scale, visible=True)
+            drawn += 1
+        if subset_fonts and font_path:
+            doc.subset_fonts()
+        os.makedirs(os.path.dirname(output_pdf) or ".", exist_ok=True)
+        tmp = output_pdf + ".tmp"
+        doc.save(tmp, garbage=3, deflate=True)
+    os.replace(tmp, output_pdf)
+    return {"debug_pages": drawn, "debug_items": items_drawn, "debug_s": round(time.perf_counter() - t0, 3)}
+
+
+def main() -> None:
+    """CLI entrypoint: render a visible debug PDF from a result store or NDJSON file."""
+    p = argparse.ArgumentParser(description="Render OCR results as visible text over the source PDF")
+    p.add_argument("input_pdf", type=str)
+    p.add_argument("output_pdf", type=str)
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--store", type=str, default=None)
+    src.add_argument("--ndjson", type=str, default=None)
+    p.add_argument("--page-range", type=str, default=None)
+    p.add_argument("--pages", type=str, default=None)
+    p.add_argument("--dpi", type=int, default=300)
+    p.add_argument("--font", dest="font_path", type=str, default=None)
+    p.add_argument("--no-subset-fonts", dest="subset_fonts", action="store_false")
+    args = p.parse_args()
+    pages = select_debug_pages(args.input_pdf, page_range=args.page_range, pages=args.pages)
+    wanted = {i + 1 for i in pages} if pages is not None else None
+    results = iter_store_pages(args.store, wanted) if args.store else iter_ndjson_pages(args.ndjson, wanted)
+    stats = render_debug_pdf(
+        args.input_pdf,
+        args.output_pdf,
+        results,
+        pages=pages,
+        dpi=args.dpi,
+        font_path=args.font_path,
+        subset_fonts=args.subset_fonts,
+    )
+    print(" ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
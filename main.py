@@ -1,8 +1,258 @@
 from __future__ import annotations
 
 import argparse
+import time
+from typing import Any, Dict, List
 
-from pipeline import OCRPipeline
+_STARTED = time.perf_counter()
+
+
+def run_plan(args: argparse.Namespace, import_s: float) -> None:
+    """
+    Print the pages a run would OCR and the expected work, without loading models or writing outputs.
+
+    :param args: Parsed CLI arguments.
+    :param import_s: Seconds spent importing the pipeline module.
+    """
+    from pipeline import OCRPipeline
+
+    t0 = time.perf_counter()
+    plan: Dict[str, Any] = OCRPipeline.plan(
+        args.input_pdf,
+        args.output_pdf,
+        dpi=args.dpi,
+        page_range=args.page_range,
+        pages=args.pages,
+        page_step=args.page_step,
+        batch_size=args.batch_size,
+        resume=args.resume,
+        journal_path=args.journal_path,
+        skip_text_pages=args.skip_text_pages,
+        tile_mpx=args.tile_mpx,
+        tile_overlap=args.tile_overlap,
+        adaptive_dpi=args.adaptive_dpi,
+        min_dpi=args.min_dpi,
+        target_xheight_px=args.target_xheight_px,
+    )
+    plan.update(
+        import_ms=round(1000.0 * import_s, 1),
+        plan_ms=round(1000.0 * (time.perf_counter() - t0), 1),
+        startup_ms=round(1000.0 * (time.perf_counter() - _STARTED), 1),
+    )
+    for key, value in plan.items():
+        print(f"{key}: {value}")
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Run batch mode: ``input_pdf`` is a directory, manifest or glob and ``output_pdf`` a directory.
+
+    :param args: Parsed CLI arguments.
+    :return: Process exit code; ``1`` if any document failed.
+    """
+    from batch_runner import BatchRunner, collect_inputs
+    from pipeline import OCRPipeline
+
+    jobs = collect_inputs(args.input_pdf, args.output_pdf)
+    if not jobs:
+        raise SystemExit(f"no input PDFs match {args.input_pdf!r}")
+    ocr = OCRPipeline.build_engine(
+        device=args.device,
+        lang=args.lang,
+        rec_model=args.rec_model,
+        workers=args.ocr_workers,
+        threads=args.ocr_threads,
+    )
+    try:
+        runner = BatchRunner(
+            jobs,
+            ocr,
+            csv_dir=args.save_csv,
+            ndjson_dir=args.save_ndjson,
+            store_dir=args.save_store,
+            docs_in_flight=args.docs_in_flight,
+            batch_size=args.batch_size,
+            reorder_window=args.reorder_window,
+            max_batch_pixels=int(args.max_batch_mpx * 1_000_000),
+            cache_dir=args.cache_dir,
+            cache_max_mb=args.cache_max_mb,
+            skip_blank=args.skip_blank,
+            blank_ink_ratio=args.blank_ink_ratio,
+            blank_min_std=args.blank_min_std,
+            dpi=args.dpi,
+            font_path=args.font_path,
+            index_db=args.index_db,
+            page_range=args.page_range,
+            pages=args.pages,
+            page_step=args.page_step,
+            debug_visible=args.debug_visible,
+            debug_pages=args.debug_pages,
+            render_workers=args.render_workers,
+            render_prefetch=args.render_prefetch,
+            commit_every=args.commit_every,
+            commit_seconds=args.commit_seconds,
+            consolidate=args.consolidate,
+            subset_fonts=args.subset_fonts,
+            resume=args.resume,
+            skip_text_pages=args.skip_text_pages,
+            adaptive_dpi=args.adaptive_dpi,
+            min_dpi=args.min_dpi,
+            target_xheight_px=args.target_xheight_px,
+            gray=args.gray,
+            reuse_buffers=args.reuse_buffers,
+            tile_mpx=args.tile_mpx,
+            tile_overlap=args.tile_overlap,
+            crop_margins=args.crop_margins,
+            pre_gray=args.pre_gray,
+            normalize_contrast=args.normalize_contrast,
+            max_side=args.max_side,
+            mem_budget_mb=args.mem_budget_mb,
+        )
+        errors = runner.run()
+    finally:
+        ocr.close()
+    return 1 if errors else 0
+
+
+def run_sharded(args: argparse.Namespace) -> int:
+    """
+    Run shard mode: OCR page-range shards into fragments and/or merge them into the final outputs.
+
+    With ``--shard-index`` only that shard runs, e.g. on one node of a cluster sharing ``--shard-dir``;
+    ``--merge-shards`` only merges; otherwise all shards run as local processes and are merged.
+
+    :param args: Parsed CLI arguments.
+    :return: Process exit code; ``1`` if any shard failed.
+    """
+    from shard import ShardedRun
+
+    sharded = ShardedRun(
+        args.input_pdf,
+        args.shard_dir or args.output_pdf + ".shards",
+        args.shards,
+        page_range=args.page_range,
+        pages=args.pages,
+        page_step=args.page_step,
+    )
+    if not args.merge_shards:
+        kwargs = dict(
+            save_csv=bool(args.save_csv),
+            save_ndjson=bool(args.save_ndjson),
+            resume=args.resume,
+            dpi=args.dpi,
+            device=args.device,
+            lang=args.lang,
+            rec_model=args.rec_model,
+            batch_size=args.batch_size,
+            render_workers=args.render_workers,
+            render_prefetch=args.render_prefetch,
+            concurrent=args.concurrent,
+            cache_dir=args.cache_dir,
+            cache_max_mb=args.cache_max_mb,
+            skip_text_pages=args.skip_text_pages,
+            adaptive_dpi=args.adaptive_dpi,
+            min_dpi=args.min_dpi,
+            target_xheight_px=args.target_xheight_px,
+            skip_blank=args.skip_blank,
+            blank_ink_ratio=args.blank_ink_ratio,
+            blank_min_std=args.blank_min_std,
+            gray=args.gray,
+            reuse_buffers=args.reuse_buffers,
+            reorder_window=args.reorder_window,
+            max_batch_mpx=args.max_batch_mpx,
+            ocr_workers=args.ocr_workers,
+            ocr_threads=args.ocr_threads,
+            tile_mpx=args.tile_mpx,
+            tile_overlap=args.tile_overlap,
+            crop_margins=args.crop_margins,
+            pre_gray=args.pre_gray,
+            normalize_contrast=args.normalize_contrast,
+            max_side=args.max_side,
+            mem_budget_mb=args.mem_budget_mb,
+        )
+        if args.shard_index is not None:
+            sharded.run_shard(args.shard_index, **kwargs)
+            return 0
+        if sharded.run_local(**kwargs):
+            return 1
+    try:
+        stats = sharded.merge(
+            args.output_pdf,
+            font_path=args.font_path,
+            save_csv=args.save_csv,
+            save_ndjson=args.save_ndjson,
+            save_store=args.save_store,
+            index_db=args.index_db,
+            debug_visible=args.debug_visible,
+            debug_pages=args.debug_pages,
+            consolidate=args.consolidate,
+            subset_fonts=args.subset_fonts,
+        )
+    except ValueError as exc:
+        raise SystemExit(f"cannot merge shards: {exc}")
+    print(" ".join(f"{k}={v}" for k, v in stats.items()))
+    return 0
+
+
+def run_service(args: argparse.Namespace) -> None:
+    """
+    Run the OCR service: load the engine once and serve the job API until interrupted.
+
+    Command-line pipeline options become the defaults of every job.
+
+    :param args: Parsed CLI arguments.
+    """
+    from ocr_service import OcrService, serve
+    from pipeline import OCRPipeline
+
+    ocr = OCRPipeline.build_engine(
+        device=args.device,
+        lang=args.lang,
+        rec_model=args.rec_model,
+        workers=args.ocr_workers,
+        threads=args.ocr_threads,
+    )
+    defaults = dict(
+        dpi=args.dpi,
+        font_path=args.font_path,
+        index_db=args.index_db,
+        batch_size=args.batch_size,
+        debug_visible=args.debug_visible,
+        debug_pages=args.debug_pages,
+        commit_every=args.commit_every,
+        commit_seconds=args.commit_seconds,
+        consolidate=args.consolidate,
+        subset_fonts=args.subset_fonts,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        skip_text_pages=args.skip_text_pages,
+        adaptive_dpi=args.adaptive_dpi,
+        min_dpi=args.min_dpi,
+        target_xheight_px=args.target_xheight_px,
+        skip_blank=args.skip_blank,
+        blank_ink_ratio=args.blank_ink_ratio,
+        blank_min_std=args.blank_min_std,
+        gray=args.gray,
+        reuse_buffers=args.reuse_buffers,
+        reorder_window=args.reorder_window,
+        max_batch_mpx=args.max_batch_mpx,
+        render_workers=args.render_workers,
+        render_prefetch=args.render_prefetch,
+        concurrent=args.concurrent,
+        tile_mpx=args.tile_mpx,
+        tile_overlap=args.tile_overlap,
+        crop_margins=args.crop_margins,
+        pre_gray=args.pre_gray,
+        normalize_contrast=args.normalize_contrast,
+        max_side=args.max_side,
+        mem_budget_mb=args.mem_budget_mb,
+    )
+    ocr.load()
+    service = OcrService(ocr, workers=args.service_workers, defaults=defaults, root=args.service_root)
+    try:
+        serve(service, host=args.host, port=args.port, socket_path=args.socket_path)
+    finally:
+        ocr.close()
 
 
 def main() -> None:
@@ -12,8 +262,8 @@ def main() -> None:
     :return: ``None``
     """
     p = argparse.ArgumentParser(description="Scanned PDF → searchable PDF (streaming, class-based)")
-    p.add_argument("input_pdf")
-    p.add_argument("output_pdf")
+    p.add_argument("input_pdf", nargs="?")
+    p.add_argument("output_pdf", nargs="?")
     p.add_argument("--dpi", type=int, default=300)
     p.add_argument("--device", type=str, default="auto")
     p.add_argument("--lang", type=str, default="korean")
@@ -25,9 +275,94 @@ def main() -> None:
     p.add_argument("--batch-size", type=int, default=1)
     p.add_argument("--save-csv", type=str, default=None)
     p.add_argument("--save-ndjson", type=str, default=None)
+    p.add_argument("--save-store", type=str, default=None)
+    p.add_argument("--index-db", type=str, default=None)
     p.add_argument("--debug-visible", action="store_true")
+    p.add_argument("--debug-pages", type=str, default=None)
+    p.add_argument("--render-workers", type=int, default=0)
+    p.add_argument("--render-prefetch", type=int, default=0)
+    p.add_argument("--concurrent", action="store_true")
+    p.add_argument("--render-queue-depth", type=int, default=4)
+    p.add_argument("--ocr-queue-depth", type=int, default=4)
+    p.add_argument("--result-queue-depth", type=int, default=16)
+    p.add_argument("--commit-every", type=int, default=1)
+    p.add_argument("--commit-seconds", type=float, default=0.0)
+    p.add_argument("--no-consolidate", dest="consolidate", action="store_false")
+    p.add_argument("--no-subset-fonts", dest="subset_fonts", action="store_false")
+    p.add_argument("--resume", action="store_true")
+    p.add_argument("--journal", dest="journal_path", type=str, default=None)
+    p.add_argument("--cache-dir", type=str, default=None)
+    p.add_argument("--cache-max-mb", type=int, default=1024)
+    p.add_argument("--no-skip-text-pages", dest="skip_text_pages", action="store_false")
+    p.add_argument("--adaptive-dpi", action="store_true")
+    p.add_argument("--min-dpi", type=int, default=100)
+    p.add_argument("--target-xheight", dest="target_xheight_px", type=float, default=12.0)
+    p.add_argument("--skip-blank", action="store_true")
+    p.add_argument("--blank-ink-ratio", type=float, default=0.001)
+    p.add_argument("--blank-min-std", type=float, default=3.0)
+    p.add_argument("--gray", action="store_true")
+    p.add_argument("--no-buffer-pool", dest="reuse_buffers", action="store_false")
+    p.add_argument("--reorder-window", type=int, default=0)
+    p.add_argument("--max-batch-mpx", type=float, default=0.0)
+    p.add_argument("--ocr-workers", type=int, default=0)
+    p.add_argument("--ocr-threads", type=int, default=0)
+    p.add_argument("--tile-mpx", type=float, default=0.0)
+    p.add_argument("--tile-overlap", type=int, default=200)
+    p.add_argument("--crop-margins", action="store_true")
+    p.add_argument("--pre-gray", action="store_true")
+    p.add_argument("--normalize-contrast", action="store_true")
+    p.add_argument("--max-side", type=int, default=0)
+    p.add_argument("--mem-budget-mb", type=int, default=0)
+    p.add_argument("--shards", type=int, default=0)
+    p.add_argument("--shard-index", type=int, default=None)
+    p.add_argument("--merge-shards", action="store_true")
+    p.add_argument("--shard-dir", type=str, default=None)
+    p.add_argument("--plan", action="store_true")
+    p.add_argument("--batch", action="store_true")
+    p.add_argument("--docs-in-flight", type=int, default=4)
+    p.add_argument("--serve", action="store_true")
+    p.add_argument("--host", type=str, default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--socket", dest="socket_path", type=str, default=None)
+    p.add_argument("--service-workers", type=int, default=1)
+    p.add_argument("--service-root", type=str, default=None)
+    p.add_argument("--metrics-jsonl", type=str, default=None)
+    p.add_argument("--metrics-prom", type=str, default=None)
+    p.add_argument("--metrics-interval", type=float, default=10.0)
 
     args = p.parse_args()
+    if args.plan and not args.input_pdf:
+        p.error("input_pdf is required")
+    if args.plan and args.resume and not (args.output_pdf or args.journal_path):
+        p.error("--plan --resume needs output_pdf or --journal")
+    if not args.serve and not args.plan and (not args.input_pdf or not args.output_pdf):
+        p.error("input_pdf and output_pdf are required")
+    if args.debug_visible and not args.serve and args.shards <= 0 and not (args.save_store or args.save_ndjson):
+        p.error("--debug-visible renders from stored results; add --save-store or --save-ndjson")
+    t0 = time.perf_counter()
+    from pipeline import OCRPipeline
+    import_s = time.perf_counter() - t0
+    if args.serve:
+        run_service(args)
+        return
+    if args.plan:
+        run_plan(args, import_s)
+        return
+    if args.batch:
+        raise SystemExit(run_batch(args))
+    if args.shards > 0:
+        if args.shard_index is not None and not 0 <= args.shard_index < args.shards:
+            p.error("--shard-index must be in [0, --shards)")
+        raise SystemExit(run_sharded(args))
+
+    from metrics import JsonLinesMetricsSink, PrometheusTextfileSink
+    from progress import ProgressSink, TeeProgressSink, TqdmProgressSink
+
+    sinks: List[ProgressSink] = [TqdmProgressSink()]
+    if args.metrics_jsonl:
+        sinks.append(JsonLinesMetricsSink(args.metrics_jsonl, interval=args.metrics_interval))
+    if args.metrics_prom:
+        sinks.append(PrometheusTextfileSink(args.metrics_prom, interval=args.metrics_interval))
 
     pipe = OCRPipeline(
         input_pdf=args.input_pdf,
@@ -43,8 +378,47 @@ def main() -> None:
         batch_size=args.batch_size,
         save_csv=args.save_csv,
         save_ndjson=args.save_ndjson,
+        save_store=args.save_store,
+        index_db=args.index_db,
         debug_visible=args.debug_visible,
+        debug_pages=args.debug_pages,
+        render_workers=args.render_workers,
+        render_prefetch=args.render_prefetch,
+        concurrent=args.concurrent,
+        render_queue_depth=args.render_queue_depth,
+        ocr_queue_depth=args.ocr_queue_depth,
+        result_queue_depth=args.result_queue_depth,
+        commit_every=args.commit_every,
+        commit_seconds=args.commit_seconds,
+        consolidate=args.consolidate,
+        subset_fonts=args.subset_fonts,
+        resume=args.resume,
+        journal_path=args.journal_path,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        skip_text_pages=args.skip_text_pages,
+        adaptive_dpi=args.adaptive_dpi,
+        min_dpi=args.min_dpi,
+        target_xheight_px=args.target_xheight_px,
+        skip_blank=args.skip_blank,
+        blank_ink_ratio=args.blank_ink_ratio,
+        blank_min_std=args.blank_min_std,
+        gray=args.gray,
+        reuse_buffers=args.reuse_buffers,
+        reorder_window=args.reorder_window,
+        max_batch_mpx=args.max_batch_mpx,
+        ocr_workers=args.ocr_workers,
+        ocr_threads=args.ocr_threads,
+        tile_mpx=args.tile_mpx,
+        tile_overlap=args.tile_overlap,
+        crop_margins=args.crop_margins,
+        pre_gray=args.pre_gray,
+        normalize_contrast=args.normalize_contrast,
+        max_side=args.max_side,
+        mem_budget_mb=args.mem_budget_mb,
+        sink=sinks[0] if len(sinks) == 1 else TeeProgressSink(*sinks),
     )
+    pipe.sink.on_stats({"import_s": round(import_s, 3), "startup_s": round(time.perf_counter() - _STARTED, 3)})
     pipe.run()
 
 
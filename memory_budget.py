@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Set
+
+STAGE_RENDER = "render"
+STAGE_OCR = "ocr"
+STAGE_OVERLAY = "overlay"
+
+STAGES = (STAGE_RENDER, STAGE_OCR, STAGE_OVERLAY)
+
+
+class MemoryGovernor:
+    """
+    Account the bytes held by pipeline stages against one memory budget.
+
+    Stages charge what they hold and discharge it when it is handed on or freed: ``render`` holds rendered
+    images not yet taken by OCR, ``ocr`` the images waiting for or inside an OCR batch, and ``overlay`` the
+    recognized pages queued for the text layer. Before yielding an image, a renderer :meth:`announce` s the
+    estimated size of the one it renders next; whenever that would not fit next to what is held, the OCR
+    stream submits its waiting pages and drains its in-flight batches before taking more input
+    (:meth:`needs_room`). Renderers then call :meth:`wait_for_room` before rasterizing, which blocks on the
+    total while anything is still held, so the peak stays within the budget instead of following
+    ``dpi * batch_size * page size``. When nothing is held, a single page larger than the budget is admitted
+    instead of stalling the pipeline, and a renderer pulled on the consumer's own thread never blocks, since
+    nothing else would release memory for it.
+    """
+
+    ITEM_BYTES = 512
+
+    def __init__(self, budget_bytes: int) -> None:
+        """
+        Create a governor.
+
+        :param budget_bytes: Total bytes the stages may hold at once.
+        """
+        self.budget = max(1, budget_bytes)
+        self.held: Dict[str, int] = {s: 0 for s in STAGES}
+        self.peak: Dict[str, int] = {s: 0 for s in STAGES}
+        self.total = 0
+        self.peak_total = 0
+        self.waited = 0.0
+        self.early_batches = 0
+        self._demand: Dict[int, int] = {}
+        self._consumers: Set[int] = set()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    def items_nbytes(cls, items: List[Dict[str, Any]]) -> int:
+        """
+        Rough in-memory size of OCR items: a fixed Python object footprint per item plus its text.
+
+        :param items: OCR items.
+        :return: Estimated bytes.
+        """
+        return sum(cls.ITEM_BYTES + len(it.get("text") or "") for it in items)
+
+    def charge(self, stage: str, nbytes: int) -> None:
+        """
+        Record bytes now held by a stage.
+
+        :param stage: Stage name, one of :data:`STAGES`.
+        :param nbytes: Bytes acquired.
+        """
+        with self._cond:
+            self.held[stage] += nbytes
+            self.total += nbytes
+            self.peak[stage] = max(self.peak[stage], self.held[stage])
+            self.peak_total = max(self.peak_total, self.total)
+
+    def discharge(self, stage: str, nbytes: int) -> None:
+        """
+        Record bytes a stage no longer holds and wake waiting renderers.
+
+        :param stage: Stage name, one of :data:`STAGES`.
+        :param nbytes: Bytes released.
+        """
+        with self._cond:
+            self.held[stage] -= nbytes
+            self.total -= nbytes
+            self._cond.notify_all()
+
+    def transfer(self, src: str, dst: str, nbytes: int) -> None:
+        """
+        Move bytes from one stage to the next without changing the total.
+
+        :param src: Stage handing the bytes on.
+        :param dst: Stage taking them.
+        :param nbytes: Bytes moved.
+        """
+        with self._cond:
+            self.held[src] -= nbytes
+            self.held[dst] += nbytes
+            self.peak[dst] = max(self.peak[dst], self.held[dst])
+            self._cond.notify_all()
+
+    def announce(self, owner: object, nbytes: int) -> None:
+        """
+        Declare the estimated size of the image a renderer rasterizes next.
+
+        Renderers call this before yielding the current image, so the consumer sees the demand before it
+        asks for more input; ``0`` withdraws it.
+
+        :param owner: The renderer, e.g. a :class:`PdfStreamer`; each keeps one announcement.
+        :param nbytes: Estimated bytes of the next image.
+        """
+        with self._cond:
+            if nbytes > 0:
+                self._demand[id(owner)] = nbytes
+            else:
+                self._demand.pop(id(owner), None)
+
+    def add_consumer(self) -> None:
+        """Register the calling thread as the one that releases memory, e.g. the OCR stream."""
+        with self._cond:
+            self._consumers.add(threading.get_ident())
+
+    def remove_consumer(self) -> None:
+        """Undo :meth:`add_consumer` for the calling thread."""
+        with self._cond:
+            self._consumers.discard(threading.get_ident())
+
+    def needs_room(self) -> bool:
+        """
+        Check whether the held bytes plus the largest announced image exceed the budget.
+
+        :return: ``True`` if consumers should release what they can before taking more input.
+        """
+        with self._cond:
+            return self.total + max(self._demand.values(), default=0) > self.budget
+
+    def wait_for_room(self, owner: object, nbytes: int) -> float:
+        """
+        Block until ``nbytes`` more fit in the budget or the stages hold nothing at all.
+
+        Returns at once on a consumer thread (:meth:`add_consumer`), where waiting could never end.
+
+        :param owner: The renderer, as passed to :meth:`announce`.
+        :param nbytes: Estimated bytes about to be acquired.
+        :return: Seconds spent waiting.
+        """
+        with self._cond:
+            if self._closed or self.total <= 0 or self.total + nbytes <= self.budget:
+                return 0.0
+            if threading.get_ident() in self._consumers:
+                return 0.0
+            self._demand[id(owner)] = max(nbytes, self._demand.get(id(owner), 0))
+            t0 = time.perf_counter()
+            while not self._closed and self.total > 0 and self.total + nbytes > self.budget:
+                self._cond.wait()
+            waited = time.perf_counter() - t0
+            self.waited += waited
+        return waited
+
+    def note_early_batch(self) -> None:
+        """Count a batch submitted before it was full to make room within the budget."""
+        with self._cond:
+            self.early_batches += 1
+
+    def close(self) -> None:
+        """Stop throttling for good and release every waiting renderer, e.g. when a run is cancelled."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return budget counters for the progress sink.
+
+        :return: ``mem_budget_mb``, ``mem_peak_mb``, ``mem_peak_<stage>_mb`` per stage, ``mem_wait_s``
+            (time renderers were throttled) and ``mem_early_batches``.
+        """
+        stats: Dict[str, Any] = {
+            "mem_budget_mb": round(self.budget / (1 << 20), 1),
+            "mem_peak_mb": round(self.peak_total / (1 << 20), 1),
+        }
+        for s in STAGES:
+            stats[f"mem_peak_{s}_mb"] = round(self.peak[s] / (1 << 20), 1)
+        stats["mem_wait_s"] = round(self.waited, 3)
+        stats["mem_early_batches"] = self.early_batches
+        return stats
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from abc import abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+from progress import ProgressSink
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class StageMetrics:
+    """Latency histogram and throughput counters of one event stage."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.pages = 0
+        self.nbytes = 0
+        self.items = 0
+
+    def observe(self, seconds: float, pages: int, nbytes: int, items: int) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.pages += pages
+        self.nbytes += nbytes
+        self.items += items
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a latency quantile as the upper bound of the bucket that contains it.
+
+        :param q: Quantile in ``[0, 1]``.
+        :return: Seconds, ``inf`` if it falls above the last bucket, or ``None`` without observations.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        acc = 0
+        for bound, n in zip(self.buckets, self.counts):
+            acc += n
+            if acc >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[int]:
+        """
+        Return cumulative bucket counts, Prometheus style; the last entry is the ``+Inf`` bucket.
+
+        :return: One count per bucket plus ``+Inf``.
+        """
+        out, acc = [], 0
+        for n in self.counts:
+            acc += n
+            out.append(acc)
+        return out
+
+
+class MetricsSink(ProgressSink):
+    """
+    Aggregate progress and timing events into per-stage latency histograms and throughput counters.
+
+    Abstract: subclasses implement :meth:`export` to write a snapshot in their format.
+
+    Recording is a lock plus a few additions per event; :meth:`export` runs at most once per ``interval``
+    seconds from whichever thread reports an event, and once more on :meth:`close`.
+    """
+
+    def __init__(self, path: str, interval: float = 10.0, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        Configure the sink.
+
+        :param path: Output file path.
+        :param interval: Minimum seconds between exports; ``0`` exports only on close.
+        :param buckets: Histogram upper bounds in seconds, ascending.
+        """
+        self.path = path
+        self.interval = interval
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, StageMetrics] = {}
+        self.totals: Dict[str, Optional[int]] = {"render": None, "ocr": None, "overlay": None}
+        self.done: Dict[str, int] = {"render": 0, "ocr": 0, "overlay": 0}
+        self.stats: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_export = self._started
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+    def set_totals(
+            self,
+            *,
+            render_total: Optional[int],
+            ocr_total: Optional[int],
+            overlay_total: Optional[int]
+    ) -> None:
+        with self._lock:
+            self.totals = {"render": render_total, "ocr": ocr_total, "overlay": overlay_total}
+
+    def _advance(self, phase: str, n: int) -> None:
+        with self._lock:
+            self.done[phase] += n
+        self._maybe_export()
+
+    def on_render_advance(self, n: int = 1) -> None:
+        self._advance("render", n)
+
+    def on_ocr_advance(self, n: int = 1) -> None:
+        self._advance("ocr", n)
+
+    def on_overlay_advance(self, n: int = 1) -> None:
+        self._advance("overlay", n)
+
+    def on_stats(self, stats: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stats.update(stats)
+
+    def on_timing(self, stage: str, seconds: float, *, pages: int = 1, nbytes: int = 0, items: int = 0) -> None:
+        with self._lock:
+            m = self.stages.get(stage)
+            if m is None:
+                m = self.stages[stage] = StageMetrics(self.buckets)
+            m.observe(seconds, pages, nbytes, items)
+
+    def _maybe_export(self) -> None:
+        if self.interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_export < self.interval:
+            return
+        with self._lock:
+            if now - self._last_export < self.interval:
+                return
+            self._last_export = now
+            self.export()
+
+    def elapsed(self) -> float:
+        """
+        Seconds since the sink was created.
+
+        :return: Wall time.
+        """
+        return max(1e-9, time.monotonic() - self._started)
+
+    @abstractmethod
+    def export(self) -> None:
+        """Write the current metrics to :attr:`path`. Called with the internal lock held."""
+
+    def close(self) -> None:
+        with self._lock:
+            self.export()
+
+
+class JsonLinesMetricsSink(MetricsSink):
+    """Append one JSON snapshot of all stage metrics per export to a JSON-lines log."""
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[float]:
+        return None if seconds is None or seconds == float("inf") else round(1000.0 * seconds, 3)
+
+    def export(self) -> None:
+        elapsed = self.elapsed()
+        stages = {}
+        for name, m in self.stages.items():
+            stages[name] = {
+                "count": m.count,
+                "seconds": round(m.seconds, 6),
+                "mean_ms": round(1000.0 * m.seconds / m.count, 3),
+                "p50_ms": self._ms(m.quantile(0.5)),
+                "p95_ms": self._ms(m.quantile(0.95)),
+                "p99_ms": self._ms(m.quantile(0.99)),
+                "pages": m.pages,
+                "pages_per_s": round(m.pages / elapsed, 3),
+                "bytes": m.nbytes,
+                "items": m.items,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], m.cumulative())),
+            }
+        rec = {
+            "time": time.time(),
+            "elapsed_s": round(elapsed, 3),
+            "totals": dict(self.totals),
+            "done": dict(self.done),
+            "stages": stages,
+            "stats": dict(self.stats),
+        }
+        with open(self.path, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps(rec, default=str) + "\n")
+
+
+class PrometheusTextfileSink(MetricsSink):
+    """
+    Write metrics in the Prometheus text exposition format, e.g. for the node_exporter textfile collector.
+
+    The file is replaced atomically on every export.
+    """
+
+    PREFIX = "pdf_ocr"
+
+    def export(self) -> None:
+        p = self.PREFIX
+        elapsed = self.elapsed()
+        lines = [
+            f"# HELP {p}_stage_duration_seconds Duration of timed pipeline events by stage.",
+            f"# TYPE {p}_stage_duration_seconds histogram",
+        ]
+        for name, m in sorted(self.stages.items()):
+            for bound, n in zip([repr(b) for b in self.buckets] + ["+Inf"], m.cumulative()):
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {n}')
+            lines.append(f'{p}_stage_duration_seconds_sum{{stage="{name}"}} {m.seconds:.6f}')
+            lines.append(f'{p}_stage_duration_seconds_count{{stage="{name}"}} {m.count}')
+        for metric, attr, help_text in (
+                ("stage_pages_total", "pages", "Pages covered by timed events."),
+                ("stage_bytes_total", "nbytes", "Bytes produced by timed events."),
+                ("stage_items_total", "items", "OCR items handled by timed events."),
+        ):
+            lines.append(f"# HELP {p}_{metric} {help_text}")
+            lines.append(f"# TYPE {p}_{metric} counter")
+            for name, m in sorted(self.stages.items()):
+                lines.append(f'{p}_{metric}{{stage="{name}"}} {getattr(m, attr)}')
+        lines.append(f"# HELP {p}_stage_pages_per_second Pages per second of wall time by stage.")
+        lines.append(f"# TYPE {p}_stage_pages_per_second gauge")
+        for name, m in sorted(self.stages.items()):
+            lines.append(f'{p}_stage_pages_per_second{{stage="{name}"}} {m.pages / elapsed:.6f}')
+        lines.append(f"# HELP {p}_pages_done_total Pages finished by phase.")
+        lines.append(f"# TYPE {p}_pages_done_total counter")
+        for phase, n in self.done.items():
+            lines.append(f'{p}_pages_done_total{{phase="{phase}"}} {n}')
+        lines.append(f"# HELP {p}_pages_planned Pages planned by phase.")
+        lines.append(f"# TYPE {p}_pages_planned gauge")
+        for phase, n in self.totals.items():
+            if n is not None:
+                lines.append(f'{p}_pages_planned{{phase="{phase}"}} {n}')
+        lines.append(f"# HELP {p}_run_stat Run statistics reported by pipeline components.")
+        lines.append(f"# TYPE {p}_run_stat gauge")
+        for key, value in sorted(self.stats.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'{p}_run_stat{{name="{key}"}} {value}')
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
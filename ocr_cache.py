@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class OcrResultCache:
+    """
+    On-disk cache of per-page OCR items keyed by page image content and engine configuration.
+
+    Entries are small JSON files under ``directory``, sharded by the first two hex digits of the key.
+    When the total size exceeds ``max_bytes``, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30, namespace: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Open or create the cache directory.
+
+        :param directory: Cache root directory.
+        :param max_bytes: Size budget for all entries.
+        :param namespace: Engine configuration mixed into every key (language, model, DPI, ...).
+        """
+        self.directory = directory
+        self.max_bytes = max(0, max_bytes)
+        self._prefix = json.dumps(namespace or {}, sort_keys=True).encode("utf-8")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".json"):
+                    self._total += os.path.getsize(os.path.join(root, name))
+
+    def key(self, img: np.ndarray) -> str:
+        """
+        Compute the content key of a page image.
+
+        :param img: Page image as passed to the OCR engine.
+        :return: Hex digest.
+        """
+        h = hashlib.blake2b(self._prefix, digest_size=20)
+        h.update(repr((img.shape, str(img.dtype))).encode("ascii"))
+        h.update(np.ascontiguousarray(img).data)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached items and refresh the entry's recency.
+
+        :param key: Content key from :meth:`key`.
+        :return: OCR items, or ``None`` on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fp:
+                items = json.load(fp)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return items
+
+    def put(self, key: str, items: List[Dict[str, Any]]) -> None:
+        """
+        Store items for a page and evict old entries if over budget.
+
+        :param key: Content key from :meth:`key`.
+        :param items: OCR items with ``poly``, ``text``, ``score``.
+        """
+        rows = [
+            {
+                "poly": [[float(x), float(y)] for x, y in (it.get("poly") or [])],
+                "text": it.get("text"),
+                "score": float(it.get("score", 0.0)),
+            }
+            for it in items
+        ]
+        data = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+            self._total += len(data) - replaced
+            over = self._total > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is back under 90% of its budget."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                p = os.path.join(root, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._total = total
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters.
+
+        :return: Dictionary with ``cache_hits`` and ``cache_misses``.
+        """
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import shutil
 import subprocess
-from typing import Iterator, Iterable, List, Tuple, Dict, Any, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Iterator, Iterable, List, Tuple, Dict, Any, Optional
 
 import numpy as np
-from paddleocr import PaddleOCR
 
+from memory_budget import STAGE_OCR, STAGE_RENDER, MemoryGovernor
+from ocr_cache import OcrResultCache
+from page_filters import BlankPageDetector
 from progress import ProgressSink
 
 
@@ -14,7 +20,9 @@ class OcrEngine:
     """
     Wrapper around PaddleOCR with runtime model selection and batch streaming.
 
-    Provides incremental OCR over an image stream with progress reporting.
+    Provides incremental OCR over an image stream with progress reporting. ``paddle`` and ``paddleocr``
+    are imported, and models loaded, on the first :meth:`predict_items` call, so runs that never reach
+    inference (dry runs, fully cached or resumed documents) do not pay for them.
     """
 
     def __init__(
@@ -25,19 +33,26 @@ class OcrEngine:
             rec_model: Optional[str] = "auto",
             use_doc_orientation_classify: bool = False,
             use_textline_orientation: bool = False,
+            cpu_threads: Optional[int] = None,
     ) -> None:
         """
         Initialize the OCR engine.
 
-        :param device: Device string like ``"gpu:0"`` or ``"cpu"``. ``None`` selects automatically.
+        :param device: Device string like ``"gpu:0"`` or ``"cpu"``. ``None`` selects automatically when
+            the models are loaded.
         :param lang: Language code used by PaddleOCR for runtime model selection.
         :param rec_model: ``"auto"`` or explicit recognition model name.
         :param use_doc_orientation_classify: Enable document orientation classifier.
         :param use_textline_orientation: Enable text line orientation classifier.
+        :param cpu_threads: Inference threads on CPU. ``None`` keeps PaddleOCR's default.
         """
-        if device in (None, "auto"):
-            device = self._auto_select_device()
-        kwargs = dict(
+        self.config: Dict[str, Any] = dict(
+            lang=lang,
+            rec_model=rec_model,
+            use_doc_orientation_classify=use_doc_orientation_classify,
+            use_textline_orientation=use_textline_orientation,
+        )
+        kwargs: Dict[str, Any] = dict(
             device=device,
             use_doc_orientation_classify=use_doc_orientation_classify,
             use_textline_orientation=use_textline_orientation,
@@ -47,7 +62,34 @@ class OcrEngine:
             kwargs["lang"] = lang
         if rec_model and rec_model != "auto":
             kwargs["text_recognition_model_name"] = rec_model
-        self._ocr = PaddleOCR(**kwargs)
+        if cpu_threads:
+            kwargs["cpu_threads"] = cpu_threads
+        self.in_flight = 1
+        self._predict_lock = threading.Lock()
+        self._kwargs = kwargs
+        self._ocr: Any = None
+        self.load_seconds: Optional[float] = None
+
+    def load(self) -> None:
+        """Load the models now rather than on the first prediction, e.g. to warm up a long-running service."""
+        with self._predict_lock:
+            self._load()
+
+    def _load(self) -> Any:
+        """
+        Import PaddleOCR and build the pipeline on first use. Called with the predict lock held.
+
+        :return: The PaddleOCR instance.
+        """
+        if self._ocr is None:
+            t0 = time.perf_counter()
+            from paddleocr import PaddleOCR
+            kwargs = dict(self._kwargs)
+            if kwargs["device"] in (None, "auto"):
+                kwargs["device"] = self._auto_select_device()
+            self._ocr = PaddleOCR(**kwargs)
+            self.load_seconds = time.perf_counter() - t0
+        return self._ocr
 
     @staticmethod
     def _auto_select_device() -> str:
@@ -98,50 +140,231 @@ class OcrEngine:
             data = res.res
         return data if isinstance(data, dict) else {}
 
+    def _items_from_result(self, res: Any) -> List[Dict[str, Any]]:
+        """
+        Convert one PaddleOCR page result into OCR items.
+
+        :param res: PaddleOCR result object.
+        :return: Items with ``poly``, ``text``, ``score``.
+        """
+        data = self._parse_result_obj(res)
+        texts = data.get("rec_texts") or []
+        scores = data.get("rec_scores") or []
+        polys = data.get("rec_polys") or []
+        items: List[Dict[str, Any]] = []
+        for k, t in enumerate(texts):
+            poly = polys[k] if k < len(polys) else None
+            sc = float(scores[k]) if k < len(scores) else 0.0
+            if poly is None or t is None:
+                continue
+            items.append({"poly": poly, "text": t, "score": sc})
+        return items
+
+    def predict_items(self, imgs: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """
+        Run OCR on a batch of images. Calls are serialized, so one engine can serve several threads.
+
+        :param imgs: Page images.
+        :return: One item list per image.
+        """
+        with self._predict_lock:
+            results = self._load().predict(imgs)
+        return [self._items_from_result(res) for res in results]
+
+    def _submit_batch(self, imgs: List[np.ndarray]) -> Future:
+        """
+        Start OCR on a batch. Runs synchronously here; pooled engines dispatch to workers.
+
+        :param imgs: Page images.
+        :return: Future resolving to one item list per image.
+        """
+        fut: Future = Future()
+        fut.set_result(self.predict_items(imgs))
+        return fut
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return engine counters for the progress sink.
+
+        :return: ``engine_load_s`` (import plus model load time) once the models were loaded, else empty.
+        """
+        if self.load_seconds is None:
+            return {}
+        return {"engine_load_s": round(self.load_seconds, 3)}
+
+    def close(self) -> None:
+        """Release engine resources. Nothing to do for the in-process engine."""
+
+    @staticmethod
+    def _pick_batch(
+            waiting: List[Tuple[int, np.ndarray, Optional[str]]],
+            batch_size: int,
+            max_pixels: int,
+            bucket: int
+    ) -> List[Tuple[int, np.ndarray, Optional[str]]]:
+        """
+        Choose the next batch from pages awaiting OCR.
+
+        The oldest waiting page is always included. With ``bucket`` set, the batch is filled with
+        pages whose size falls in the same ``bucket``-pixel class; with ``max_pixels`` set, pages are
+        added only while the batch stays within that many pixels.
+
+        :param waiting: ``(page_no, image, cache_key)`` in arrival order.
+        :param batch_size: Maximum pages per batch.
+        :param max_pixels: Pixel budget per batch; ``0`` disables the cap.
+        :param bucket: Size class granularity in pixels; ``0`` disables grouping.
+        :return: Selected entries, in arrival order.
+        """
+
+        def _cls(img: np.ndarray) -> Tuple[int, int]:
+            return img.shape[0] // bucket, img.shape[1] // bucket
+
+        anchor = waiting[0][1]
+        key = _cls(anchor) if bucket else None
+        batch = []
+        pixels = 0
+        for entry in waiting:
+            img = entry[1]
+            if key is not None and _cls(img) != key:
+                continue
+            px = img.shape[0] * img.shape[1]
+            if batch and max_pixels and pixels + px > max_pixels:
+                break
+            batch.append(entry)
+            pixels += px
+            if len(batch) >= batch_size:
+                break
+        return batch
+
     def stream(
             self,
             page_img_iter: Iterable[Tuple[int, np.ndarray]],
             batch_size: int,
-            sink: Optional[ProgressSink] = None
+            sink: Optional[ProgressSink] = None,
+            cache: Optional[OcrResultCache] = None,
+            blank: Optional[BlankPageDetector] = None,
+            release: Optional[Callable[[np.ndarray], None]] = None,
+            reorder_window: int = 0,
+            max_batch_pixels: int = 0,
+            shape_bucket: int = 128,
+            governor: Optional[MemoryGovernor] = None,
     ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
         """
         Run OCR in batches over a page image stream.
 
+        Pages classified blank by ``blank`` or found in ``cache`` skip ``predict``; only the remaining
+        pages count towards ``batch_size``. With ``reorder_window`` larger than ``batch_size``, up to that
+        many pages are held back so similarly sized pages can be batched together. Up to ``in_flight``
+        batches run at once; output order always follows the input order. With a ``governor``, incoming images
+        move from its ``render`` to its ``ocr`` stage until released; whenever the next announced image would not
+        fit (:meth:`MemoryGovernor.needs_room`), the waiting pages are submitted without waiting for a full batch
+        and in-flight batches are drained before more input is taken.
+
         :param page_img_iter: Iterable of ``(page_no, image)``.
         :param batch_size: Number of pages per OCR batch.
         :param sink: Optional progress sink to advance OCR count.
+        :param cache: Optional result cache consulted before and filled after ``predict``.
+        :param blank: Optional blank page detector; blank pages yield an empty item list.
+        :param release: Called with each input image once OCR no longer needs it, e.g. to recycle its buffer.
+        :param reorder_window: Pages that may wait for a same-size batch. ``0`` batches in arrival order.
+        :param max_batch_pixels: Total pixel budget per batch. ``0`` caps by ``batch_size`` only.
+        :param shape_bucket: Size class granularity, in pixels, used when reordering.
+        :param governor: Optional memory governor shared with the renderer.
         :yield: ``(page_no, items)`` per page, where items are dicts with ``poly``, ``text``, ``score``.
         """
         if batch_size < 1:
             batch_size = 1
-        batch_pages: List[int] = []
-        batch_imgs: List[np.ndarray] = []
-
-        def _flush():
-            nonlocal batch_pages, batch_imgs
-            if not batch_imgs:
-                return
-            res_list = self._ocr.predict(batch_imgs)
-            for i, res in enumerate(res_list):
-                data = self._parse_result_obj(res)
-                texts = data.get("rec_texts") or []
-                scores = data.get("rec_scores") or []
-                polys = data.get("rec_polys") or []
-                items: List[Dict[str, Any]] = []
-                for k, t in enumerate(texts):
-                    poly = polys[k] if k < len(polys) else None
-                    sc = float(scores[k]) if k < len(scores) else 0.0
-                    if poly is None or t is None:
-                        continue
-                    items.append({"poly": poly, "text": t, "score": sc})
+        window = max(batch_size, reorder_window)
+        bucket = shape_bucket if reorder_window > batch_size else 0
+        order: Deque[int] = deque()
+        done: Dict[int, List[Dict[str, Any]]] = {}
+        waiting: List[Tuple[int, np.ndarray, Optional[str]]] = []
+        submitted: Deque[Tuple[List[Tuple[int, np.ndarray, Optional[str]]], Future, List[float]]] = deque()
+        held = 0
+
+        def _free(img: np.ndarray) -> None:
+            nonlocal held
+            if release is not None:
+                release(img)
+            if governor is not None:
+                governor.discharge(STAGE_OCR, img.nbytes)
+                held -= img.nbytes
+
+        def _collect_limit() -> int:
+            return 0 if governor is not None and governor.needs_room() else self.in_flight - 1
+
+        def _submit_one() -> None:
+            batch = self._pick_batch(waiting, batch_size, max_batch_pixels, bucket)
+            picked = {id(entry) for entry in batch}
+            waiting[:] = [entry for entry in waiting if id(entry) not in picked]
+            stamps = [time.perf_counter()]
+            fut = self._submit_batch([img for _, img, _ in batch])
+            if sink is not None:
+                fut.add_done_callback(lambda _f: stamps.append(time.perf_counter()))
+            submitted.append((batch, fut, stamps))
+
+        def _collect(limit: int) -> None:
+            while submitted and (len(submitted) > limit or submitted[0][1].done()):
+                batch, fut, stamps = submitted.popleft()
+                results = fut.result()
+                if sink is not None:
+                    sink.on_timing(
+                        "predict",
+                        stamps[-1] - stamps[0],
+                        pages=len(batch),
+                        nbytes=sum(img.nbytes for _, img, _ in batch),
+                        items=sum(len(items) for items in results),
+                    )
+                for (pno, img, key), items in zip(batch, results):
+                    if cache is not None:
+                        cache.put(key, items)
+                    done[pno] = items
+                    _free(img)
+
+        def _emit():
+            while order and order[0] in done:
+                pno = order.popleft()
                 if sink is not None:
                     sink.on_ocr_advance(1)
-                yield batch_pages[i], items
-            batch_pages, batch_imgs = [], []
-
-        for pno, img in page_img_iter:
-            batch_pages.append(pno)
-            batch_imgs.append(img)
-            if len(batch_imgs) >= batch_size:
-                yield from _flush()
-        yield from _flush()
+                yield pno, done.pop(pno)
+
+        if governor is not None:
+            governor.add_consumer()
+        try:
+            for pno, img in page_img_iter:
+                order.append(pno)
+                if governor is not None:
+                    governor.transfer(STAGE_RENDER, STAGE_OCR, img.nbytes)
+                    held += img.nbytes
+                key = cached = None
+                if blank is not None and blank.is_blank(img):
+                    cached = []
+                elif cache is not None:
+                    key = cache.key(img)
+                    cached = cache.get(key)
+                if cached is not None:
+                    _free(img)
+                    done[pno] = cached
+                else:
+                    waiting.append((pno, img, key))
+                    if len(waiting) >= window:
+                        _submit_one()
+                    if waiting and governor is not None and governor.needs_room():
+                        governor.note_early_batch()
+                        while waiting:
+                            _submit_one()
+                _collect(_collect_limit())
+                yield from _emit()
+            while waiting:
+                _submit_one()
+                _collect(_collect_limit())
+                yield from _emit()
+            _collect(0)
+            yield from _emit()
+        finally:
+            for _, fut, _ in submitted:
+                fut.cancel()
+            if governor is not None:
+                governor.remove_consumer()
+                if held:
+                    governor.discharge(STAGE_OCR, held)
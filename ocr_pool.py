@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ocr_engine import OcrEngine
+
+_worker_engine: Optional[OcrEngine] = None
+_worker_slot: int = -1
+
+
+def _ocr_worker_init(slots: Any, engine_kwargs: Dict[str, Any], threads: int) -> None:
+    """
+    Pin an OCR worker process to its core slice and load its engine.
+
+    :param slots: Queue of ``(slot, cores)``; each worker takes one.
+    :param engine_kwargs: Keyword arguments for :class:`OcrEngine`.
+    :param threads: Inference threads; ``0`` uses one per pinned core.
+    """
+    global _worker_engine, _worker_slot
+    _worker_slot, cores = slots.get()
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    n = threads or max(1, len(cores))
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(n)
+    _worker_engine = OcrEngine(device="cpu", cpu_threads=n, **engine_kwargs)
+    _worker_engine.load()
+
+
+def _ocr_worker_batch(imgs: List[np.ndarray]) -> Tuple[int, float, List[List[Dict[str, Any]]]]:
+    """
+    OCR one batch inside a worker process.
+
+    :param imgs: Page images.
+    :return: ``(slot, busy_seconds, items_per_image)``.
+    """
+    t0 = time.perf_counter()
+    out = _worker_engine.predict_items(imgs)
+    return _worker_slot, time.perf_counter() - t0, out
+
+
+def core_slices(workers: int) -> List[List[int]]:
+    """
+    Split the CPUs available to this process into ``workers`` contiguous slices.
+
+    With more workers than cores, workers share cores round-robin.
+
+    :param workers: Number of slices.
+    :return: One core list per worker.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    if workers >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(workers)]
+    per, extra = divmod(len(cores), workers)
+    out, start = [], 0
+    for i in range(workers):
+        end = start + per + (1 if i < extra else 0)
+        out.append(cores[start:end])
+        start = end
+    return out
+
+
+class OcrEnginePool(OcrEngine):
+    """
+    CPU OCR engine backed by worker processes, each with its own model, pinned to a slice of cores.
+
+    Batches go to whichever worker is idle; :meth:`OcrEngine.stream` keeps up to two batches per worker
+    in flight and reassembles results in input order. No model is loaded in the calling process.
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            *,
+            threads: int = 0,
+            lang: Optional[str] = "korean",
+            rec_model: Optional[str] = "auto",
+            use_doc_orientation_classify: bool = False,
+            use_textline_orientation: bool = False,
+    ) -> None:
+        """
+        Start the worker pool.
+
+        :param workers: Number of worker processes.
+        :param threads: Inference threads per worker; ``0`` uses one per pinned core.
+        :param lang: Language code used by PaddleOCR for runtime model selection.
+        :param rec_model: ``"auto"`` or explicit recognition model name.
+        :param use_doc_orientation_classify: Enable document orientation classifier.
+        :param use_textline_orientation: Enable text line orientation classifier.
+        """
+        super().__init__(
+            device="cpu",
+            lang=lang,
+            rec_model=rec_model,
+            use_doc_orientation_classify=use_doc_orientation_classify,
+            use_textline_orientation=use_textline_orientation,
+        )
+        self.workers = max(1, workers)
+        self.in_flight = 2 * self.workers
+        slots = multiprocessing.Queue()
+        for i, cores in enumerate(core_slices(self.workers)):
+            slots.put((i, cores))
+        self._executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_ocr_worker_init,
+            initargs=(slots, dict(self.config), threads),
+        )
+        self._busy = [0.0] * self.workers
+        self._pages = [0] * self.workers
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def load(self) -> None:
+        """Nothing to do: each worker loads its models when the pool starts it."""
+
+    def predict_items(self, imgs: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """
+        Run OCR on a batch of images in a worker and wait for the result.
+
+        :param imgs: Page images.
+        :return: One item list per image.
+        """
+        return self._submit_batch(imgs).result()
+
+    def _submit_batch(self, imgs: List[np.ndarray]) -> Future:
+        """
+        Queue a batch for the next idle worker.
+
+        :param imgs: Page images; must stay unmodified until the future resolves.
+        :return: Future resolving to one item list per image.
+        """
+        out: Future = Future()
+        inner = self._executor.submit(_ocr_worker_batch, imgs)
+
+        def _done(f: Future) -> None:
+            if not out.set_running_or_notify_cancel():
+                return
+            if f.cancelled():
+                out.set_exception(CancelledError())
+                return
+            exc = f.exception()
+            if exc is not None:
+                out.set_exception(exc)
+                return
+            slot, busy, items = f.result()
+            with self._lock:
+                self._busy[slot] += busy
+                self._pages[slot] += len(items)
+            out.set_result(items)
+
+        inner.add_done_callback(_done)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return per-worker utilization since the pool started.
+
+        :return: ``ocr_wN_util`` (busy fraction of wall time) and ``ocr_wN_pages`` per worker.
+        """
+        wall = max(1e-9, time.perf_counter() - self._started)
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for i in range(self.workers):
+                out[f"ocr_w{i}_util"] = round(self._busy[i] / wall, 3)
+                out[f"ocr_w{i}_pages"] = self._pages[i]
+        return out
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
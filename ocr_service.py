@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from ocr_engine import OcrEngine
+from pipeline import OCRPipeline
+from progress import ProgressSink
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JOB_OPTIONS = frozenset({
+    "dpi", "font_path", "page_range", "pages", "page_step", "batch_size", "save_csv", "save_ndjson",
+    "save_store", "index_db", "debug_visible", "commit_every", "commit_seconds", "consolidate", "resume",
+    "cache_dir", "cache_max_mb", "skip_text_pages", "adaptive_dpi", "min_dpi", "target_xheight_px",
+    "skip_blank", "blank_ink_ratio", "blank_min_std", "gray", "reuse_buffers", "reorder_window",
+    "max_batch_mpx", "render_workers", "render_prefetch", "concurrent", "tile_mpx", "tile_overlap",
+    "crop_margins", "pre_gray", "normalize_contrast", "max_side", "subset_fonts", "debug_pages", "mem_budget_mb",
+})
+
+PATH_OPTIONS = ("save_csv", "save_ndjson", "save_store", "index_db", "cache_dir", "font_path")
+
+
+class JobProgressSink(ProgressSink):
+    """Thread-safe progress counters of one service job, read back through the job API."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Optional[int]] = {"render": None, "ocr": None, "overlay": None}
+        self._done: Dict[str, int] = {"render": 0, "ocr": 0, "overlay": 0}
+        self._stats: Dict[str, Any] = {}
+
+    def set_totals(
+            self,
+            *,
+            render_total: Optional[int],
+            ocr_total: Optional[int],
+            overlay_total: Optional[int]
+    ) -> None:
+        with self._lock:
+            self._totals = {"render": render_total, "ocr": ocr_total, "overlay": overlay_total}
+
+    def on_render_advance(self, n: int = 1) -> None:
+        with self._lock:
+            self._done["render"] += n
+
+    def on_ocr_advance(self, n: int = 1) -> None:
+        with self._lock:
+            self._done["ocr"] += n
+
+    def on_overlay_advance(self, n: int = 1) -> None:
+        with self._lock:
+            self._done["overlay"] += n
+
+    def on_stats(self, stats: Dict[str, Any]) -> None:
+        with self._lock:
+            self._stats.update(stats)
+
+    def close(self) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return current progress.
+
+        :return: ``{"totals": ..., "done": ..., "stats": ...}``.
+        """
+        with self._lock:
+            return {"totals": dict(self._totals), "done": dict(self._done), "stats": dict(self._stats)}
+
+
+class Job:
+    """One queued OCR request."""
+
+    def __init__(self, input_pdf: str, output_pdf: str, priority: int, options: Dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex
+        self.input_pdf = input_pdf
+        self.output_pdf = output_pdf
+        self.priority = priority
+        self.options = options
+        self.state = QUEUED
+        self.error: Optional[str] = None
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.sink = JobProgressSink()
+        self.done_event = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the job for the API.
+
+        :return: JSON-serializable status.
+        """
+        now = time.monotonic()
+        return {
+            "id": self.id,
+            "input_pdf": self.input_pdf,
+            "output_pdf": self.output_pdf,
+            "priority": self.priority,
+            "state": self.state,
+            "error": self.error,
+            "queued_s": round((self.started or now) - self.submitted, 4),
+            "run_s": round((self.finished or now) - self.started, 4) if self.started else None,
+            "progress": self.sink.snapshot(),
+        }
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    s = sorted(values)
+    return round(s[min(len(s) - 1, int(q / 100.0 * len(s)))], 4)
+
+
+class OcrService:
+    """
+    Keep an OCR engine loaded and run submitted jobs from a priority queue.
+
+    Jobs with a higher ``priority`` run first; equal priorities run in submission order. All jobs share
+    one engine, so only per-document setup is paid per job.
+    """
+
+    def __init__(
+            self,
+            ocr: OcrEngine,
+            *,
+            workers: int = 1,
+            defaults: Optional[Dict[str, Any]] = None,
+            history: int = 1000,
+            root: Optional[str] = None
+    ) -> None:
+        """
+        Start the job workers.
+
+        :param ocr: Loaded engine shared by all jobs.
+        :param workers: Jobs run at the same time; they share the engine.
+        :param defaults: :class:`OCRPipeline` options applied to every job unless the job overrides them.
+        :param history: Finished jobs kept for status queries and latency statistics.
+        :param root: Directory every job path (``input_pdf``, ``output_pdf`` and :data:`PATH_OPTIONS`) must
+            resolve under; relative paths are taken relative to it. Defaults to the current directory.
+        """
+        self.ocr = ocr
+        self.root = os.path.realpath(root or os.getcwd())
+        self.defaults = dict(defaults or {})
+        self.history = max(1, history)
+        self._queue: "queue.PriorityQueue[Tuple[int, int, Optional[Job]]]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._turnaround: Deque[float] = deque(maxlen=self.history)
+        self._wait: Deque[float] = deque(maxlen=self.history)
+        self._counts = {DONE: 0, FAILED: 0}
+        self._running = 0
+        self._started = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"ocr-job-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(
+            self,
+            input_pdf: str,
+            output_pdf: str,
+            priority: int = 0,
+            options: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        Queue a job.
+
+        :param input_pdf: Source PDF path.
+        :param output_pdf: Output PDF path.
+        :param priority: Higher runs first.
+        :param options: Per-job :class:`OCRPipeline` options; keys must be in :data:`JOB_OPTIONS`.
+        :return: The queued job.
+        :raises ValueError: On unknown options, a missing input file or a path outside :attr:`root`.
+        """
+        options = dict(options or {})
+        unknown = sorted(set(options) - JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"unknown options: {', '.join(unknown)}")
+        input_pdf = self.resolve_path(input_pdf)
+        output_pdf = self.resolve_path(output_pdf)
+        for key in PATH_OPTIONS:
+            if options.get(key) is not None:
+                options[key] = self.resolve_path(options[key])
+        if not os.path.isfile(input_pdf):
+            raise ValueError(f"input not found: {input_pdf}")
+        job = Job(input_pdf, output_pdf, int(priority), options)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._queue.put((-job.priority, next(self._seq), job))
+        return job
+
+    def resolve_path(self, path: str) -> str:
+        """
+        Resolve a path from a job request under :attr:`root`.
+
+        :param path: Absolute path, or a path relative to :attr:`root`.
+        :return: The resolved absolute path with symlinks followed.
+        :raises ValueError: If the path is empty or resolves outside :attr:`root`.
+        """
+        if not isinstance(path, str) or not path:
+            raise ValueError("empty path")
+        resolved = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([resolved, self.root]) != self.root:
+            raise ValueError(f"path outside the service root: {path}")
+        return resolved
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        :param job_id: Job id from :meth:`submit`.
+        :return: The job, or ``None`` if unknown or expired from history.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _worker(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        job.started = time.monotonic()
+        job.state = RUNNING
+        with self._lock:
+            self._running += 1
+        try:
+            kwargs = dict(self.defaults)
+            kwargs.update(job.options)
+            OCRPipeline(job.input_pdf, job.output_pdf, ocr=self.ocr, sink=job.sink, **kwargs).run()
+            job.state = DONE
+        except Exception as exc:
+            job.error = f"{type(exc).__name__}: {exc}"
+            job.state = FAILED
+            traceback.print_exc()
+        job.finished = time.monotonic()
+        with self._lock:
+            self._running -= 1
+            self._counts[job.state] += 1
+            self._turnaround.append(job.finished - job.submitted)
+            self._wait.append(job.started - job.submitted)
+            finished = [j for j in self._jobs.values() if j.finished is not None]
+            for old in finished[:max(0, len(finished) - self.history)]:
+                del self._jobs[old.id]
+        job.done_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue and latency statistics over the retained history.
+
+        :return: Queue depth, running/finished counts and p50/p99 of queue wait and turnaround, in seconds.
+        """
+        with self._lock:
+            turnaround = list(self._turnaround)
+            wait = list(self._wait)
+            out: Dict[str, Any] = {
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                "done": self._counts[DONE],
+                "failed": self._counts[FAILED],
+                "uptime_s": round(time.monotonic() - self._started, 1),
+            }
+        out.update(
+            wait_p50_s=_percentile(wait, 50),
+            wait_p99_s=_percentile(wait, 99),
+            turnaround_p50_s=_percentile(turnaround, 50),
+            turnaround_p99_s=_percentile(turnaround, 99),
+        )
+        out.update(self.ocr.stats())
+        return out
+
+    def shutdown(self) -> None:
+        """Let running jobs finish, drop queued ones and stop the workers."""
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.state = FAILED
+                job.error = "service shut down"
+                job.done_event.set()
+        for _ in self._threads:
+            self._queue.put((1 << 62, next(self._seq), None))
+        for t in self._threads:
+            t.join()
+
+
+class _JobApiHandler(BaseHTTPRequestHandler):
+    """
+    JSON job API.
+
+    ``POST /jobs`` with an ``application/json`` body ``{"input_pdf", "output_pdf", "priority"?, "options"?}``
+    queues a job; other content types get 415, so a browser cannot submit jobs with a cross-site form post;
+    ``GET /jobs/<id>[?wait=SECONDS]`` returns its status, optionally waiting for completion;
+    ``GET /stats`` returns service statistics.
+    """
+
+    service: OcrService
+
+    def address_string(self) -> str:
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _reply(self, code: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self._reply(200, self.service.stats())
+            return
+        if url.path.startswith("/jobs/"):
+            job = self.service.get(url.path[len("/jobs/"):])
+            if job is None:
+                self._reply(404, {"error": "unknown job"})
+                return
+            wait = parse_qs(url.query).get("wait")
+            if wait:
+                job.done_event.wait(min(float(wait[0]), 300.0))
+            self._reply(200, job.to_dict())
+            return
+        self._reply(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/jobs":
+            self._reply(404, {"error": "not found"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reply(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            req = json.loads(self.rfile.read(length) or b"{}")
+            job = self.service.submit(
+                req["input_pdf"],
+                req["output_pdf"],
+                priority=req.get("priority", 0),
+                options=req.get("options"),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        self._reply(202, {"id": job.id})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+        service: OcrService,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        socket_path: Optional[str] = None
+) -> None:
+    """
+    Serve the job API until interrupted, then shut the service down.
+
+    :param service: Running service.
+    :param host: HTTP bind address; keep it on loopback.
+    :param port: HTTP port.
+    :param socket_path: Serve on this Unix socket instead of TCP.
+    """
+    handler = type("JobApiHandler", (_JobApiHandler,), {"service": service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server: socketserver.BaseServer = _UnixHTTPServer(socket_path, handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        service.shutdown()
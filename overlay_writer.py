@@ -1,63 +1,150 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+import os
+import time
+from typing import Callable, List, Dict, Any, Optional, Set
 
 import pymupdf
-import unicodedata as _ud
 
 from progress import ProgressSink
+from text_layer import TextLayerBuilder
+
+PAGE_MARKER = "OCRTextLayer"
+
+
+class CommitPolicy:
+    """
+    Decide when pending overlay pages are committed with ``saveIncr``.
+
+    Commits after ``every_pages`` applied pages or ``every_seconds`` since the last commit,
+    whichever comes first. With both disabled, nothing is written until :meth:`IncrementalOverlayWriter.finalize`.
+    """
+
+    def __init__(self, every_pages: int = 1, every_seconds: float = 0.0, consolidate: bool = True) -> None:
+        """
+        Configure the policy.
+
+        :param every_pages: Commit after this many pages. ``0`` disables the page trigger.
+        :param every_seconds: Commit once this many seconds have passed. ``0`` disables the time trigger.
+        :param consolidate: Rewrite the output with a full garbage-collected, deflated save at finalize.
+        """
+        self.every_pages = max(0, every_pages)
+        self.every_seconds = max(0.0, every_seconds)
+        self.consolidate = consolidate
+
+    def due(self, pending_pages: int, elapsed: float) -> bool:
+        """
+        Check whether a commit is due.
+
+        :param pending_pages: Pages applied since the last commit.
+        :param elapsed: Seconds since the last commit.
+        :return: ``True`` if the pending pages should be saved now.
+        """
+        if pending_pages <= 0:
+            return False
+        if self.every_pages and pending_pages >= self.every_pages:
+            return True
+        return bool(self.every_seconds) and elapsed >= self.every_seconds
 
 
 class IncrementalOverlayWriter:
     """
     Incrementally overlay invisible text into a PDF and save changes.
 
-    Uses ``render_mode=3`` for invisible text and saves incrementally via ``saveIncr``.
+    Uses ``render_mode=3`` for invisible text and saves incrementally via ``saveIncr``
+    according to a :class:`CommitPolicy`. Text layout is delegated to a single
+    :class:`TextLayerBuilder` shared by all pages, so the font is embedded once per document and every
+    page references that one font resource; only the first save of a session carries the font program. The
+    consolidating save at finalize subsets it to the glyphs actually used. Every overlaid page gets a
+    :data:`PAGE_MARKER` key in its page dictionary, saved together with its text, so a resumed run and
+    later runs can tell which pages already carry this tool's text layer.
     """
 
     def __init__(
             self,
             input_pdf: str,
-            output_pdf: str,
+            output_pdf: Optional[str],
             font_path: Optional[str],
             dpi: int = 300,
-            debug_visible: bool = False
+            commit_policy: Optional[CommitPolicy] = None,
+            resume: bool = False,
+            on_commit: Optional[Callable[[List[int]], None]] = None,
+            subset_fonts: bool = True,
+            skip_pages: Optional[Set[int]] = None,
     ) -> None:
         """
         Prepare documents for incremental updates.
 
         :param input_pdf: Source PDF path.
-        :param output_pdf: Target PDF path.
+        :param output_pdf: Target PDF path. If ``None``, no PDF is written; applied pages still go through the
+            commit policy and ``on_commit``.
         :param font_path: Font file path used for all inserted text.
         :param dpi: Rendering DPI used for coordinate conversion.
-        :param debug_visible: Whether to maintain a parallel visible overlay PDF.
+        :param commit_policy: When to save pending pages. Defaults to every page.
+        :param resume: Keep existing output files instead of copying ``input_pdf`` over them.
+        :param on_commit: Called with the 0-based pages covered by each save once it is on disk.
+        :param subset_fonts: Subset embedded fonts to the used glyphs in the consolidating save at finalize.
+            This also merges the copies of the font embedded by resumed runs. Needs ``font_path``.
+        :param skip_pages: 0-based pages that already carry the text layer, e.g. from :meth:`marked_pages` of a
+            resumed output; they go through the commit policy but are not overlaid again.
         """
         import shutil
         self.scale = dpi / 72.0
         self.font_path = font_path
         self.output_pdf = output_pdf
-        self.debug_visible = debug_visible
-        shutil.copyfile(input_pdf, output_pdf)
-        self.doc = pymupdf.open(output_pdf)
-        self.dbg_doc = None
-        self.dbg_path = None
-        if debug_visible:
-            self.dbg_path = output_pdf.replace('.pdf', '_debug.pdf')
-            shutil.copyfile(input_pdf, self.dbg_path)
-            self.dbg_doc = pymupdf.open(self.dbg_path)
+        self.layer = TextLayerBuilder(font_path)
+        self.policy = commit_policy or CommitPolicy()
+        self.on_commit = on_commit
+        self.subset_fonts = subset_fonts and bool(font_path)
+        self.skip_pages = set(skip_pages or ())
+        self._pending: List[int] = []
+        self._last_commit = time.monotonic()
+        self.commits = 0
+        self.doc = None
+        if output_pdf is None:
+            return
+        if not (resume and os.path.exists(output_pdf)):
+            shutil.copyfile(input_pdf, output_pdf)
+        self.doc = self._open_for_update(output_pdf)
+
+    @classmethod
+    def _open_for_update(cls, path: str) -> pymupdf.Document:
+        """
+        Open a document that will receive incremental saves.
+
+        MuPDF refuses ``saveIncr`` on files it had to repair while opening, which happens for
+        outputs continued from an earlier run; those are rewritten once with a full save.
 
-    def _rect(self, poly) -> tuple[float, float, float, float]:
+        :param path: Document file path.
+        :return: Opened document.
         """
-        Compute bounding rectangle for a polygon.
+        doc = pymupdf.open(path)
+        if doc.is_repaired:
+            cls._consolidate(doc, path)
+            doc = pymupdf.open(path)
+        return doc
 
-        :param poly: Sequence of ``(x, y)``.
-        :return: ``(x0, y0, x1, y1)``.
+    @staticmethod
+    def marked_pages(path: Optional[str]) -> Set[int]:
         """
-        xs = [float(p[0]) for p in poly]
-        ys = [float(p[1]) for p in poly]
-        return min(xs), min(ys), max(xs), max(ys)
+        Find the pages of a PDF that already carry this tool's text layer.
 
-    def _apply_one(self, doc: pymupdf.Document, page_no: int, items: List[Dict[str, Any]], visible: bool) -> None:
+        :param path: PDF path; a missing file or ``None`` has no marked pages.
+        :return: 0-based page indices whose page dictionary holds :data:`PAGE_MARKER`.
+        """
+        if not path or not os.path.exists(path):
+            return set()
+        with pymupdf.open(path) as doc:
+            return {i for i in range(doc.page_count) if doc.xref_get_key(doc.page_xref(i), PAGE_MARKER)[1] == "true"}
+
+    def _apply_one(
+            self,
+            doc: pymupdf.Document,
+            page_no: int,
+            items: List[Dict[str, Any]],
+            visible: bool,
+            scale: float
+    ) -> None:
         """
         Apply overlay to a single page of the document.
 
@@ -65,64 +152,141 @@ class IncrementalOverlayWriter:
         :param page_no: 0-based page index.
         :param items: OCR items list.
         :param visible: Whether to draw visible text.
+        :param scale: Pixels per PDF point of the image the items were recognized on.
         """
         page = doc.load_page(page_no)
         page.wrap_contents()
-        if self.font_path:
-            page.insert_text((0, 0), " ", fontname="ocrfont", fontfile=self.font_path, fontsize=1, render_mode=3)
-        for it in items:
-            raw = it.get("text")
-            poly = it.get("poly")
-            if not raw or poly is None:
-                continue
-            text = _ud.normalize("NFC", raw)
-            x0, y0, x1, y1 = self._rect(poly)
-            x0_pt, y0_pt = x0 / self.scale, y0 / self.scale
-            x1_pt, y1_pt = x1 / self.scale, y1 / self.scale
-            width_pt = max(0.1, x1_pt - x0_pt)
-            if self.font_path:
-                font = pymupdf.Font(fontname="ocrfont", fontfile=self.font_path)
-                font_name = "ocrfont"
-            else:
-                font = pymupdf.Font("helv")
-                font_name = "helv"
-            w_at_1 = max(1e-6, font.text_length(text, fontsize=1))
-            font_size = width_pt / w_at_1
-            baseline_y = y1_pt
-            desc = font.descender
-            asc = font.ascender
-            if asc - desc != 0:
-                baseline_y += (desc / (asc - desc)) * font_size
-            insert_pt = pymupdf.Point(x0_pt, baseline_y)
-            page.insert_text(
-                insert_pt, text,
-                fontname=font_name,
-                fontfile=(self.font_path if self.font_path else None),
-                fontsize=font_size,
-                color=(1, 0, 0) if visible else None,
-                render_mode=0 if visible else 3,
-                overlay=True,
-            )
-
-    def apply_and_save(self, page_no: int, items: List[Dict[str, Any]], sink: Optional[ProgressSink] = None) -> None:
-        """
-        Apply overlays for one page and save incrementally.
+        self.layer.write(page, items, scale, visible)
+        doc.xref_set_key(page.xref, PAGE_MARKER, "true")
+
+    def apply_and_save(
+            self,
+            page_no: int,
+            items: List[Dict[str, Any]],
+            sink: Optional[ProgressSink] = None,
+            dpi: Optional[float] = None
+    ) -> None:
+        """
+        Apply overlays for one page and save incrementally when the commit policy says so.
 
         :param page_no: 0-based page index.
         :param items: OCR items to overlay.
         :param sink: Optional progress sink for overlay increment.
+        :param dpi: DPI the page was rendered at, if it differs from the writer's DPI.
         """
-        self._apply_one(self.doc, page_no, items, visible=False)
-        if self.dbg_doc is not None:
-            self._apply_one(self.dbg_doc, page_no, items, visible=True)
-        self.doc.saveIncr()
-        if self.dbg_doc is not None:
-            self.dbg_doc.saveIncr()
+        scale = dpi / 72.0 if dpi else self.scale
+        if self.doc is not None and page_no not in self.skip_pages:
+            t0 = time.perf_counter()
+            self._apply_one(self.doc, page_no, items, visible=False, scale=scale)
+            if sink is not None:
+                sink.on_timing("overlay", time.perf_counter() - t0, items=len(items))
+        self._pending.append(page_no)
+        if self.policy.due(len(self._pending), time.monotonic() - self._last_commit):
+            self.commit(sink)
         if sink is not None:
             sink.on_overlay_advance(1)
 
+    def commit(self, sink: Optional[ProgressSink] = None) -> None:
+        """
+        Save all pending pages incrementally.
+
+        :param sink: Optional progress sink receiving the save as a ``"save"`` timing.
+        """
+        if not self._pending:
+            return
+        if self.doc is not None:
+            t0 = time.perf_counter()
+            self.doc.saveIncr()
+            if sink is not None:
+                sink.on_timing("save", time.perf_counter() - t0, pages=len(self._pending))
+        pages, self._pending = self._pending, []
+        self._last_commit = time.monotonic()
+        self.commits += 1
+        if self.on_commit is not None:
+            self.on_commit(pages)
+
+    @staticmethod
+    def _consolidate(doc: pymupdf.Document, path: str) -> None:
+        """
+        Rewrite ``path`` with a full save, dropping the incremental update chain.
+
+        :param doc: Opened document backed by ``path``. Closed on return.
+        :param path: Document file path.
+        """
+        tmp = path + ".tmp"
+        doc.save(tmp, garbage=3, deflate=True)
+        doc.close()
+        os.replace(tmp, path)
+
+    @staticmethod
+    def font_bytes(doc: pymupdf.Document) -> int:
+        """
+        Total decoded size of the distinct embedded font programs of a document.
+
+        :param doc: Opened document.
+        :return: Size in bytes.
+        """
+        files = set()
+        for xref in range(1, doc.xref_length()):
+            if doc.xref_get_key(xref, "Type")[1] != "/FontDescriptor":
+                continue
+            for key in ("FontFile", "FontFile2", "FontFile3"):
+                kind, value = doc.xref_get_key(xref, key)
+                if kind == "xref":
+                    files.add(int(value.split()[0]))
+        return sum(len(doc.xref_stream(x) or b"") for x in files)
+
+    def _subset(self, sink: Optional[ProgressSink]) -> None:
+        """
+        Subset the fonts of the output document before its consolidating save.
+
+        Reports ``font_full_kb``/``font_subset_kb`` (decoded font programs of the output before and after)
+        and ``font_subset_s`` to ``sink``.
+
+        :param sink: Optional progress sink receiving the statistics.
+        """
+        t0 = time.perf_counter()
+        full = self.font_bytes(self.doc)
+        self.doc.subset_fonts()
+        subset = self.font_bytes(self.doc)
+        if sink is not None:
+            sink.on_stats({
+                "font_full_kb": full >> 10,
+                "font_subset_kb": subset >> 10,
+                "font_subset_s": round(time.perf_counter() - t0, 3),
+            })
+
+    def finalize(self, sink: Optional[ProgressSink] = None) -> None:
+        """
+        Flush pending pages and, if the policy asks for it, subset fonts and consolidate the output.
+
+        Documents are closed afterwards; :meth:`close` becomes a no-op. Without consolidation fonts stay whole,
+        since an incremental save cannot drop the font program already in the file.
+
+        :param sink: Optional progress sink receiving the final save as a ``"save"`` or ``"consolidate"`` timing,
+            font statistics and the output size as ``output_kb``.
+        """
+        if not self.policy.consolidate or self.doc is None:
+            self.commit(sink)
+            self.close()
+            return
+        if self.subset_fonts:
+            self._subset(sink)
+        t0 = time.perf_counter()
+        self._consolidate(self.doc, self.output_pdf)
+        if sink is not None:
+            size = os.path.getsize(self.output_pdf)
+            sink.on_timing("consolidate", time.perf_counter() - t0, pages=len(self._pending), nbytes=size)
+            sink.on_stats({"output_kb": size >> 10})
+        pages, self._pending = self._pending, []
+        self.doc = None
+        if pages and self.on_commit is not None:
+            self.on_commit(pages)
+
     def close(self) -> None:
-        """Close all opened documents."""
+        """Commit pending pages incrementally and close the output document."""
+        self.commit()
+        if self.doc is None:
+            return
         self.doc.close()
-        if self.dbg_doc is not None:
-            self.dbg_doc.close()
+        self.doc = None
@@ -1,11 +1,216 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, List, Tuple, Optional
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple, Optional
 
 import pymupdf
 import numpy as np
 
+from memory_budget import STAGE_RENDER, MemoryGovernor
+from overlay_writer import PAGE_MARKER
 from progress import ProgressSink
+from tiling import Tile, plan_tiles
+
+PAGE_TEXT = "text"
+PAGE_IMAGE = "image"
+PAGE_MIXED = "mixed"
+
+_worker_doc: Optional[pymupdf.Document] = None
+
+
+def _render_worker_init(pdf_path: str) -> None:
+    """
+    Open a per-process document handle for render workers.
+
+    :param pdf_path: Path to input PDF.
+    """
+    global _worker_doc
+    _worker_doc = pymupdf.open(pdf_path)
+
+
+def _render_worker_page(
+        pno: int,
+        dpi: int,
+        probe: Optional[DpiProbe],
+        gray: bool
+) -> Tuple[int, np.ndarray, int]:
+    """
+    Render one page inside a worker process.
+
+    :param pno: 0-based page index.
+    :param dpi: Rendering DPI, or the DPI ceiling when ``probe`` is set.
+    :param probe: Optional adaptive DPI probe.
+    :param gray: Render a single-channel image.
+    :return: ``(page_no, image, dpi_used)``.
+    """
+    arr, used = PdfStreamer.render_adaptive(_worker_doc, pno, dpi, probe, gray=gray)
+    return pno, arr, used
+
+
+class PageBufferPool:
+    """
+    Fixed-size pool of flat ``uint8`` buffers reused for page images.
+
+    :meth:`acquire` hands out a view of the smallest free buffer that fits, or allocates a new one;
+    :meth:`release` returns it. The pool owns at most ``max_buffers`` buffers, lent and idle together, so
+    steady-state rendering reuses the same memory instead of allocating a fresh array per page. When all of
+    them are lent out, :meth:`acquire` returns a plain array outside the pool, counted as unpooled, rather
+    than blocking a caller that may itself hold the buffers it waits for.
+    """
+
+    def __init__(self, max_buffers: int = 4) -> None:
+        """
+        Create an empty pool.
+
+        :param max_buffers: Maximum number of buffers the pool owns.
+        """
+        self.max_buffers = max(1, max_buffers)
+        self._free: List[np.ndarray] = []
+        self._lent: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+        self.unpooled = 0
+
+    def acquire(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Get a writable ``uint8`` array of ``shape`` backed by a pooled buffer.
+
+        :param shape: Requested array shape.
+        :return: Array view; pass it to :meth:`release` when done.
+        """
+        need = int(np.prod(shape))
+        with self._lock:
+            fits = [i for i, b in enumerate(self._free) if b.size >= need]
+            if fits:
+                buf = self._free.pop(min(fits, key=lambda i: self._free[i].size))
+                self.reused += 1
+            elif len(self._lent) >= self.max_buffers:
+                self.unpooled += 1
+                return np.empty(shape, dtype=np.uint8)
+            else:
+                if len(self._lent) + len(self._free) >= self.max_buffers:
+                    self._free.pop(min(range(len(self._free)), key=lambda i: self._free[i].size))
+                buf = np.empty(need, dtype=np.uint8)
+                self.allocated += 1
+            self._lent[id(buf)] = buf
+        return buf[:need].reshape(shape)
+
+    def release(self, arr: np.ndarray) -> None:
+        """
+        Return an array obtained from :meth:`acquire`. Arrays from elsewhere are ignored.
+
+        :param arr: Array to give back.
+        """
+        base = arr.base if arr.base is not None else arr
+        with self._lock:
+            buf = self._lent.pop(id(base), None)
+            if buf is None:
+                return
+            self._free.append(buf)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return allocation counters.
+
+        :return: Dictionary with ``buffers_allocated``, ``buffers_reused`` and ``buffers_unpooled`` (arrays
+            handed out while every pooled buffer was lent).
+        """
+        with self._lock:
+            return {"buffers_allocated": self.allocated, "buffers_reused": self.reused,
+                    "buffers_unpooled": self.unpooled}
+
+
+def _otsu_threshold(gray: np.ndarray) -> int:
+    """
+    Compute Otsu's global threshold of a grayscale image.
+
+    :param gray: ``uint8`` array.
+    :return: Threshold in ``[0, 255]``; pixels below it are ink.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    w0 = np.cumsum(hist)
+    w1 = w0[-1] - w0
+    m0 = np.cumsum(hist * levels)
+    mu0 = m0 / np.maximum(w0, 1)
+    mu1 = (m0[-1] - m0) / np.maximum(w1, 1)
+    between = w0 * w1 * (mu0 - mu1) ** 2
+    return int(np.argmax(between)) + 1
+
+
+class DpiProbe:
+    """
+    Choose a per-page render DPI from a cheap low-resolution thumbnail.
+
+    Text line heights are read off the row ink profile of the thumbnail; the page is then rendered
+    at the lowest DPI that keeps the smallest common text at ``target_xheight_px`` pixels of x-height.
+    """
+
+    XHEIGHT_RATIO = 0.5
+
+    def __init__(
+            self,
+            probe_dpi: int = 72,
+            target_xheight_px: float = 12.0,
+            min_dpi: int = 100,
+            percentile: float = 10.0,
+            dpi_step: int = 25
+    ) -> None:
+        """
+        Configure the probe.
+
+        :param probe_dpi: Thumbnail DPI.
+        :param target_xheight_px: Desired x-height of small text in the final render, in pixels.
+        :param min_dpi: Lower bound for the chosen DPI.
+        :param percentile: Line-height percentile treated as "small text".
+        :param dpi_step: Chosen DPIs are rounded up to a multiple of this value.
+        """
+        self.probe_dpi = probe_dpi
+        self.target_xheight_px = target_xheight_px
+        self.min_dpi = min_dpi
+        self.percentile = percentile
+        self.dpi_step = max(1, dpi_step)
+
+    def estimate(self, gray: np.ndarray) -> Tuple[Optional[float], float]:
+        """
+        Estimate small-text x-height and ink density of a thumbnail.
+
+        :param gray: Grayscale thumbnail, ``uint8`` of shape ``(H, W)``.
+        :return: ``(xheight_pt or None, ink_density)``; ``None`` if no text lines were found.
+        """
+        ink = gray < _otsu_threshold(gray)
+        density = float(ink.mean())
+        rows = ink.mean(axis=1) > 0.005
+        edges = np.diff(np.concatenate(([0], rows.astype(np.int8), [0])))
+        heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        heights = heights[heights >= 2]
+        if heights.size == 0 or density <= 0.0:
+            return None, density
+        line_px = float(np.percentile(heights, self.percentile))
+        return self.XHEIGHT_RATIO * line_px * 72.0 / self.probe_dpi, density
+
+    def choose(self, page: pymupdf.Page, max_dpi: int) -> int:
+        """
+        Pick the render DPI for a page.
+
+        :param page: Loaded page.
+        :param max_dpi: Upper bound, normally the configured ``--dpi``.
+        :return: DPI in ``[min(min_dpi, max_dpi), max_dpi]``.
+        """
+        lo = min(self.min_dpi, max_dpi)
+        pix = page.get_pixmap(dpi=self.probe_dpi, colorspace=pymupdf.csGRAY, alpha=False)
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+        xheight_pt, _ = self.estimate(gray)
+        if not xheight_pt:
+            return lo
+        dpi = self.target_xheight_px * 72.0 / xheight_pt
+        dpi = math.ceil(dpi / self.dpi_step) * self.dpi_step
+        return int(min(max_dpi, max(lo, dpi)))
 
 
 class PdfStreamer:
@@ -15,15 +220,84 @@ class PdfStreamer:
     This class yields pages one by one to avoid loading the entire document into memory.
     """
 
-    def __init__(self, pdf_path: str, dpi: int = 300) -> None:
+    def __init__(
+            self,
+            pdf_path: str,
+            dpi: int = 300,
+            workers: int = 0,
+            prefetch: int = 0,
+            probe: Optional[DpiProbe] = None,
+            gray: bool = False,
+            buffer_pool: Optional[PageBufferPool] = None,
+            governor: Optional[MemoryGovernor] = None
+    ) -> None:
         """
         Initialize the streamer.
 
         :param pdf_path: Path to input PDF.
-        :param dpi: Rendering DPI.
+        :param dpi: Rendering DPI. With ``probe`` set, the highest DPI any page is rendered at.
+        :param workers: Number of render worker processes. ``0`` or ``1`` renders in-process.
+        :param prefetch: Maximum pages rendered ahead of the consumer. ``0`` uses ``2 * workers``.
+        :param probe: Optional adaptive DPI probe choosing a DPI per page.
+        :param gray: Yield single-channel ``(H, W)`` images, for OCR backends that accept them.
+        :param buffer_pool: Optional buffer pool for in-process rendering; consumers hand images back
+            via :meth:`release`.
+        :param governor: Optional memory governor. Yielded images are charged to its ``render`` stage, the
+            size of the next image is announced before each yield, and rendering waits while it would not fit
+            in the budget; the consumer hands the bytes on.
         """
         self.pdf_path = pdf_path
         self.dpi = dpi
+        self.workers = max(0, workers)
+        self.prefetch = prefetch if prefetch > 0 else 2 * self.workers
+        self.probe = probe
+        self.gray = gray
+        self.buffer_pool = buffer_pool
+        self.governor = governor
+        self._page_dpi: Dict[int, int] = {}
+        self._tile_plan: Dict[int, Tuple[int, List[Tile]]] = {}
+        self._tile_offsets: Dict[int, List[Tuple[int, int]]] = {}
+
+    def release(self, img: np.ndarray) -> None:
+        """
+        Hand a yielded image back once it is no longer needed.
+
+        :param img: Image previously yielded by :meth:`iter_pages`.
+        """
+        if self.buffer_pool is not None:
+            self.buffer_pool.release(img)
+
+    def estimate_nbytes(self, rect: pymupdf.Rect, dpi: int) -> int:
+        """
+        Size of the image a region renders to, known before rasterizing it.
+
+        :param rect: Region in PDF points, e.g. ``page.rect``.
+        :param dpi: Rendering DPI.
+        :return: Bytes of the ``uint8`` image.
+        """
+        zoom = dpi / 72.0
+        size = (rect * pymupdf.Matrix(zoom, zoom)).irect
+        return size.width * size.height * (1 if self.gray else 3)
+
+    def _tile_nbytes(self, tile: Tile) -> int:
+        """Size of the image a planned tile renders to."""
+        x0, y0, x1, y1 = tile
+        return (x1 - x0) * (y1 - y0) * (1 if self.gray else 3)
+
+    def _wait_for_room(self, nbytes: int, sink: Optional[ProgressSink]) -> None:
+        """Block until the governor has room for an image of ``nbytes``, reporting the wait as ``"memory_wait"``."""
+        waited = self.governor.wait_for_room(self, nbytes)
+        if sink is not None and waited > 0:
+            sink.on_timing("memory_wait", waited, pages=0)
+
+    def take_dpi(self, pno: int) -> int:
+        """
+        Return, and forget, the DPI a yielded page was rendered at.
+
+        :param pno: 0-based page index.
+        :return: DPI used for the page, or the configured DPI if unknown.
+        """
+        return self._page_dpi.pop(pno, self.dpi)
 
     @staticmethod
     def select_pages(
@@ -59,6 +333,153 @@ class PdfStreamer:
             idx = idx[::step]
         return idx
 
+    @staticmethod
+    def classify_page(page: pymupdf.Page, min_chars: int = 16, image_coverage: float = 0.5) -> str:
+        """
+        Classify a page from its content streams without rendering it.
+
+        Pages that already carry an OCR text layer count as text pages so they are not recognized again: those
+        marked with :data:`PAGE_MARKER` by this tool, and image pages whose text is all invisible (render
+        mode 3), as other OCR tools write it.
+
+        :param page: Loaded page.
+        :param min_chars: Minimum extractable non-space characters for the page to count as having text.
+        :param image_coverage: Fraction of the page area covered by images above which text pages count as mixed.
+        :return: :data:`PAGE_TEXT`, :data:`PAGE_IMAGE` or :data:`PAGE_MIXED`.
+        """
+        if page.parent.xref_get_key(page.xref, PAGE_MARKER)[1] == "true":
+            return PAGE_TEXT
+        chars = sum(1 for c in page.get_text("text") if not c.isspace())
+        if chars < min_chars:
+            return PAGE_IMAGE
+        area = abs(page.rect)
+        covered = 0.0
+        for info in page.get_image_info():
+            covered += abs(pymupdf.Rect(info["bbox"]) & page.rect)
+        if area > 0 and covered / area >= image_coverage:
+            if all(span["type"] == 3 for span in page.get_texttrace()):
+                return PAGE_TEXT
+            return PAGE_MIXED
+        return PAGE_TEXT
+
+    def classify_pages(
+            self,
+            page_indices: Iterable[int],
+            min_chars: int = 16,
+            image_coverage: float = 0.5
+    ) -> Dict[int, str]:
+        """
+        Pre-scan selected pages and classify each as already-text, image-only or mixed.
+
+        :param page_indices: 0-based page indices, typically from :meth:`select_pages`.
+        :param min_chars: See :meth:`classify_page`.
+        :param image_coverage: See :meth:`classify_page`.
+        :return: Mapping of page index to class.
+        """
+        with pymupdf.open(self.pdf_path) as doc:
+            return {
+                pno: self.classify_page(doc.load_page(pno), min_chars=min_chars, image_coverage=image_coverage)
+                for pno in page_indices
+            }
+
+    @staticmethod
+    def render_page(
+            doc: pymupdf.Document,
+            pno: int,
+            dpi: int,
+            gray: bool = False,
+            pool: Optional[PageBufferPool] = None
+    ) -> np.ndarray:
+        """
+        Rasterize a single page to an RGB or grayscale array.
+
+        Pixels are read through the pixmap's memoryview and copied once into the destination,
+        which comes from ``pool`` when given.
+
+        :param doc: Opened PyMuPDF document.
+        :param pno: 0-based page index.
+        :param dpi: Rendering DPI.
+        :param gray: Return a single-channel ``(H, W)`` image instead of RGB.
+        :param pool: Optional buffer pool providing the destination array.
+        :return: ``uint8`` array of shape ``(H, W, 3)``, or ``(H, W)`` when ``gray``.
+        """
+        page = doc.load_page(pno)
+        pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY if gray else pymupdf.csRGB, alpha=False)
+        return PdfStreamer._copy_pixmap(pix, gray, pool)
+
+    @staticmethod
+    def _copy_pixmap(pix: pymupdf.Pixmap, gray: bool, pool: Optional[PageBufferPool]) -> np.ndarray:
+        """
+        Copy pixmap samples into a fresh or pooled array.
+
+        :param pix: Rendered pixmap without alpha.
+        :param gray: Keep a single channel.
+        :param pool: Optional buffer pool providing the destination array.
+        :return: ``uint8`` array of shape ``(H, W, 3)``, or ``(H, W)`` when ``gray``.
+        """
+        h, w, n = pix.height, pix.width, pix.n
+        src = np.ndarray((h, w, n), dtype=np.uint8, buffer=pix.samples_mv, strides=(pix.stride, n, 1))
+        if gray:
+            src, shape = src[:, :, 0], (h, w)
+        else:
+            src, shape = src[:, :, :3], (h, w, 3)
+        out = pool.acquire(shape) if pool is not None else np.empty(shape, dtype=np.uint8)
+        np.copyto(out, src)
+        return out
+
+    @staticmethod
+    def render_clip(
+            page: pymupdf.Page,
+            dpi: int,
+            tile: Tile,
+            gray: bool = False,
+            pool: Optional[PageBufferPool] = None
+    ) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        Rasterize one rectangular region of a page.
+
+        :param page: Loaded page.
+        :param dpi: Rendering DPI.
+        :param tile: Region ``(x0, y0, x1, y1)`` in pixels of the full page rendered at ``dpi``.
+        :param gray: See :meth:`render_page`.
+        :param pool: See :meth:`render_page`.
+        :return: ``(image, (x_offset, y_offset))``; the offset maps image pixels back to full-page pixels.
+        """
+        zoom = dpi / 72.0
+        origin = (page.rect * pymupdf.Matrix(zoom, zoom)).irect
+        x0, y0, x1, y1 = tile
+        clip = pymupdf.Rect(
+            page.rect.x0 + x0 / zoom, page.rect.y0 + y0 / zoom,
+            page.rect.x0 + x1 / zoom, page.rect.y0 + y1 / zoom,
+        )
+        pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=pymupdf.csGRAY if gray else pymupdf.csRGB, alpha=False)
+        return PdfStreamer._copy_pixmap(pix, gray, pool), (pix.x - origin.x0, pix.y - origin.y0)
+
+    @classmethod
+    def render_adaptive(
+            cls,
+            doc: pymupdf.Document,
+            pno: int,
+            dpi: int,
+            probe: Optional[DpiProbe],
+            gray: bool = False,
+            pool: Optional[PageBufferPool] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Rasterize a page at a fixed DPI or at the DPI chosen by ``probe``.
+
+        :param doc: Opened PyMuPDF document.
+        :param pno: 0-based page index.
+        :param dpi: Rendering DPI, or the DPI ceiling when ``probe`` is set.
+        :param probe: Optional adaptive DPI probe.
+        :param gray: See :meth:`render_page`.
+        :param pool: See :meth:`render_page`.
+        :return: ``(image, dpi_used)``.
+        """
+        if probe is not None:
+            dpi = probe.choose(doc.load_page(pno), dpi)
+        return cls.render_page(doc, pno, dpi, gray=gray, pool=pool), dpi
+
     def iter_pages(
             self,
             page_indices: Iterable[int],
@@ -67,27 +488,184 @@ class PdfStreamer:
         """
         Yield ``(page_no, image)`` for each selected page.
 
+        Dispatches to a worker pool when ``workers > 1``; output order always follows ``page_indices``.
+
         :param page_indices: 0-based page indices to render.
         :param sink: Optional progress sink to advance render count.
-        :yield: Tuple of page number and RGB ``uint8`` array of shape ``(H, W, 3)``.
+        :yield: Tuple of page number and ``uint8`` image, RGB ``(H, W, 3)`` or grayscale ``(H, W)``.
         """
+        if self.workers > 1:
+            yield from self._iter_pages_pool(page_indices, sink)
+            return
         doc = pymupdf.open(self.pdf_path)
+        it = iter(page_indices)
+        pno = next(it, None)
         try:
+            while pno is not None:
+                if self.governor is not None:
+                    self._wait_for_room(self.estimate_nbytes(doc.load_page(pno).rect, self.dpi), sink)
+                t0 = time.perf_counter()
+                arr, self._page_dpi[pno] = self.render_adaptive(
+                    doc, pno, self.dpi, self.probe, gray=self.gray, pool=self.buffer_pool
+                )
+                nxt = next(it, None)
+                if self.governor is not None:
+                    self.governor.charge(STAGE_RENDER, arr.nbytes)
+                    self.governor.announce(
+                        self, self.estimate_nbytes(doc.load_page(nxt).rect, self.dpi) if nxt is not None else 0
+                    )
+                if sink is not None:
+                    sink.on_timing("render", time.perf_counter() - t0, nbytes=arr.nbytes)
+                    sink.on_render_advance(1)
+                yield pno, arr
+                pno = nxt
+        finally:
+            if self.governor is not None:
+                self.governor.announce(self, 0)
+            doc.close()
+
+    def plan_tiles(self, page_indices: Iterable[int], max_pixels: int, overlap: int) -> Dict[int, int]:
+        """
+        Decide each page's render DPI and split pages larger than ``max_pixels`` into overlapping tiles.
+
+        With a DPI probe set, the probe runs here instead of at render time.
+
+        :param page_indices: 0-based page indices to render.
+        :param max_pixels: Pixel budget per tile.
+        :param overlap: Minimum overlap between neighbouring tiles, in pixels.
+        :return: Mapping of page index to its number of tiles.
+        """
+        with pymupdf.open(self.pdf_path) as doc:
             for pno in page_indices:
                 page = doc.load_page(pno)
-                pix = page.get_pixmap(dpi=self.dpi, colorspace=pymupdf.csRGB, alpha=False)
-                buf = pix.samples
-                h, w, n = pix.height, pix.width, pix.n
-                arr = np.frombuffer(buf, dtype=np.uint8)
-                if n == 4 and pix.alpha:
-                    arr = arr.reshape(h, w, 4)[:, :, :3]
-                elif n >= 3:
-                    arr = arr.reshape(h, w, n)[:, :, :3]
-                else:
-                    arr = arr.reshape(h, w, 1)
-                    arr = np.repeat(arr, 3, axis=2)
+                dpi = self.probe.choose(page, self.dpi) if self.probe is not None else self.dpi
+                zoom = dpi / 72.0
+                size = (page.rect * pymupdf.Matrix(zoom, zoom)).irect
+                self._tile_plan[pno] = (dpi, plan_tiles(size.width, size.height, max_pixels, overlap))
+        return {pno: len(tiles) for pno, (_, tiles) in self._tile_plan.items()}
+
+    def take_tile_offsets(self, pno: int) -> List[Tuple[int, int]]:
+        """
+        Return, and forget, the pixel offsets of a page's tiles in the order they were yielded.
+
+        :param pno: 0-based page index.
+        :return: ``(x_offset, y_offset)`` per tile.
+        """
+        return self._tile_offsets.pop(pno)
+
+    def iter_tiles(
+            self,
+            page_indices: Iterable[int],
+            sink: Optional[ProgressSink] = None
+    ) -> Iterator[Tuple[Tuple[int, int], np.ndarray]]:
+        """
+        Yield the tiles planned by :meth:`plan_tiles`, one rendered clip at a time.
+
+        Only one tile per page is rasterized at once, so render memory is bounded by the tile budget
+        rather than the page size. Tiles are always rendered in-process.
+
+        :param page_indices: 0-based page indices planned by :meth:`plan_tiles`.
+        :param sink: Optional progress sink; the render count advances once per page.
+        :yield: ``((page_no, tile_index), image)``.
+        """
+        doc = pymupdf.open(self.pdf_path)
+        it = iter(page_indices)
+        pno = next(it, None)
+        try:
+            while pno is not None:
+                dpi, tiles = self._tile_plan.pop(pno)
+                self._page_dpi[pno] = dpi
+                offsets = self._tile_offsets[pno] = []
+                page = doc.load_page(pno)
+                nxt = next(it, None)
+                for k, tile in enumerate(tiles):
+                    if self.governor is not None:
+                        self._wait_for_room(self._tile_nbytes(tile), sink)
+                    t0 = time.perf_counter()
+                    arr, offset = self.render_clip(page, dpi, tile, gray=self.gray, pool=self.buffer_pool)
+                    if self.governor is not None:
+                        self.governor.charge(STAGE_RENDER, arr.nbytes)
+                        if k + 1 < len(tiles):
+                            self.governor.announce(self, self._tile_nbytes(tiles[k + 1]))
+                        elif nxt is not None:
+                            self.governor.announce(self, self._tile_nbytes(self._tile_plan[nxt][1][0]))
+                        else:
+                            self.governor.announce(self, 0)
+                    offsets.append(offset)
+                    last = k == len(tiles) - 1
+                    if sink is not None:
+                        sink.on_timing("render", time.perf_counter() - t0, pages=int(last), nbytes=arr.nbytes)
+                        if last:
+                            sink.on_render_advance(1)
+                    yield (pno, k), arr
+                pno = nxt
+        finally:
+            if self.governor is not None:
+                self.governor.announce(self, 0)
+            doc.close()
+
+    def _iter_pages_pool(
+            self,
+            page_indices: Iterable[int],
+            sink: Optional[ProgressSink] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Render pages in worker processes with a bounded in-order prefetch window.
+
+        With a memory governor, the window is only topped up while the requested pages fit in the budget
+        next to what the stages already hold; one page is always in flight, and its estimated size is
+        announced before the previous page is yielded.
+
+        :param page_indices: 0-based page indices to render.
+        :param sink: Optional progress sink to advance render count.
+        :yield: Tuple of page number and RGB ``uint8`` array of shape ``(H, W, 3)``.
+        """
+        window = max(self.prefetch, self.workers)
+        pending: Deque[Tuple[Future, int]] = deque()
+        it = iter(page_indices)
+        nxt = next(it, None)
+        requested = 0
+        sizes = pymupdf.open(self.pdf_path) if self.governor is not None else None
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_render_worker_init,
+            initargs=(self.pdf_path,),
+        )
+
+        def _top_up() -> None:
+            nonlocal nxt, requested
+            while nxt is not None and len(pending) < window:
+                est = 0
+                if sizes is not None:
+                    est = self.estimate_nbytes(sizes.load_page(nxt).rect, self.dpi)
+                    if pending and self.governor.total + requested + est > self.governor.budget:
+                        return
+                pending.append((executor.submit(_render_worker_page, nxt, self.dpi, self.probe, self.gray), est))
+                requested += est
+                nxt = next(it, None)
+
+        try:
+            _top_up()
+            while pending:
+                t0 = time.perf_counter()
+                fut, est = pending.popleft()
+                pno, arr, self._page_dpi[pno] = fut.result()
+                waited = time.perf_counter() - t0
+                requested -= est
+                if self.governor is not None:
+                    self.governor.charge(STAGE_RENDER, arr.nbytes)
+                _top_up()
+                if self.governor is not None:
+                    self.governor.announce(self, pending[0][1] if pending else 0)
                 if sink is not None:
+                    sink.on_timing("render", waited, nbytes=arr.nbytes)
                     sink.on_render_advance(1)
-                yield pno, np.ascontiguousarray(arr)
+                yield pno, arr
         finally:
-            doc.close()
+            if self.governor is not None:
+                self.governor.announce(self, 0)
+            for fut, _ in pending:
+                fut.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+            if sizes is not None:
+                sizes.close()
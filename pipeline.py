@@ -1,14 +1,47 @@
 from __future__ import annotations
 
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+import numpy as np
 import pymupdf
 
+from debug_overlay import debug_path, iter_ndjson_pages, iter_store_pages, render_debug_pdf, select_debug_pages
+from ocr_cache import OcrResultCache
 from ocr_engine import OcrEngine
-from overlay_writer import IncrementalOverlayWriter
-from pdf_streamer import PdfStreamer
+from ocr_pool import OcrEnginePool
+from memory_budget import STAGE_OVERLAY, STAGE_RENDER, MemoryGovernor
+from page_filters import BlankPageDetector
+from overlay_writer import CommitPolicy, IncrementalOverlayWriter
+from pdf_streamer import PAGE_IMAGE, PAGE_MIXED, PAGE_TEXT, DpiProbe, PageBufferPool, PdfStreamer
+from preprocess import PagePreprocessor, Transform
 from progress import ProgressSink, TqdmProgressSink
+from resume_journal import ResumeJournal
+from result_store import ColumnarStreamWriter
 from result_writers import CsvStreamWriter, NdjsonStreamWriter
+from search_index import SearchIndexWriter
+from stages import ThreadedConsumer, ThreadedStage
+from tiling import merge_tile_items, plan_tiles
+
+
+def format_pages(page_indices: List[int]) -> str:
+    """
+    Format 0-based page indices as compact 1-based ranges.
+
+    :param page_indices: Sorted 0-based page indices.
+    :return: E.g. ``"1-3,7,9-10"``; empty if there are no pages.
+    """
+    runs: List[str] = []
+    start = prev = None
+    for p in page_indices + [None]:
+        if p is not None and prev is not None and p == prev + 1:
+            prev = p
+            continue
+        if start is not None:
+            runs.append(f"{start + 1}" if start == prev else f"{start + 1}-{prev + 1}")
+        start = prev = p
+    return ",".join(runs)
 
 
 class OCRPipeline:
@@ -21,7 +54,7 @@ class OCRPipeline:
     def __init__(
             self,
             input_pdf: str,
-            output_pdf: str,
+            output_pdf: Optional[str],
             *,
             dpi: int = 300,
             device: Optional[str] = "auto",
@@ -34,14 +67,54 @@ class OCRPipeline:
             batch_size: int = 1,
             save_csv: Optional[str] = None,
             save_ndjson: Optional[str] = None,
+            save_store: Optional[str] = None,
+            index_db: Optional[str] = None,
             debug_visible: bool = False,
+            debug_pages: Optional[str] = None,
+            render_workers: int = 0,
+            render_prefetch: int = 0,
+            concurrent: bool = False,
+            render_queue_depth: int = 4,
+            ocr_queue_depth: int = 4,
+            result_queue_depth: int = 16,
+            commit_every: int = 1,
+            commit_seconds: float = 0.0,
+            consolidate: bool = True,
+            subset_fonts: bool = True,
+            resume: bool = False,
+            journal_path: Optional[str] = None,
+            cache_dir: Optional[str] = None,
+            cache_max_mb: int = 1024,
+            skip_text_pages: bool = True,
+            adaptive_dpi: bool = False,
+            min_dpi: int = 100,
+            target_xheight_px: float = 12.0,
+            skip_blank: bool = False,
+            blank_ink_ratio: float = 0.001,
+            blank_min_std: float = 3.0,
+            gray: bool = False,
+            reuse_buffers: bool = True,
+            reorder_window: int = 0,
+            max_batch_mpx: float = 0.0,
+            ocr_workers: int = 0,
+            ocr_threads: int = 0,
+            tile_mpx: float = 0.0,
+            tile_overlap: int = 200,
+            crop_margins: bool = False,
+            pre_gray: bool = False,
+            normalize_contrast: bool = False,
+            max_side: int = 0,
+            mem_budget_mb: int = 0,
+            ocr: Optional[OcrEngine] = None,
+            governor: Optional[MemoryGovernor] = None,
             sink: Optional[ProgressSink] = None,
     ) -> None:
         """
         Configure the streaming pipeline.
 
         :param input_pdf: Source PDF path.
-        :param output_pdf: Output PDF path.
+        :param output_pdf: Output PDF path. ``None`` only writes the result outputs, e.g. for a shard that
+            :mod:`shard` merges into a PDF later; ``resume`` then needs an explicit ``journal_path``.
         :param dpi: Rendering DPI.
         :param device: Device string or ``"auto"``.
         :param lang: Language for runtime model selection.
@@ -53,7 +126,56 @@ class OCRPipeline:
         :param batch_size: OCR batch size.
         :param save_csv: CSV output path.
         :param save_ndjson: NDJSON output path.
-        :param debug_visible: Whether to also write a visible overlay PDF.
+        :param save_store: Columnar binary result store path, readable with :class:`ResultStoreReader`.
+        :param index_db: SQLite full-text index to add this document's text to, queried with :class:`SearchIndex`.
+        :param debug_visible: After the run, render a visible overlay PDF from the result store, or the NDJSON
+            output if there is no store. Needs ``output_pdf`` and one of ``save_store``/``save_ndjson``.
+        :param debug_pages: Comma-separated 1-based pages to include in the debug PDF; ``None`` includes all.
+        :param render_workers: Number of render worker processes (``0`` renders in-process).
+        :param render_prefetch: Pages rendered ahead of OCR when using render workers.
+        :param concurrent: Run render, OCR, result writing and overlay as overlapping threaded stages.
+        :param render_queue_depth: Rendered pages buffered ahead of OCR in concurrent mode.
+        :param ocr_queue_depth: OCR'd pages buffered ahead of overlay in concurrent mode.
+        :param result_queue_depth: Pages buffered ahead of the CSV/NDJSON writer in concurrent mode.
+        :param commit_every: Save the output incrementally every N pages (``0`` disables).
+        :param commit_seconds: Save the output incrementally every T seconds (``0`` disables).
+        :param consolidate: Finish with a full garbage-collected, deflated save.
+        :param subset_fonts: Subset the embedded font to the used glyphs in the consolidating save.
+        :param resume: Keep a resume journal and skip pages whose results it records and whose text layer the
+            output PDF already carries; pages missing only one of the two get just that part.
+        :param journal_path: Journal file path. Defaults to ``output_pdf + ".journal"``.
+        :param cache_dir: Directory of the persistent OCR result cache. ``None`` disables caching.
+        :param cache_max_mb: Size budget of the OCR result cache in MiB.
+        :param skip_text_pages: Pre-scan pages and leave those that already have a text layer untouched.
+        :param adaptive_dpi: Probe each page at low resolution and render it at the lowest sufficient DPI,
+            using ``dpi`` as the ceiling.
+        :param min_dpi: Lowest DPI adaptive rendering may choose.
+        :param target_xheight_px: Rendered x-height of small text that adaptive rendering aims for.
+        :param skip_blank: Give blank or near-blank pages an empty result without running OCR.
+        :param blank_ink_ratio: Ink pixel fraction below which a page counts as blank.
+        :param blank_min_std: Grayscale standard deviation below which a page counts as blank.
+        :param gray: Render single-channel images; only for OCR backends that accept them.
+        :param reuse_buffers: Recycle page image buffers through a bounded pool (in-process rendering only).
+        :param reorder_window: Pages OCR may hold back to batch similarly sized pages. ``0`` keeps arrival order.
+        :param max_batch_mpx: Pixel budget per OCR batch in megapixels. ``0`` caps by ``batch_size`` only.
+        :param ocr_workers: Number of CPU OCR worker processes, each pinned to a slice of cores
+            (``0`` runs OCR in-process on ``device``).
+        :param ocr_threads: Inference threads per OCR worker; ``0`` uses one per pinned core.
+        :param tile_mpx: Split pages larger than this many megapixels into overlapping tiles that are OCR'd
+            separately and merged back. ``0`` OCRs whole pages. Tiles are rendered in-process.
+        :param tile_overlap: Minimum overlap between neighbouring tiles, in render pixels.
+        :param crop_margins: Crop scanner borders and blank margins before OCR.
+        :param pre_gray: Flatten RGB images to luma before OCR, keeping three channels.
+        :param normalize_contrast: Stretch ink to black and paper to white before OCR.
+        :param max_side: Downscale images whose longest side exceeds this many pixels before OCR. ``0`` disables.
+            Preprocessing works on tiles when tiling is enabled; results are mapped back to page pixels.
+        :param mem_budget_mb: Memory budget in MiB for page images in flight (rendered, batched for OCR) and
+            recognized pages awaiting overlay. Rendering waits and OCR batches shrink while it is exceeded.
+            ``0`` disables the governor.
+        :param ocr: Already loaded engine to share, e.g. across documents. The pipeline does not close it,
+            and ``device``/``ocr_workers``/``ocr_threads`` are ignored.
+        :param governor: Already created memory governor to share, e.g. across documents; replaces
+            ``mem_budget_mb`` and its statistics are left to the owner.
         :param sink: Progress sink implementation.
         """
         self.input_pdf = input_pdf
@@ -61,22 +183,419 @@ class OCRPipeline:
         self.dpi = dpi
         self.font_path = font_path
         self.batch_size = max(1, batch_size)
+        self.reorder_window = max(0, reorder_window)
+        self.max_batch_pixels = int(max(0.0, max_batch_mpx) * 1_000_000)
+        self.max_tile_pixels = int(max(0.0, tile_mpx) * 1_000_000)
+        self.tile_overlap = max(0, tile_overlap)
+        if debug_visible and not (output_pdf and (save_store or save_ndjson)):
+            raise ValueError("debug_visible needs output_pdf and save_store or save_ndjson to render from")
         self.debug_visible = debug_visible
+        self.debug_pages = debug_pages
+        self.save_store = save_store
+        self.save_ndjson = save_ndjson
+        self.subset_fonts = subset_fonts
+        self.concurrent = concurrent
+        self.render_queue_depth = max(1, render_queue_depth)
+        self.ocr_queue_depth = max(1, ocr_queue_depth)
+        self.result_queue_depth = max(1, result_queue_depth)
         self.sink = sink or TqdmProgressSink()
         with pymupdf.open(input_pdf) as d:
             total = d.page_count
         self.page_indices = PdfStreamer.select_pages(total, page_range=page_range, pages=pages, step=page_step)
-        self.streamer = PdfStreamer(input_pdf, dpi=dpi)
-        self.ocr = OcrEngine(device=device, lang=lang, rec_model=rec_model)
+        self._owns_governor = governor is None
+        if governor is None and mem_budget_mb > 0:
+            governor = MemoryGovernor(mem_budget_mb << 20)
+        self.governor = governor
+        probe = DpiProbe(target_xheight_px=target_xheight_px, min_dpi=min_dpi) if adaptive_dpi else None
+        self.buffer_pool: Optional[PageBufferPool] = None
+        if reuse_buffers and (render_workers <= 1 or self.max_tile_pixels):
+            in_flight = max(self.batch_size, self.reorder_window) + (self.render_queue_depth if concurrent else 0) + 1
+            batches = ocr.in_flight if ocr is not None else (2 * ocr_workers if ocr_workers > 1 else 1)
+            in_flight += (batches - 1) * self.batch_size
+            self.buffer_pool = PageBufferPool(max_buffers=in_flight)
+        self.streamer = PdfStreamer(
+            input_pdf,
+            dpi=dpi,
+            workers=render_workers,
+            prefetch=render_prefetch,
+            probe=probe,
+            gray=gray,
+            buffer_pool=self.buffer_pool,
+            governor=self.governor,
+        )
+        self.prescan: Dict[str, int] = {}
+        if skip_text_pages:
+            classes = self.streamer.classify_pages(self.page_indices)
+            self.prescan = {
+                f"prescan_{c}": sum(1 for v in classes.values() if v == c)
+                for c in (PAGE_TEXT, PAGE_IMAGE, PAGE_MIXED)
+            }
+            self.page_indices = [p for p in self.page_indices if classes[p] != PAGE_TEXT]
+        self.journal: Optional[ResumeJournal] = None
+        self._results_done: Set[int] = set()
+        overlaid: Set[int] = set()
+        resumed = False
+        if resume:
+            if journal_path is None and output_pdf is None:
+                raise ValueError("resume without an output PDF needs an explicit journal_path")
+            self.journal = ResumeJournal(journal_path or output_pdf + ".journal", input_pdf)
+            resumed = self.journal.open({"csv": save_csv, "ndjson": save_ndjson, "store": save_store})
+            if resumed:
+                self._results_done = set(self.journal.done)
+                overlaid = IncrementalOverlayWriter.marked_pages(output_pdf) if output_pdf else set(range(total))
+            self.page_indices = [p for p in self.page_indices if p not in self._results_done or p not in overlaid]
+            self.journal.expect([p for p in self.page_indices if p not in self._results_done])
+        self.preprocessor: Optional[PagePreprocessor] = None
+        self._transforms: Dict[Any, Transform] = {}
+        if crop_margins or pre_gray or normalize_contrast or max_side:
+            self.preprocessor = PagePreprocessor(
+                crop_margins=crop_margins,
+                to_gray=pre_gray,
+                normalize_contrast=normalize_contrast,
+                max_side=max_side,
+            )
+        self.tile_counts: Dict[int, int] = {}
+        self._tiles: Dict[int, List[Tuple[Tuple[int, int], List[Dict[str, Any]]]]] = {}
+        if self.max_tile_pixels:
+            self.tile_counts = self.streamer.plan_tiles(self.page_indices, self.max_tile_pixels, self.tile_overlap)
+        self._owns_ocr = ocr is None
+        if ocr is None:
+            ocr = self.build_engine(device=device, lang=lang, rec_model=rec_model,
+                                    workers=ocr_workers, threads=ocr_threads)
+        self.ocr = ocr
+        self.blank: Optional[BlankPageDetector] = None
+        if skip_blank:
+            self.blank = BlankPageDetector(ink_ratio=blank_ink_ratio, min_std=blank_min_std)
+        self.cache: Optional[OcrResultCache] = None
+        if cache_dir:
+            self.cache = OcrResultCache(
+                cache_dir,
+                max_bytes=cache_max_mb << 20,
+                namespace=dict(self.ocr.config, dpi=dpi),
+            )
         self.writer = IncrementalOverlayWriter(
             input_pdf,
             output_pdf,
             font_path=font_path,
             dpi=dpi,
-            debug_visible=debug_visible
+            commit_policy=CommitPolicy(every_pages=commit_every, every_seconds=commit_seconds, consolidate=consolidate),
+            resume=resumed,
+            subset_fonts=subset_fonts,
+            skip_pages=overlaid,
         )
-        self.csvw = CsvStreamWriter(save_csv)
-        self.ndjw = NdjsonStreamWriter(save_ndjson)
+        self.csvw = CsvStreamWriter(save_csv, append=resumed)
+        self.ndjw = NdjsonStreamWriter(save_ndjson, append=resumed)
+        self.storew = ColumnarStreamWriter(save_store, append=resumed)
+        self.indexw = SearchIndexWriter(index_db, input_pdf, dpi=dpi, append=resumed)
+        if resumed:
+            self.journal.checkpoint({"csv": self.csvw.offset(), "ndjson": self.ndjw.offset(),
+                                     "store": self.storew.offset()})
+
+    @staticmethod
+    def plan(
+            input_pdf: str,
+            output_pdf: Optional[str] = None,
+            *,
+            dpi: int = 300,
+            page_range: Optional[str] = None,
+            pages: Optional[str] = None,
+            page_step: int = 1,
+            batch_size: int = 1,
+            resume: bool = False,
+            journal_path: Optional[str] = None,
+            skip_text_pages: bool = True,
+            tile_mpx: float = 0.0,
+            tile_overlap: int = 200,
+            adaptive_dpi: bool = False,
+            min_dpi: int = 100,
+            target_xheight_px: float = 12.0,
+    ) -> Dict[str, Any]:
+        """
+        Work out what a run with these options would do, without loading OCR models or writing outputs.
+
+        :param input_pdf: Source PDF path.
+        :param output_pdf: Output PDF path; only used to find the default resume journal, so it may be
+            omitted unless ``resume`` is set without ``journal_path``.
+        :param dpi: Rendering DPI, or the DPI ceiling with adaptive rendering.
+        :param page_range: See :meth:`PdfStreamer.select_pages`.
+        :param pages: See :meth:`PdfStreamer.select_pages`.
+        :param page_step: See :meth:`PdfStreamer.select_pages`.
+        :param batch_size: OCR batch size.
+        :param resume: Skip pages an existing resume journal records as done.
+        :param journal_path: Journal file path. Defaults to ``output_pdf + ".journal"``.
+        :param skip_text_pages: Leave pages that already have a text layer untouched.
+        :param tile_mpx: See :class:`OCRPipeline`.
+        :param tile_overlap: See :class:`OCRPipeline`.
+        :param adaptive_dpi: See :class:`OCRPipeline`; each page is probed as in a real run.
+        :param min_dpi: See :class:`OCRPipeline`.
+        :param target_xheight_px: See :class:`OCRPipeline`.
+        :return: Page counts by reason, the 1-based ``pages`` to OCR, their megapixels at the DPI each page
+            would be rendered at (with ``dpi_min``/``dpi_max`` under adaptive rendering), OCR units (pages
+            or tiles) and batches.
+        :raises ValueError: If ``resume`` is set without ``journal_path`` or ``output_pdf``.
+        """
+        if resume and not (journal_path or output_pdf):
+            raise ValueError("resume needs journal_path or output_pdf")
+        with pymupdf.open(input_pdf) as d:
+            total = d.page_count
+        selected = PdfStreamer.select_pages(total, page_range=page_range, pages=pages, step=page_step)
+        out: Dict[str, Any] = {"pages_total": total, "pages_selected": len(selected)}
+        todo = selected
+        streamer = PdfStreamer(input_pdf, dpi=dpi)
+        if skip_text_pages:
+            classes = streamer.classify_pages(todo)
+            for c in (PAGE_TEXT, PAGE_IMAGE, PAGE_MIXED):
+                out[f"prescan_{c}"] = sum(1 for v in classes.values() if v == c)
+            todo = [p for p in todo if classes[p] != PAGE_TEXT]
+        if resume:
+            done = ResumeJournal(journal_path or output_pdf + ".journal", input_pdf).recorded_pages()
+            if output_pdf:
+                done &= IncrementalOverlayWriter.marked_pages(output_pdf)
+            out["pages_resumed"] = sum(1 for p in todo if p in done)
+            todo = [p for p in todo if p not in done]
+        probe = DpiProbe(target_xheight_px=target_xheight_px, min_dpi=min_dpi) if adaptive_dpi else None
+        dpis: List[int] = []
+        sizes: List[pymupdf.IRect] = []
+        with pymupdf.open(input_pdf) as d:
+            for p in todo:
+                page = d.load_page(p)
+                dpis.append(probe.choose(page, dpi) if probe is not None else dpi)
+                sizes.append((page.rect * pymupdf.Matrix(dpis[-1] / 72.0, dpis[-1] / 72.0)).irect)
+        units = len(todo)
+        if tile_mpx > 0:
+            units = sum(len(plan_tiles(r.width, r.height, int(tile_mpx * 1_000_000), tile_overlap)) for r in sizes)
+        if probe is not None and dpis:
+            out.update(dpi_min=min(dpis), dpi_max=max(dpis))
+        out.update(
+            pages_to_ocr=len(todo),
+            megapixels=round(sum(r.width * r.height for r in sizes) / 1e6, 1),
+            ocr_units=units,
+            ocr_batches=-(-units // max(1, batch_size)),
+            pages=format_pages(todo),
+        )
+        return out
+
+    @staticmethod
+    def build_engine(
+            *,
+            device: Optional[str] = "auto",
+            lang: Optional[str] = "korean",
+            rec_model: Optional[str] = "auto",
+            workers: int = 0,
+            threads: int = 0
+    ) -> OcrEngine:
+        """
+        Load an OCR engine: a worker pool when ``workers > 1``, otherwise an in-process engine.
+
+        :param device: Device string or ``"auto"``; ignored by the CPU worker pool.
+        :param lang: Language for runtime model selection.
+        :param rec_model: ``"auto"`` or explicit recognition model name.
+        :param workers: Number of CPU OCR worker processes.
+        :param threads: Inference threads per worker.
+        :return: Engine instance.
+        """
+        if workers > 1:
+            return OcrEnginePool(workers, threads=threads, lang=lang, rec_model=rec_model)
+        return OcrEngine(device=device, lang=lang, rec_model=rec_model)
+
+    def _write_results(self, page: Tuple[int, List[Dict[str, Any]]]) -> None:
+        """
+        Write one page of OCR results to the CSV/NDJSON/result store outputs and the search index.
+
+        :param page: ``(page_no, items)`` with a 0-based page number.
+        """
+        pno, items = page
+        if pno in self._results_done:
+            return
+        t0 = time.perf_counter()
+        self.csvw.write_page(pno + 1, items)
+        self.ndjw.write_page(pno + 1, items)
+        self.storew.write_page(pno + 1, items)
+        self.indexw.write_page(pno + 1, items)
+        if self.journal is not None:
+            offsets = {"csv": self.csvw.offset(), "ndjson": self.ndjw.offset(), "store": self.storew.offset()}
+            self.journal.mark_results(pno, offsets)
+        self.sink.on_timing("results", time.perf_counter() - t0, items=len(items))
+
+    @staticmethod
+    def _scale_items(items: List[Dict[str, Any]], factor: float) -> List[Dict[str, Any]]:
+        """
+        Rescale item polygons, e.g. from a page's render DPI to the reference DPI.
+
+        :param items: OCR items.
+        :param factor: Multiplier applied to every coordinate.
+        :return: ``items`` itself if ``factor`` is 1, otherwise rescaled copies.
+        """
+        if factor == 1:
+            return items
+        return [
+            dict(it, poly=[[float(x) * factor, float(y) * factor] for x, y in it["poly"]])
+            if it.get("poly") is not None else it
+            for it in items
+        ]
+
+    def _page_outputs(self, pno: int, items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Resolve the render DPI of a recognized page and its items in reference-DPI pixels.
+
+        CSV/NDJSON coordinates stay in ``dpi`` pixels even when pages are rendered adaptively.
+
+        :param pno: 0-based page index.
+        :param items: OCR items in the page's render pixels.
+        :return: ``(items_for_results, page_dpi)``.
+        """
+        page_dpi = self.streamer.take_dpi(pno)
+        return self._scale_items(items, self.dpi / page_dpi), page_dpi
+
+    def render_units(self, sink: Optional[ProgressSink] = None) -> Iterator[Tuple[Any, np.ndarray]]:
+        """
+        Render the selected pages as OCR units: whole pages, or tiles when tiling is enabled.
+
+        :param sink: Optional progress sink to advance render count.
+        :return: Iterator of ``(key, image)``; keys are page numbers or ``(page_no, tile_index)``.
+        """
+        if self.max_tile_pixels:
+            units = self.streamer.iter_tiles(self.page_indices, sink=sink)
+        else:
+            units = self.streamer.iter_pages(self.page_indices, sink=sink)
+        if self.preprocessor is None:
+            return units
+        return self._preprocess(units, sink)
+
+    def _preprocess(
+            self,
+            units: Iterator[Tuple[Any, np.ndarray]],
+            sink: Optional[ProgressSink] = None
+    ) -> Iterator[Tuple[Any, np.ndarray]]:
+        """
+        Run the preprocessor over rendered units, remembering each unit's transform for :meth:`assemble`.
+
+        :param units: Iterator of ``(key, image)``.
+        :param sink: Optional progress sink receiving ``"preprocess"`` timings.
+        :yield: ``(key, preprocessed_image)``.
+        """
+        for key, img in units:
+            t0 = time.perf_counter()
+            out, transform = self.preprocessor.apply(img, pool=self.buffer_pool)
+            if out is not img:
+                if self.governor is not None:
+                    self.governor.charge(STAGE_RENDER, out.nbytes)
+                    self.governor.discharge(STAGE_RENDER, img.nbytes)
+                self.streamer.release(img)
+                self._transforms[key] = transform
+            if sink is not None:
+                sink.on_timing("preprocess", time.perf_counter() - t0, pages=0 if self.max_tile_pixels else 1,
+                               nbytes=out.nbytes)
+            yield key, out
+
+    def assemble(self, key: Any, items: List[Dict[str, Any]]) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Collect the OCR result of one unit from :meth:`render_units`.
+
+        Items are first mapped back through the unit's preprocessing transform. Tile results are held until
+        the page's last tile arrives, then mapped to page pixels with duplicates from the overlap zones removed.
+
+        :param key: Unit key.
+        :param items: OCR items in the unit's pixels.
+        :return: ``(page_no, items)`` once the page is complete, otherwise ``None``.
+        """
+        transform = self._transforms.pop(key, None)
+        if transform is not None:
+            items = PagePreprocessor.restore(items, transform)
+        if not self.max_tile_pixels:
+            return key, items
+        pno, k = key
+        tiles = self._tiles.setdefault(pno, [])
+        tiles.append((k, items))
+        if len(tiles) < self.tile_counts[pno]:
+            return None
+        del self._tiles[pno]
+        tiles.sort(key=lambda t: t[0])
+        offsets = self.streamer.take_tile_offsets(pno)
+        return pno, merge_tile_items([(offsets[k], tile_items) for k, tile_items in tiles])
+
+    def _recognize(
+            self,
+            page_img_iter: Iterable[Tuple[Any, np.ndarray]]
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        OCR a unit image stream with the configured batching, blank filter, cache and buffer recycling.
+
+        :param page_img_iter: Iterable of ``(key, image)`` from :meth:`render_units`.
+        :return: Iterator of ``(page_no, items)``.
+        """
+        for key, items in self.ocr.stream(
+                page_img_iter,
+                batch_size=self.batch_size,
+                sink=self.sink,
+                cache=self.cache,
+                blank=self.blank,
+                release=self.streamer.release,
+                reorder_window=self.reorder_window,
+                max_batch_pixels=self.max_batch_pixels,
+                governor=self.governor,
+        ):
+            page = self.assemble(key, items)
+            if page is not None:
+                if self.governor is not None:
+                    self.governor.charge(STAGE_OVERLAY, MemoryGovernor.items_nbytes(page[1]))
+                yield page
+
+    def handle_page(self, pno: int, items: List[Dict[str, Any]]) -> None:
+        """
+        Write results and overlay for one recognized page.
+
+        :param pno: 0-based page index.
+        :param items: OCR items in the page's render pixels.
+        """
+        result_items, page_dpi = self._page_outputs(pno, items)
+        self._write_results((pno, result_items))
+        self.writer.apply_and_save(pno, items, sink=self.sink, dpi=page_dpi)
+
+    def _overlay_done(self, items: List[Dict[str, Any]]) -> None:
+        """Discharge a page from the governor's overlay stage once its text layer is applied."""
+        if self.governor is not None:
+            self.governor.discharge(STAGE_OVERLAY, MemoryGovernor.items_nbytes(items))
+
+    def _run_serial(self) -> None:
+        """Pull pages through render → OCR → write → overlay on the calling thread."""
+        for pno, items in self._recognize(self.render_units(self.sink)):
+            self.handle_page(pno, items)
+            self._overlay_done(items)
+
+    def _run_concurrent(self) -> None:
+        """
+        Run render, OCR and result writing on their own threads, overlaying on the calling thread.
+
+        Stages are linked by bounded queues, so a slow stage throttles the ones upstream of it.
+        A failure in any stage cancels the others and is re-raised here.
+        """
+        cancel = threading.Event()
+        rendered = ThreadedStage(
+            self.render_units(self.sink),
+            depth=self.render_queue_depth, cancel=cancel, name="ocr-render", sink=self.sink,
+        )
+        recognized = ThreadedStage(
+            self._recognize(rendered),
+            depth=self.ocr_queue_depth, cancel=cancel, name="ocr-predict", sink=self.sink,
+        )
+        results = ThreadedConsumer(
+            self._write_results,
+            depth=self.result_queue_depth, cancel=cancel, name="ocr-results", sink=self.sink,
+        )
+        try:
+            for pno, items in recognized:
+                result_items, page_dpi = self._page_outputs(pno, items)
+                results.put((pno, result_items))
+                self.writer.apply_and_save(pno, items, sink=self.sink, dpi=page_dpi)
+                self._overlay_done(items)
+            results.finish()
+        finally:
+            cancel.set()
+            if self.governor is not None and self._owns_governor:
+                self.governor.close()
+            for stage in (results, recognized, rendered):
+                stage.join()
 
     def run(self) -> None:
         """
@@ -85,15 +604,67 @@ class OCRPipeline:
         :return: ``None``
         """
         total = len(self.page_indices)
-        self.sink.set_totals(render_total=total, ocr_total=total, overlay_total=total)
+        ocr_total = sum(self.tile_counts.values()) if self.max_tile_pixels else total
+        self.sink.set_totals(render_total=total, ocr_total=ocr_total, overlay_total=total)
+        if self.prescan:
+            self.sink.on_stats(self.prescan)
         try:
-            page_img_iter = self.streamer.iter_pages(self.page_indices, sink=self.sink)
-            for pno, items in self.ocr.stream(page_img_iter, batch_size=self.batch_size, sink=self.sink):
-                self.csvw.write_page(pno + 1, items)
-                self.ndjw.write_page(pno + 1, items)
-                self.writer.apply_and_save(pno, items, sink=self.sink)
+            if self.concurrent:
+                self._run_concurrent()
+            else:
+                self._run_serial()
+            self.finish()
         finally:
-            self.csvw.close()
-            self.ndjw.close()
-            self.writer.close()
-            self.sink.close()
+            self.close()
+
+    def finish(self) -> None:
+        """Make the outputs final after the last page and report run statistics."""
+        self.writer.finalize(self.sink)
+        if self.debug_visible:
+            self._render_debug()
+        if self.blank is not None:
+            self.sink.on_stats(self.blank.stats())
+        if self.preprocessor is not None:
+            self.sink.on_stats(self.preprocessor.stats())
+        if self.cache is not None:
+            self.sink.on_stats(self.cache.stats())
+        if self.buffer_pool is not None:
+            self.sink.on_stats(self.buffer_pool.stats())
+        if self.governor is not None and self._owns_governor:
+            self.sink.on_stats(self.governor.stats())
+        engine_stats = self.ocr.stats() if self._owns_ocr else {}
+        if engine_stats:
+            self.sink.on_stats(engine_stats)
+
+    def _render_debug(self) -> None:
+        """Render the visible debug PDF from this run's stored results, covering resumed sessions too."""
+        self.storew.flush()
+        self.ndjw.flush()
+        pages = select_debug_pages(self.input_pdf, pages=self.debug_pages)
+        wanted = {i + 1 for i in pages} if pages is not None else None
+        if self.save_store:
+            results = iter_store_pages(self.save_store, wanted)
+        else:
+            results = iter_ndjson_pages(self.save_ndjson, wanted)
+        self.sink.on_stats(render_debug_pdf(
+            self.input_pdf,
+            debug_path(self.output_pdf),
+            results,
+            pages=pages,
+            dpi=self.dpi,
+            font_path=self.font_path,
+            subset_fonts=self.subset_fonts,
+        ))
+
+    def close(self) -> None:
+        """Close all outputs, the owned engine and the sink. Pending pages are committed, not finalized."""
+        self.csvw.close()
+        self.ndjw.close()
+        self.storew.close()
+        self.indexw.close()
+        self.writer.close()
+        if self._owns_ocr:
+            self.ocr.close()
+        if self.journal is not None:
+            self.journal.close()
+        self.sink.close()
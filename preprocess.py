@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pdf_streamer import PageBufferPool
+
+Transform = Tuple[float, float, float, float]
+
+_IDENTITY: Transform = (0.0, 0.0, 1.0, 1.0)
+
+
+class PagePreprocessor:
+    """
+    Shrink page images before OCR with a few whole-array NumPy passes.
+
+    Scanner borders and blank margins are cropped away, the image is optionally flattened to luma and
+    contrast-stretched, and its longest side is capped. Every step is recorded in a :data:`Transform`
+    ``(x_offset, y_offset, x_scale, y_scale)``, so items recognized on the output map back to the input
+    with :meth:`restore`: ``x_in = x_out / x_scale + x_offset``. Border and margin detection runs on a
+    strided view, so its cost is independent of DPI.
+    """
+
+    def __init__(
+            self,
+            crop_margins: bool = True,
+            to_gray: bool = False,
+            normalize_contrast: bool = False,
+            max_side: int = 0,
+            margin_px: int = 24,
+            ink_delta: int = 64,
+            border_ratio: float = 0.6,
+            sample_side: int = 1024
+    ) -> None:
+        """
+        Configure the steps.
+
+        :param crop_margins: Crop dark scanner borders and blank margins around the content.
+        :param to_gray: Replace the colour channels of RGB images by their luma, removing colour noise
+            while keeping the three-channel layout OCR backends expect.
+        :param normalize_contrast: Stretch luma so the ink level becomes black and the paper level white.
+        :param max_side: Downscale images whose longest side exceeds this many pixels; ``0`` disables the cap.
+        :param margin_px: Blank padding kept around the detected content, in input pixels.
+        :param ink_delta: A pixel is ink if it is this much darker than the median (paper) level.
+        :param border_ratio: Edge rows/columns with more ink than this fraction are scanner border.
+        :param sample_side: Approximate longest side of the strided sample used for detection, in pixels.
+        """
+        self.crop_margins = crop_margins
+        self.to_gray = to_gray
+        self.normalize_contrast = normalize_contrast
+        self.max_side = max(0, max_side)
+        self.margin_px = max(0, margin_px)
+        self.ink_delta = ink_delta
+        self.border_ratio = border_ratio
+        self.sample_side = max(16, sample_side)
+        self.pages = 0
+        self.pixels_in = 0
+        self.pixels_out = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _luma(img: np.ndarray) -> np.ndarray:
+        """Rec. 601 luma of an RGB ``uint8`` image as ``uint8``; single-channel images are returned as is."""
+        if img.ndim == 2:
+            return img
+        y = img[..., 0].astype(np.uint16) * 77
+        y += img[..., 1].astype(np.uint16) * 150
+        y += img[..., 2].astype(np.uint16) * 29
+        return (y >> 8).astype(np.uint8)
+
+    def _sample(self, img: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Strided luma sample of ``img`` and its stride."""
+        step = max(1, max(img.shape[0], img.shape[1]) // self.sample_side)
+        return self._luma(img[::step, ::step]), step
+
+    @staticmethod
+    def _edge_run(frac: np.ndarray, limit: float) -> Tuple[int, int]:
+        """Length of the leading and trailing runs of ``frac`` above ``limit``."""
+        inside = np.flatnonzero(frac <= limit)
+        if not inside.size:
+            return 0, 0
+        return int(inside[0]), int(len(frac) - 1 - inside[-1])
+
+    def content_box(self, img: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Find the region worth OCR: inside any scanner border, around the ink, plus ``margin_px``.
+
+        :param img: ``uint8`` image of shape ``(H, W)`` or ``(H, W, C)``.
+        :return: ``(x0, y0, x1, y1)`` in input pixels; the area inside the border if it holds no ink, or ``None``
+            if there is neither border nor ink.
+        """
+        small, step = self._sample(img)
+        dark = small < float(np.median(small)) - self.ink_delta
+        top, bottom = self._edge_run(dark.mean(axis=1), self.border_ratio)
+        left, right = self._edge_run(dark.mean(axis=0), self.border_ratio)
+        sh, sw = dark.shape
+        inner = dark[top:sh - bottom, left:sw - right]
+        rows = np.flatnonzero(inner.any(axis=1))
+        cols = np.flatnonzero(inner.any(axis=0))
+        h, w = img.shape[:2]
+        bx0, by0 = left * step, top * step
+        bx1, by1 = min(w, (sw - right) * step), min(h, (sh - bottom) * step)
+        if not rows.size or not cols.size:
+            if not inner.size or not (top or bottom or left or right):
+                return None
+            return bx0, by0, bx1, by1
+        pad = self.margin_px + step
+        return (
+            max(bx0, (left + int(cols[0])) * step - pad),
+            max(by0, (top + int(rows[0])) * step - pad),
+            min(bx1, (left + int(cols[-1]) + 1) * step + pad),
+            min(by1, (top + int(rows[-1]) + 1) * step + pad),
+        )
+
+    @staticmethod
+    def _axis_weights(n_in: int, n_out: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Bilinear source indices and weights for resampling an axis of ``n_in`` to ``n_out`` samples."""
+        pos = np.clip((np.arange(n_out, dtype=np.float32) + 0.5) * (n_in / n_out) - 0.5, 0, n_in - 1)
+        i0 = pos.astype(np.intp)
+        return i0, np.minimum(i0 + 1, n_in - 1), pos - i0
+
+    @classmethod
+    def resize(cls, img: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+        """
+        Downscale an image: box-average by the integer part of the factor, then resample bilinearly.
+
+        :param img: ``uint8`` image of shape ``(H, W)`` or ``(H, W, C)``.
+        :param out_h: Output height.
+        :param out_w: Output width.
+        :return: ``uint8`` image of shape ``(out_h, out_w[, C])``.
+        """
+        h, w = img.shape[:2]
+        k = max(1, min(h // out_h, w // out_w))
+        src: np.ndarray = img
+        if k > 1:
+            hh, ww = h // k, w // k
+            src = img[:hh * k, :ww * k].reshape(hh, k, ww, k, *img.shape[2:]).mean(axis=(1, 3), dtype=np.float32)
+        y0, y1, wy = cls._axis_weights(src.shape[0], out_h)
+        x0, x1, wx = cls._axis_weights(src.shape[1], out_w)
+        extra = (None,) * (img.ndim - 2)
+        wy = wy[(slice(None), None) + extra]
+        wx = wx[(slice(None),) + extra]
+        rows = src[y0].astype(np.float32) * (1 - wy) + src[y1].astype(np.float32) * wy
+        out = rows[:, x0] * (1 - wx) + rows[:, x1] * wx
+        return np.rint(out).astype(np.uint8)
+
+    def _contrast_lut(self, img: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Lookup table mapping the ink level of ``img`` to black and its paper level to white.
+
+        Paper is the 95th luma percentile and ink the 5th percentile of the pixels at least ``ink_delta``
+        darker, so sparse text on a large page still sets the dark end.
+
+        :param img: ``uint8`` image.
+        :return: ``uint8`` table of 256 entries, or ``None`` if the image has no ink or is already full range.
+        """
+        small, _ = self._sample(img)
+        hi = float(np.percentile(small, 95))
+        ink = small[small < hi - self.ink_delta]
+        if not ink.size:
+            return None
+        lo = float(np.percentile(ink, 5))
+        if lo <= 2 and hi >= 253:
+            return None
+        ramp = (np.arange(256, dtype=np.float32) - lo) * (255.0 / (hi - lo))
+        return np.clip(np.rint(ramp), 0, 255).astype(np.uint8)
+
+    def apply(self, img: np.ndarray, pool: Optional[PageBufferPool] = None) -> Tuple[np.ndarray, Transform]:
+        """
+        Preprocess one page or tile image.
+
+        :param img: ``uint8`` image of shape ``(H, W)`` or ``(H, W, 3)``.
+        :param pool: Optional buffer pool providing the output array.
+        :return: ``(image, transform)``; ``image`` is ``img`` itself if no step changed it, otherwise a new
+            C-contiguous array the caller owns.
+        """
+        h, w = img.shape[:2]
+        out = img
+        x0 = y0 = 0
+        if self.crop_margins:
+            box = self.content_box(img)
+            if box is not None and box != (0, 0, w, h):
+                x0, y0, x1, y1 = box
+                out = img[y0:y1, x0:x1]
+        ch, cw = out.shape[:2]
+        sx = sy = 1.0
+        if self.max_side and max(ch, cw) > self.max_side:
+            f = self.max_side / max(ch, cw)
+            oh, ow = max(1, math.floor(ch * f)), max(1, math.floor(cw * f))
+            out = self.resize(out, oh, ow)
+            sy, sx = oh / ch, ow / cw
+        lut = self._contrast_lut(out) if self.normalize_contrast else None
+        gray = self.to_gray and out.ndim == 3
+        if out is not img or lut is not None or gray:
+            dst = pool.acquire(out.shape) if pool is not None else np.empty(out.shape, dtype=np.uint8)
+            if gray:
+                y = self._luma(out)
+                dst[...] = (np.take(lut, y) if lut is not None else y)[..., None]
+            elif lut is not None:
+                np.take(lut, out, out=dst)
+            else:
+                np.copyto(dst, out)
+            out = dst
+        with self._lock:
+            self.pages += 1
+            self.pixels_in += h * w
+            self.pixels_out += out.shape[0] * out.shape[1]
+        return out, (float(x0), float(y0), sx, sy)
+
+    @staticmethod
+    def restore(items: List[Dict[str, Any]], transform: Transform) -> List[Dict[str, Any]]:
+        """
+        Map item polygons from a preprocessed image back to the image it was made from.
+
+        :param items: OCR items on the preprocessed image.
+        :param transform: Transform returned by :meth:`apply`.
+        :return: ``items`` itself for the identity transform, otherwise mapped copies.
+        """
+        if transform == _IDENTITY:
+            return items
+        ox, oy, sx, sy = transform
+        return [
+            dict(it, poly=[[float(x) / sx + ox, float(y) / sy + oy] for x, y in it["poly"]])
+            if it.get("poly") is not None else it
+            for it in items
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return pixel counters for the progress sink.
+
+        :return: ``pre_mpx_in``, ``pre_mpx_out`` and the fraction of pixels removed, ``pre_pixels_saved``.
+        """
+        return {
+            "pre_mpx_in": round(self.pixels_in / 1e6, 1),
+            "pre_mpx_out": round(self.pixels_out / 1e6, 1),
+            "pre_pixels_saved": round(1 - self.pixels_out / self.pixels_in, 3) if self.pixels_in else 0.0,
+        }
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from contextlib import AbstractContextManager
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from tqdm import tqdm
 
@@ -58,6 +58,26 @@ class ProgressSink(ABC):
         """
         raise NotImplementedError
 
+    def on_stats(self, stats: Dict[str, Any]) -> None:
+        """
+        Receive run statistics such as cache hit counts. Ignored by default.
+
+        :param stats: Mapping of counter name to value.
+        """
+
+    def on_timing(self, stage: str, seconds: float, *, pages: int = 1, nbytes: int = 0, items: int = 0) -> None:
+        """
+        Receive one timed event, e.g. a page render, an OCR batch or a queue wait. Ignored by default.
+
+        May be called from several threads; implementations must be thread-safe and cheap.
+
+        :param stage: Event name such as ``"render"``, ``"predict"``, ``"overlay"``, ``"save"`` or ``"wait:<queue>"``.
+        :param seconds: Duration of the event.
+        :param pages: Pages covered by the event.
+        :param nbytes: Bytes produced, e.g. rendered image size.
+        :param items: OCR items involved.
+        """
+
     @abstractmethod
     def close(self) -> None:
         """Finalize the progress sink."""
@@ -75,6 +95,7 @@ class TqdmProgressSink(ProgressSink, AbstractContextManager):
         self._bar_render: Optional[tqdm] = None
         self._bar_ocr: Optional[tqdm] = None
         self._bar_overlay: Optional[tqdm] = None
+        self._stats: Dict[str, Any] = {}
 
     def set_totals(
             self,
@@ -102,11 +123,83 @@ class TqdmProgressSink(ProgressSink, AbstractContextManager):
         if self._bar_overlay is not None:
             self._bar_overlay.update(n)
 
+    def on_stats(self, stats: Dict[str, Any]) -> None:
+        self._stats.update(stats)
+
     def close(self) -> None:
         for b in (self._bar_render, self._bar_ocr, self._bar_overlay):
             if b is not None:
                 b.close()
+        if self._stats:
+            tqdm.write(" ".join(f"{k}={v}" for k, v in self._stats.items()))
+            self._stats = {}
 
     def __exit__(self, exc_type, exc, tb):
         self.close()
         return False
+
+
+class NullProgressSink(ProgressSink):
+    """Progress sink that discards all updates, e.g. for documents inside a batch run."""
+
+    def set_totals(
+            self,
+            *,
+            render_total: Optional[int],
+            ocr_total: Optional[int],
+            overlay_total: Optional[int]
+    ) -> None:
+        pass
+
+    def on_render_advance(self, n: int = 1) -> None:
+        pass
+
+    def on_ocr_advance(self, n: int = 1) -> None:
+        pass
+
+    def on_overlay_advance(self, n: int = 1) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TeeProgressSink(ProgressSink):
+    """Forward every progress event to several sinks, e.g. tqdm bars plus a metrics exporter."""
+
+    def __init__(self, *sinks: ProgressSink) -> None:
+        self.sinks = sinks
+
+    def set_totals(
+            self,
+            *,
+            render_total: Optional[int],
+            ocr_total: Optional[int],
+            overlay_total: Optional[int]
+    ) -> None:
+        for s in self.sinks:
+            s.set_totals(render_total=render_total, ocr_total=ocr_total, overlay_total=overlay_total)
+
+    def on_render_advance(self, n: int = 1) -> None:
+        for s in self.sinks:
+            s.on_render_advance(n)
+
+    def on_ocr_advance(self, n: int = 1) -> None:
+        for s in self.sinks:
+            s.on_ocr_advance(n)
+
+    def on_overlay_advance(self, n: int = 1) -> None:
+        for s in self.sinks:
+            s.on_overlay_advance(n)
+
+    def on_stats(self, stats: Dict[str, Any]) -> None:
+        for s in self.sinks:
+            s.on_stats(stats)
+
+    def on_timing(self, stage: str, seconds: float, *, pages: int = 1, nbytes: int = 0, items: int = 0) -> None:
+        for s in self.sinks:
+            s.on_timing(stage, seconds, pages=pages, nbytes=nbytes, items=items)
+
+    def close(self) -> None:
+        for s in self.sinks:
+            s.close()
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from result_writers import CsvStreamWriter, NdjsonStreamWriter
+
+FILE_MAGIC = b"OCRCOLS1"
+PAGE_MAGIC = b"PAGE"
+INDEX_MAGIC = b"OCRCIDX1"
+
+_PAGE_HEADER = struct.Struct("<4sIIII4x")
+_TRAILER = struct.Struct("<QQ8s")
+
+
+def _pad8(n: int) -> int:
+    return -n % 8
+
+
+def _page_columns(items: List[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+    """
+    Convert one page of OCR items into typed column arrays.
+
+    :param items: OCR items with ``poly``, ``score`` and ``text``.
+    :return: ``(bbox, score, poly_start, points, text_start, text_blob)``; the blob is ``bytes`` and items
+        without a polygon get a NaN box.
+    """
+    n = len(items)
+    counts = np.fromiter((len(it.get("poly") or ()) for it in items), dtype=np.uint32, count=n)
+    poly_start = np.zeros(n + 1, dtype=np.uint32)
+    np.cumsum(counts, out=poly_start[1:])
+    points = np.array(
+        [p for it in items for p in (it.get("poly") or ())], dtype=np.float32
+    ).reshape(-1, 2)
+    bbox = np.full((n, 4), np.nan, dtype=np.float32)
+    has = counts > 0
+    if has.any():
+        starts = poly_start[:-1][has]
+        bbox[has, 0:2] = np.minimum.reduceat(points, starts, axis=0)
+        bbox[has, 2:4] = np.maximum.reduceat(points, starts, axis=0)
+    score = np.fromiter((float(it.get("score", 0.0)) for it in items), dtype=np.float32, count=n)
+    texts = [(it.get("text") or "").encode("utf-8") for it in items]
+    text_start = np.zeros(n + 1, dtype=np.uint32)
+    np.cumsum(np.fromiter((len(t) for t in texts), dtype=np.uint32, count=n), out=text_start[1:])
+    return bbox, score, poly_start, points, text_start, b"".join(texts)
+
+
+class ColumnarStreamWriter:
+    """
+    Streaming writer for the columnar binary result store.
+
+    Every page becomes one self-contained row group: a small header, then typed columns for the item
+    boxes (``float32`` ``x0, y0, x1, y1``), scores, polygon points and UTF-8 text as offsets plus a blob.
+    :meth:`close` appends a page index so :class:`ResultStoreReader` can jump straight to any page;
+    a store without an index, e.g. after a crash, is still readable by scanning its row groups.
+    """
+
+    def __init__(self, path: Optional[str], append: bool = False) -> None:
+        """
+        Initialize the writer.
+
+        :param path: Output store path. If ``None``, the writer is disabled.
+        :param append: Continue an existing store instead of truncating it; its page index is rewritten on close.
+        """
+        self.path = path
+        self.fp = None
+        self._index: List[Tuple[int, int, int]] = []
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if append and os.path.exists(path) and os.path.getsize(path) >= len(FILE_MAGIC):
+            end, self._index = _scan(path)
+            self.fp = open(path, "r+b")
+            self.fp.truncate(end)
+            self.fp.seek(end)
+        else:
+            self.fp = open(path, "wb")
+            self.fp.write(FILE_MAGIC)
+
+    def write_page(self, page_no_one_based: int, items: List[Dict[str, Any]]) -> None:
+        """
+        Append a page worth of results as one row group.
+
+        :param page_no_one_based: Human-readable page number starting at 1.
+        :param items: OCR items for the page.
+        """
+        if not self.fp:
+            return
+        bbox, score, poly_start, points, text_start, blob = _page_columns(items)
+        offset = self.fp.tell()
+        self.fp.write(_PAGE_HEADER.pack(PAGE_MAGIC, page_no_one_based, len(items), len(points), len(blob)))
+        for col in (bbox, score, poly_start, points, text_start):
+            self.fp.write(col.astype(col.dtype.newbyteorder("<"), copy=False).tobytes())
+        self.fp.write(blob)
+        self.fp.write(b"\0" * _pad8(len(blob)))
+        self._index.append((page_no_one_based, offset, len(items)))
+
+    def flush(self) -> None:
+        """Write buffered row groups through to the file so readers see them."""
+        if self.fp:
+            self.fp.flush()
+
+    def offset(self) -> Optional[int]:
+        """
+        Flush buffered row groups and return the file size.
+
+        :return: Size in bytes, or ``None`` if the writer is disabled.
+        """
+        if not self.fp:
+            return None
+        self.flush()
+        return os.fstat(self.fp.fileno()).st_size
+
+    def close(self) -> None:
+        """Append the page index and close the file."""
+        if not self.fp:
+            return
+        index_at = self.fp.tell()
+        idx = np.array(self._index, dtype=np.int64).reshape(-1, 3)
+        self.fp.write(idx.astype("<i8").tobytes())
+        self.fp.write(_TRAILER.pack(index_at, len(idx), INDEX_MAGIC))
+        self.fp.close()
+        self.fp = None
+
+
+def _group_size(n: int, m: int, text_bytes: int) -> int:
+    """Bytes of a row group with ``n`` items, ``m`` polygon points and ``text_bytes`` of text."""
+    return _PAGE_HEADER.size + 16 * n + 4 * n + 4 * (n + 1) + 8 * m + 4 * (n + 1) + text_bytes + _pad8(text_bytes)
+
+
+def _scan(path: str) -> Tuple[int, List[Tuple[int, int, int]]]:
+    """
+    Locate the row groups of a store, from its page index if present, else by walking the file.
+
+    :param path: Store path.
+    :return: ``(end_of_row_groups, [(page_no, offset, items), ...])``.
+    :raises ValueError: If the file is not a result store.
+    """
+    with open(path, "rb") as fp:
+        if fp.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"not a result store: {path}")
+        size = os.fstat(fp.fileno()).st_size
+        if size >= len(FILE_MAGIC) + _TRAILER.size:
+            fp.seek(size - _TRAILER.size)
+            index_at, pages, magic = _TRAILER.unpack(fp.read(_TRAILER.size))
+            if magic == INDEX_MAGIC and index_at + 24 * pages + _TRAILER.size == size:
+                fp.seek(index_at)
+                idx = np.frombuffer(fp.read(24 * pages), dtype="<i8").reshape(-1, 3)
+                return index_at, [tuple(int(v) for v in row) for row in idx]
+        index: List[Tuple[int, int, int]] = []
+        offset = len(FILE_MAGIC)
+        while offset + _PAGE_HEADER.size <= size:
+            fp.seek(offset)
+            magic, page_no, n, m, text_bytes = _PAGE_HEADER.unpack(fp.read(_PAGE_HEADER.size))
+            end = offset + _group_size(n, m, text_bytes)
+            if magic != PAGE_MAGIC or end > size:
+                break
+            index.append((page_no, offset, n))
+            offset = end
+        return offset, index
+
+
+class ResultStoreReader:
+    """
+    Memory-mapped random access to a columnar result store.
+
+    Column arrays returned by :meth:`page_columns` are zero-copy views into the mapping and stay valid
+    until :meth:`close`. When a page was written more than once, the last row group wins.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open and map a store.
+
+        :param path: Store path.
+        :raises ValueError: If the file is not a result store.
+        """
+        self.path = path
+        _, index = _scan(path)
+        self._groups: Dict[int, int] = {page_no: offset for page_no, offset, _ in index}
+        self._fp = open(path, "rb")
+        self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def pages(self) -> List[int]:
+        """Stored 1-based page numbers, ascending."""
+        return sorted(self._groups)
+
+    def __contains__(self, page_no_one_based: int) -> bool:
+        return page_no_one_based in self._groups
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def page_columns(self, page_no_one_based: int) -> Dict[str, Any]:
+        """
+        Return the typed columns of one page.
+
+        :param page_no_one_based: Page number starting at 1.
+        :return: ``bbox`` ``(N, 4)``, ``score`` ``(N,)``, ``poly_start`` ``(N + 1,)``, ``points`` ``(M, 2)``,
+            ``text_start`` ``(N + 1,)`` and the ``text`` blob as a memoryview.
+        :raises KeyError: If the page is not stored.
+        """
+        offset = self._groups[page_no_one_based]
+        _, _, n, m, text_bytes = _PAGE_HEADER.unpack_from(self._mm, offset)
+        pos = offset + _PAGE_HEADER.size
+        cols: Dict[str, Any] = {}
+        for name, dtype, shape in (
+                ("bbox", "<f4", (n, 4)),
+                ("score", "<f4", (n,)),
+                ("poly_start", "<u4", (n + 1,)),
+                ("points", "<f4", (m, 2)),
+                ("text_start", "<u4", (n + 1,)),
+        ):
+            count = int(np.prod(shape))
+            cols[name] = np.frombuffer(self._mm, dtype=dtype, count=count, offset=pos).reshape(shape)
+            pos += count * 4
+        cols["text"] = memoryview(self._mm)[pos:pos + text_bytes]
+        return cols
+
+    def page_items(self, page_no_one_based: int) -> List[Dict[str, Any]]:
+        """
+        Return one page as OCR items, shaped like the pipeline's in-memory results.
+
+        :param page_no_one_based: Page number starting at 1.
+        :return: Items with ``text``, ``score`` and ``poly``.
+        :raises KeyError: If the page is not stored.
+        """
+        cols = self.page_columns(page_no_one_based)
+        ps, ts, points, blob = cols["poly_start"], cols["text_start"], cols["points"], cols["text"]
+        return [
+            {
+                "text": bytes(blob[ts[i]:ts[i + 1]]).decode("utf-8"),
+                "score": round(float(cols["score"][i]), 6),
+                "poly": points[ps[i]:ps[i + 1]].tolist(),
+            }
+            for i in range(len(cols["score"]))
+        ]
+
+    def iter_pages(self) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yield every stored page in page order.
+
+        :yield: ``(page_no_one_based, items)``.
+        """
+        for page_no in self.pages:
+            yield page_no, self.page_items(page_no)
+
+    def close(self) -> None:
+        """Unmap and close the store."""
+        self._mm.close()
+        self._fp.close()
+
+    def __enter__(self) -> "ResultStoreReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def store_to_csv(store_path: str, csv_path: str) -> int:
+    """
+    Convert a result store to the CSV format of :class:`CsvStreamWriter`.
+
+    :param store_path: Store path.
+    :param csv_path: Output CSV path.
+    :return: Number of pages written.
+    """
+    with ResultStoreReader(store_path) as store:
+        w = CsvStreamWriter(csv_path)
+        try:
+            for page_no, items in store.iter_pages():
+                w.write_page(page_no, items)
+        finally:
+            w.close()
+        return len(store)
+
+
+def store_to_ndjson(store_path: str, ndjson_path: str) -> int:
+    """
+    Convert a result store to the NDJSON format of :class:`NdjsonStreamWriter`.
+
+    :param store_path: Store path.
+    :param ndjson_path: Output NDJSON path.
+    :return: Number of pages written.
+    """
+    with ResultStoreReader(store_path) as store:
+        w = NdjsonStreamWriter(ndjson_path)
+        try:
+            for page_no, items in store.iter_pages():
+                w.write_page(page_no, items)
+        finally:
+            w.close()
+        return len(store)
+
+
+def main() -> None:
+    """CLI entrypoint: convert a result store to CSV and/or NDJSON."""
+    p = argparse.ArgumentParser(description="Convert a columnar OCR result store to CSV/NDJSON")
+    p.add_argument("store", type=str)
+    p.add_argument("--to-csv", type=str, default=None)
+    p.add_argument("--to-ndjson", type=str, default=None)
+    args = p.parse_args()
+    if not args.to_csv and not args.to_ndjson:
+        p.error("give --to-csv and/or --to-ndjson")
+    if args.to_csv:
+        print(f"{store_to_csv(args.store, args.to_csv)} pages -> {args.to_csv}")
+    if args.to_ndjson:
+        print(f"{store_to_ndjson(args.store, args.to_ndjson)} pages -> {args.to_ndjson}")
+
+
+if __name__ == "__main__":
+    main()
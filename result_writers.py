@@ -13,20 +13,22 @@ class CsvStreamWriter:
     Writes one row per OCR item as pages are processed.
     """
 
-    def __init__(self, path: Optional[str]) -> None:
+    def __init__(self, path: Optional[str], append: bool = False) -> None:
         """
         Initialize the writer.
 
         :param path: Output CSV path. If ``None``, the writer is disabled.
+        :param append: Continue an existing file instead of truncating it.
         """
         self.path = path
         self.fp = None
         self.w = None
         if path:
             os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-            self.fp = open(path, "w", newline="", encoding="utf-8")
+            self.fp = open(path, "a" if append else "w", newline="", encoding="utf-8")
             self.w = csv.writer(self.fp)
-            self.w.writerow(["page", "x0", "y0", "x1", "y1", "score", "text"])
+            if self.fp.tell() == 0:
+                self.w.writerow(["page", "x0", "y0", "x1", "y1", "score", "text"])
 
     def write_page(self, page_no_one_based: int, items: List[Dict[str, Any]]) -> None:
         """
@@ -47,6 +49,22 @@ class CsvStreamWriter:
                 x0 = y0 = x1 = y1 = ""
             self.w.writerow([page_no_one_based, x0, y0, x1, y1, float(it.get("score", 0.0)), it.get("text")])
 
+    def flush(self) -> None:
+        """Write buffered rows through to the file so readers see them."""
+        if self.fp:
+            self.fp.flush()
+
+    def offset(self) -> Optional[int]:
+        """
+        Flush buffered rows and return the file size.
+
+        :return: Size in bytes, or ``None`` if the writer is disabled.
+        """
+        if not self.fp:
+            return None
+        self.flush()
+        return os.fstat(self.fp.fileno()).st_size
+
     def close(self) -> None:
         """Close the underlying file handle."""
         if self.fp:
@@ -60,17 +78,18 @@ class NdjsonStreamWriter:
     Emits one JSON object per line for each OCR item.
     """
 
-    def __init__(self, path: Optional[str]) -> None:
+    def __init__(self, path: Optional[str], append: bool = False) -> None:
         """
         Initialize the writer.
 
         :param path: Output NDJSON path. If ``None``, the writer is disabled.
+        :param append: Continue an existing file instead of truncating it.
         """
         self.path = path
         self.fp = None
         if path:
             os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-            self.fp = open(path, "w", encoding="utf-8")
+            self.fp = open(path, "a" if append else "w", encoding="utf-8")
 
     def write_page(self, page_no_one_based: int, items: List[Dict[str, Any]]) -> None:
         """
@@ -90,6 +109,22 @@ class NdjsonStreamWriter:
             }
             self.fp.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
+    def flush(self) -> None:
+        """Write buffered rows through to the file so readers see them."""
+        if self.fp:
+            self.fp.flush()
+
+    def offset(self) -> Optional[int]:
+        """
+        Flush buffered rows and return the file size.
+
+        :return: Size in bytes, or ``None`` if the writer is disabled.
+        """
+        if not self.fp:
+            return None
+        self.flush()
+        return os.fstat(self.fp.fileno()).st_size
+
     def close(self) -> None:
         """Close the underlying file handle."""
         if self.fp:
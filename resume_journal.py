@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set
+
+
+class ResumeJournal:
+    """
+    Append-only record of pages whose result rows are on disk.
+
+    Each record stores the result file sizes at the moment it was written, so a restart can truncate the
+    CSV/NDJSON/result store files back to the last consistent point and continue appending from there.
+    The output PDF is never truncated: MuPDF rewrites a document's whole incremental section on every
+    ``saveIncr``, so earlier sizes are not valid cut points. Which pages already carry their text layer is
+    read from the output PDF itself instead, see :meth:`overlay_writer.IncrementalOverlayWriter.marked_pages`.
+    The first line identifies the input PDF; a journal for another input, or result files shorter than
+    recorded, start a fresh run instead.
+    """
+
+    FILE_KEYS = ("csv", "ndjson", "store")
+
+    def __init__(self, path: str, input_pdf: str) -> None:
+        """
+        Bind the journal to its file and input PDF.
+
+        :param path: Journal file path.
+        :param input_pdf: Source PDF path the journal belongs to.
+        """
+        self.path = path
+        st = os.stat(input_pdf)
+        self._header = {"input": os.path.abspath(input_pdf), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        self.done: Set[int] = set()
+        self._offsets: Dict[str, Optional[int]] = {k: None for k in self.FILE_KEYS}
+        self._order: Deque[int] = deque()
+        self._results: Dict[int, Dict[str, Optional[int]]] = {}
+        self._lock = threading.Lock()
+        self._fp = None
+
+    def _load(self) -> bool:
+        """
+        Read an existing journal into ``done`` and the last recorded offsets.
+
+        :return: ``True`` if a journal for this input was found.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as fp:
+            lines = fp.read().splitlines()
+        if not lines:
+            return False
+        try:
+            if json.loads(lines[0]) != self._header:
+                return False
+        except ValueError:
+            return False
+        for line in lines[1:]:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            if rec.get("page") is not None:
+                self.done.add(int(rec["page"]))
+            for k in self.FILE_KEYS:
+                self._offsets[k] = rec.get(k)
+        return True
+
+    def recorded_pages(self) -> Set[int]:
+        """
+        Read the pages an existing journal for this input records as done, without opening it for writing.
+
+        :return: 0-based page indices; empty if there is no matching journal.
+        """
+        if not self._load():
+            return set()
+        return set(self.done)
+
+    def _restore(self, files: Dict[str, Optional[str]]) -> bool:
+        """
+        Truncate result files back to the last recorded offsets.
+
+        :param files: Output paths keyed like :attr:`FILE_KEYS`; ``None`` for disabled outputs.
+        :return: ``False`` if a result file is missing or shorter than recorded.
+        """
+        for k, path in files.items():
+            off = self._offsets.get(k)
+            if not path or off is None:
+                continue
+            if not os.path.exists(path) or os.path.getsize(path) < off:
+                return False
+        for k, path in files.items():
+            off = self._offsets.get(k)
+            if path and off is not None and os.path.getsize(path) > off:
+                with open(path, "r+b") as fp:
+                    fp.truncate(off)
+        return True
+
+    def open(self, files: Dict[str, Optional[str]]) -> bool:
+        """
+        Load a matching journal and roll result files back to it, or start a fresh one.
+
+        :param files: Result file paths keyed like :attr:`FILE_KEYS`; ``None`` for disabled outputs.
+        :return: ``True`` if resuming from an existing journal; the output PDF is then kept as it is.
+        """
+        resumed = self._load() and self._restore(files)
+        if resumed:
+            self._fp = open(self.path, "a", encoding="utf-8")
+        else:
+            self.done.clear()
+            self._offsets = {k: None for k in self.FILE_KEYS}
+            self._fp = open(self.path, "w", encoding="utf-8")
+            self._append(self._header)
+        return resumed
+
+    def expect(self, pages: Iterable[int]) -> None:
+        """
+        Declare the processing order of the pages still to run.
+
+        :param pages: 0-based page indices in the order their results will be written.
+        """
+        with self._lock:
+            self._order.extend(pages)
+
+    def _append(self, rec: Dict) -> None:
+        self._fp.write(json.dumps(rec) + "\n")
+        self._fp.flush()
+
+    def _drain(self) -> None:
+        """Record every leading page whose results are on disk, keeping records in file order."""
+        while self._order and self._order[0] in self._results:
+            pno = self._order.popleft()
+            rec = {"page": pno}
+            rec.update(self._results.pop(pno))
+            self._append(rec)
+            self.done.add(pno)
+            for k in self.FILE_KEYS:
+                self._offsets[k] = rec.get(k)
+
+    def mark_results(self, page_no: int, offsets: Dict[str, Optional[int]]) -> None:
+        """
+        Note that a page's CSV/NDJSON rows and result store row group were flushed.
+
+        :param page_no: 0-based page index.
+        :param offsets: ``csv``/``ndjson``/``store`` file sizes right after the page was written.
+        """
+        with self._lock:
+            self._results[page_no] = dict(offsets)
+            self._drain()
+
+    def checkpoint(self, offsets: Dict[str, Optional[int]]) -> None:
+        """
+        Record current result file sizes without any page, e.g. at the start of a resumed session.
+
+        :param offsets: File sizes keyed like :attr:`FILE_KEYS`.
+        """
+        with self._lock:
+            self._offsets.update(offsets)
+            self._append(dict(self._offsets))
+
+    def close(self) -> None:
+        """Close the journal file."""
+        if self._fp:
+            self._fp.close()
+            self._fp = None
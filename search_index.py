@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+_CJK_RUN = re.compile("[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS boxes (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL REFERENCES docs(id),
+    page INTEGER NOT NULL,
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    score REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS boxes_doc_page ON boxes(doc_id, page);
+CREATE VIRTUAL TABLE IF NOT EXISTS box_fts USING fts5(tokens, tokenize='unicode61 remove_diacritics 2');
+"""
+
+
+def tokenize(text: str, query: bool = False) -> str:
+    """
+    Rewrite text into the token stream stored in the full-text index.
+
+    Runs of Hangul, kana and CJK ideographs become overlapping character bigrams, since these scripts
+    have no reliable word boundaries and Korean particles attach to the word they follow; a lone
+    character stays a unigram. Indexed runs also end with their last character as a unigram, so a
+    one-character prefix query finds it. Everything else is left for SQLite's ``unicode61`` tokenizer.
+
+    :param text: OCR text.
+    :param query: Tokenize a query term, without the trailing unigrams.
+    :return: Space-separated tokens, e.g. ``"서울시청 A동"`` becomes ``"서울 울시 시청 청 A 동"``.
+    """
+    out: List[str] = []
+    pos = 0
+    for m in _CJK_RUN.finditer(text):
+        out.append(text[pos:m.start()])
+        run = m.group()
+        pos = m.end()
+        if len(run) == 1:
+            out.append(run)
+            continue
+        out.append(" ".join(run[i:i + 2] for i in range(len(run) - 1)))
+        if not query:
+            out.append(run[-1])
+    out.append(text[pos:])
+    return " ".join(p for p in out if p and not p.isspace())
+
+
+def to_match_query(query: str) -> str:
+    """
+    Translate a user query into an FTS5 ``MATCH`` expression over :func:`tokenize` output.
+
+    Every whitespace-separated term must match as a phrase; a term ending in ``*`` or a single CJK
+    character matches as a prefix.
+
+    :param query: User query, e.g. ``"서울 계약서"``.
+    :return: FTS5 query string, empty if the query has no terms.
+    """
+    parts = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        tokens = tokenize(term, query=True)
+        if not tokens:
+            continue
+        phrase = '"' + tokens.replace('"', '""') + '"'
+        if prefix or (len(term) == 1 and _CJK_RUN.fullmatch(term)):
+            phrase += " *"
+        parts.append(phrase)
+    return " AND ".join(parts)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class SearchIndexWriter:
+    """
+    Incrementally add one document's OCR results to a shared SQLite FTS5 index.
+
+    Every page is committed on its own, so hits show up while a run is still going and concurrent
+    writers for other documents only wait for one page's transaction. Boxes are stored in PDF points.
+    """
+
+    def __init__(self, db_path: Optional[str], doc_path: str, dpi: int = 300, append: bool = False) -> None:
+        """
+        Initialize the writer.
+
+        :param db_path: Index database path. If ``None``, the writer is disabled.
+        :param doc_path: Document key, normally the input PDF path; stored as an absolute path.
+        :param dpi: DPI of the pixel coordinates passed to :meth:`write_page`.
+        :param append: Keep the document's existing entries; pages written again replace their old entries.
+            Otherwise the document is re-indexed from scratch.
+        """
+        self.db_path = db_path
+        self.scale = 72.0 / dpi
+        self.append = append
+        self.conn: Optional[sqlite3.Connection] = None
+        if not db_path:
+            return
+        self.conn = _connect(db_path)
+        path = os.path.abspath(doc_path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO docs(path, indexed_at) VALUES (?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET indexed_at = excluded.indexed_at",
+                (path, time.time()),
+            )
+            self.doc_id = self.conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()[0]
+            if not append:
+                self._delete("doc_id = ?", (self.doc_id,))
+
+    def _delete(self, where: str, args: tuple) -> None:
+        self.conn.execute(f"DELETE FROM box_fts WHERE rowid IN (SELECT id FROM boxes WHERE {where})", args)
+        self.conn.execute(f"DELETE FROM boxes WHERE {where}", args)
+
+    def write_page(self, page_no_one_based: int, items: List[Dict[str, Any]]) -> None:
+        """
+        Index a page worth of results.
+
+        :param page_no_one_based: Human-readable page number starting at 1.
+        :param items: OCR items for the page, with pixel polygons at the writer's ``dpi``.
+        """
+        if not self.conn:
+            return
+        rows = []
+        for it in items:
+            text = it.get("text") or ""
+            if not text.strip():
+                continue
+            poly = it.get("poly") or []
+            if poly:
+                xs = [float(p[0]) * self.scale for p in poly]
+                ys = [float(p[1]) * self.scale for p in poly]
+                box = (min(xs), min(ys), max(xs), max(ys))
+            else:
+                box = (None, None, None, None)
+            rows.append((text, box, float(it.get("score", 0.0))))
+        with self.conn:
+            if self.append:
+                self._delete("doc_id = ? AND page = ?", (self.doc_id, page_no_one_based))
+            for text, box, score in rows:
+                cur = self.conn.execute(
+                    "INSERT INTO boxes(doc_id, page, x0, y0, x1, y1, score, text) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.doc_id, page_no_one_based, *box, score, text),
+                )
+                self.conn.execute("INSERT INTO box_fts(rowid, tokens) VALUES (?, ?)", (cur.lastrowid, tokenize(text)))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+
+class SearchIndex:
+    """Ranked full-text queries over an index built by :class:`SearchIndexWriter`."""
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Open an index.
+
+        :param db_path: Index database path.
+        """
+        self.conn = _connect(db_path)
+
+    def search(self, query: str, limit: int = 20, doc: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find OCR boxes matching a query, best BM25 match first.
+
+        :param query: Whitespace-separated terms; see :func:`to_match_query`.
+        :param limit: Maximum number of hits.
+        :param doc: Restrict hits to this document path.
+        :return: Hits with ``doc``, 1-based ``page``, ``bbox`` in PDF points, ``text``, OCR ``score`` and ``rank``.
+        """
+        match = to_match_query(query)
+        if not match:
+            return []
+        if doc is None:
+            hits = "SELECT rowid, rank FROM box_fts WHERE box_fts MATCH ? ORDER BY rank LIMIT ?"
+            args: List[Any] = [match, limit]
+        else:
+            hits = (
+                "SELECT f.rowid, f.rank FROM box_fts f JOIN boxes b ON b.id = f.rowid "
+                "WHERE box_fts MATCH ? AND b.doc_id = (SELECT id FROM docs WHERE path = ?) ORDER BY f.rank LIMIT ?"
+            )
+            args = [match, os.path.abspath(doc), limit]
+        sql = (
+            "SELECT d.path, b.page, b.x0, b.y0, b.x1, b.y1, b.text, b.score, h.rank "
+            f"FROM ({hits}) h JOIN boxes b ON b.id = h.rowid JOIN docs d ON d.id = b.doc_id ORDER BY h.rank"
+        )
+        return [
+            {
+                "doc": path,
+                "page": page,
+                "bbox": None if x0 is None else [x0, y0, x1, y1],
+                "text": text,
+                "score": score,
+                "rank": rank,
+            }
+            for path, page, x0, y0, x1, y1, text, score, rank in self.conn.execute(sql, args)
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return index size counters.
+
+        :return: Dictionary with ``index_docs`` and ``index_boxes``.
+        """
+        docs = self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        boxes = self.conn.execute("SELECT COUNT(*) FROM boxes").fetchone()[0]
+        return {"index_docs": docs, "index_boxes": boxes}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+
+def main() -> None:
+    """CLI entrypoint: query a search index."""
+    p = argparse.ArgumentParser(description="Search OCR text indexed with --index-db")
+    p.add_argument("db", type=str)
+    p.add_argument("query", type=str)
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--doc", type=str, default=None)
+    args = p.parse_args()
+    index = SearchIndex(args.db)
+    try:
+        t0 = time.perf_counter()
+        hits = index.search(args.query, limit=args.limit, doc=args.doc)
+        dt = time.perf_counter() - t0
+        for h in hits:
+            box = ",".join(f"{v:.1f}" for v in h["bbox"]) if h["bbox"] else "-"
+            print(f"{h['doc']}\tp{h['page']}\t{box}\t{h['text']}")
+        print(f"{len(hits)} hits in {dt * 1000:.1f} ms")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import json
+import os
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+import pymupdf
+from tqdm import tqdm
+
+from debug_overlay import debug_path, iter_store_pages, render_debug_pdf, select_debug_pages
+from overlay_writer import CommitPolicy, IncrementalOverlayWriter
+from pdf_streamer import PdfStreamer
+from pipeline import OCRPipeline, format_pages
+from progress import NullProgressSink, ProgressSink
+from result_store import ColumnarStreamWriter, ResultStoreReader
+from search_index import SearchIndexWriter
+
+
+def split_shards(page_indices: List[int], shards: int) -> List[List[int]]:
+    """
+    Split pages into contiguous, evenly sized shards.
+
+    :param page_indices: Sorted 0-based page indices.
+    :param shards: Number of shards.
+    :return: ``shards`` lists of pages in order; trailing shards are empty if there are fewer pages than shards.
+    """
+    shards = max(1, shards)
+    n = len(page_indices)
+    return [page_indices[i * n // shards:(i + 1) * n // shards] for i in range(shards)]
+
+
+def _run_shard_worker(sharded: "ShardedRun", index: int, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return sharded.run_shard(index, sink=NullProgressSink(), **kwargs)
+
+
+class ShardedRun:
+    """
+    Split one document into page-range shards that run independently and are merged into one output.
+
+    Every shard is an :class:`OCRPipeline` run over its pages that writes no PDF, only a result fragment
+    in ``shard_dir``: a columnar result store plus optional CSV/NDJSON, and a ``.done`` marker once it is
+    complete. Shards share nothing but the input PDF and ``shard_dir``, so they can run as local processes
+    or on separate nodes with shared storage. :meth:`merge` then overlays every fragment onto one copy of
+    the input and concatenates the CSV/NDJSON fragments in page order.
+    """
+
+    def __init__(
+            self,
+            input_pdf: str,
+            shard_dir: str,
+            shards: int,
+            *,
+            page_range: Optional[str] = None,
+            pages: Optional[str] = None,
+            page_step: int = 1
+    ) -> None:
+        """
+        Plan the shards. Every node must be given the same input and page selection.
+
+        :param input_pdf: Source PDF path.
+        :param shard_dir: Directory for the shard fragments.
+        :param shards: Number of shards.
+        :param page_range: Range filter like ``"10-50"``.
+        :param pages: Comma-separated 1-based selection list.
+        :param page_step: Sampling interval.
+        """
+        self.input_pdf = input_pdf
+        self.shard_dir = shard_dir
+        with pymupdf.open(input_pdf) as d:
+            total = d.page_count
+        selected = PdfStreamer.select_pages(total, page_range=page_range, pages=pages, step=page_step)
+        self.shards = split_shards(selected, shards)
+        st = os.stat(input_pdf)
+        self._input = {"input": os.path.abspath(input_pdf), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def paths(self, index: int) -> Dict[str, str]:
+        """
+        Fragment paths of one shard.
+
+        :param index: 0-based shard index.
+        :return: ``store``, ``csv``, ``ndjson``, ``journal`` and ``done`` paths.
+        """
+        base = os.path.join(self.shard_dir, f"shard-{index:04d}")
+        return {
+            "store": base + ".ocrs",
+            "csv": base + ".csv",
+            "ndjson": base + ".ndjson",
+            "journal": base + ".journal",
+            "done": base + ".done",
+        }
+
+    def _marker(self, index: int) -> Optional[Dict[str, Any]]:
+        """Read a shard's ``.done`` marker; ``None`` if it is missing or belongs to another run."""
+        path = self.paths(index)["done"]
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as fp:
+            marker = json.load(fp)
+        expected = dict(self._input, shard=index, shards=len(self.shards), pages=format_pages(self.shards[index]))
+        if any(marker.get(k) != v for k, v in expected.items()):
+            return None
+        return marker
+
+    def run_shard(
+            self,
+            index: int,
+            *,
+            save_csv: bool = False,
+            save_ndjson: bool = False,
+            resume: bool = False,
+            sink: Optional[ProgressSink] = None,
+            **pipeline_kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        OCR one shard into its fragment.
+
+        :param index: 0-based shard index.
+        :param save_csv: Also write a CSV fragment.
+        :param save_ndjson: Also write an NDJSON fragment.
+        :param resume: Skip a shard whose marker is already written and continue an interrupted one from its journal.
+        :param sink: Progress sink for the shard's pipeline.
+        :param pipeline_kwargs: Further :class:`OCRPipeline` options, e.g. ``dpi`` or ``batch_size``.
+        :return: The shard's marker: input identity, ``shard``, ``shards``, 1-based ``pages``, ``dpi`` and ``seconds``.
+        """
+        if resume:
+            marker = self._marker(index)
+            if marker is not None:
+                return marker
+        os.makedirs(self.shard_dir, exist_ok=True)
+        paths = self.paths(index)
+        shard_pages = self.shards[index]
+        dpi = pipeline_kwargs.get("dpi", 300)
+        if os.path.exists(paths["done"]):
+            os.remove(paths["done"])
+        t0 = time.perf_counter()
+        if shard_pages:
+            OCRPipeline(
+                self.input_pdf,
+                None,
+                pages=",".join(str(p + 1) for p in shard_pages),
+                save_csv=paths["csv"] if save_csv else None,
+                save_ndjson=paths["ndjson"] if save_ndjson else None,
+                save_store=paths["store"],
+                resume=resume,
+                journal_path=paths["journal"],
+                sink=sink,
+                **pipeline_kwargs,
+            ).run()
+        marker = dict(
+            self._input,
+            shard=index,
+            shards=len(self.shards),
+            pages=format_pages(shard_pages),
+            dpi=dpi,
+            seconds=round(time.perf_counter() - t0, 3),
+        )
+        tmp = paths["done"] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(marker, fp)
+        os.replace(tmp, paths["done"])
+        return marker
+
+    def run_local(self, workers: int = 0, **kwargs: Any) -> Dict[int, str]:
+        """
+        Run all shards in local worker processes, one OCR engine per process.
+
+        :param workers: Concurrent shard processes; ``0`` runs every shard at once.
+        :param kwargs: Arguments for :meth:`run_shard`.
+        :return: Mapping of failed shard index to error message; empty if every shard succeeded.
+        """
+        errors: Dict[int, str] = {}
+        with ProcessPoolExecutor(max_workers=workers or len(self.shards)) as executor, \
+                tqdm(total=len(self.shards), desc="Shards", unit="shard") as bar:
+            futures = {executor.submit(_run_shard_worker, self, i, kwargs): i for i in range(len(self.shards))}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    marker = fut.result()
+                    tqdm.write(f"shard {i}: pages {marker['pages'] or '-'} in {marker['seconds']}s")
+                except Exception as exc:
+                    errors[i] = f"{type(exc).__name__}: {exc}"
+                    tqdm.write(f"FAILED shard {i}: {errors[i]}")
+                bar.update(1)
+        return errors
+
+    def missing(self) -> List[int]:
+        """
+        Shards without a valid ``.done`` marker.
+
+        :return: 0-based shard indices.
+        """
+        return [i for i in range(len(self.shards)) if self._marker(i) is None]
+
+    @staticmethod
+    def _concat(paths: List[str], out_path: str, skip_header: bool) -> None:
+        """Concatenate text fragments, keeping only the first fragment's header line if ``skip_header``."""
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        first = True
+        with open(out_path, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as fp:
+                    if skip_header and not first:
+                        fp.readline()
+                    while True:
+                        chunk = fp.read(1 << 20)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                first = False
+
+    def merge(
+            self,
+            output_pdf: str,
+            *,
+            font_path: Optional[str] = None,
+            save_csv: Optional[str] = None,
+            save_ndjson: Optional[str] = None,
+            save_store: Optional[str] = None,
+            index_db: Optional[str] = None,
+            debug_visible: bool = False,
+            debug_pages: Optional[str] = None,
+            consolidate: bool = True,
+            subset_fonts: bool = True,
+            sink: Optional[ProgressSink] = None
+    ) -> Dict[str, Any]:
+        """
+        Merge complete shard fragments into the final outputs.
+
+        The text layer is built once on a single copy of the input from the stored results, so fonts, page
+        rotation and the rest of the document are handled exactly as in a single-node run.
+
+        :param output_pdf: Output PDF path.
+        :param font_path: Font file used for all text.
+        :param save_csv: Merged CSV path; needs shards run with ``save_csv``.
+        :param save_ndjson: Merged NDJSON path; needs shards run with ``save_ndjson``.
+        :param save_store: Merged columnar result store path.
+        :param index_db: SQLite full-text index to add the document's text to.
+        :param debug_visible: Also render a visible overlay PDF from the shard stores after the merge.
+        :param debug_pages: Comma-separated 1-based pages to include in the debug PDF; ``None`` includes all.
+        :param consolidate: Finish with a full garbage-collected, deflated save.
+        :param subset_fonts: Subset the embedded font to the used glyphs in the consolidating save.
+        :param sink: Optional progress sink for the overlay.
+        :return: ``merge_shards``, ``merge_pages``, ``merge_items`` and ``merge_s``, plus the statistics of
+            :func:`render_debug_pdf` with ``debug_visible``.
+        :raises ValueError: If a shard is incomplete or a requested CSV/NDJSON fragment is missing.
+        """
+        missing = self.missing()
+        if missing:
+            raise ValueError(f"shards not complete: {', '.join(str(i) for i in missing)}")
+        t0 = time.perf_counter()
+        shard_ids = [i for i in range(len(self.shards)) if self.shards[i]]
+        for key, wanted in (("csv", save_csv), ("ndjson", save_ndjson)):
+            absent = [i for i in shard_ids if wanted and not os.path.exists(self.paths(i)[key])]
+            if absent:
+                raise ValueError(f"no {key} fragment for shards {', '.join(str(i) for i in absent)}")
+        dpi = self._marker(shard_ids[0])["dpi"] if shard_ids else 300
+        writer = IncrementalOverlayWriter(
+            self.input_pdf,
+            output_pdf,
+            font_path=font_path,
+            dpi=dpi,
+            commit_policy=CommitPolicy(every_pages=0, consolidate=consolidate),
+            subset_fonts=subset_fonts,
+        )
+        storew = ColumnarStreamWriter(save_store)
+        indexw = SearchIndexWriter(index_db, self.input_pdf, dpi=dpi)
+        pages = items = 0
+        try:
+            for i in shard_ids:
+                if not os.path.exists(self.paths(i)["store"]):
+                    continue
+                with ResultStoreReader(self.paths(i)["store"]) as store:
+                    shard_dpi = self._marker(i)["dpi"]
+                    for page_no, page_items in store.iter_pages():
+                        storew.write_page(page_no, page_items)
+                        indexw.write_page(page_no, page_items)
+                        writer.apply_and_save(page_no - 1, page_items, sink=sink, dpi=shard_dpi)
+                        pages += 1
+                        items += len(page_items)
+            writer.finalize(sink)
+        finally:
+            writer.close()
+            storew.close()
+            indexw.close()
+        if save_csv:
+            self._concat([self.paths(i)["csv"] for i in shard_ids], save_csv, skip_header=True)
+        if save_ndjson:
+            self._concat([self.paths(i)["ndjson"] for i in shard_ids], save_ndjson, skip_header=False)
+        stats = {
+            "merge_shards": len(self.shards),
+            "merge_pages": pages,
+            "merge_items": items,
+            "merge_s": round(time.perf_counter() - t0, 3),
+        }
+        if debug_visible:
+            selected = select_debug_pages(self.input_pdf, pages=debug_pages)
+            wanted = {p + 1 for p in selected} if selected is not None else None
+            stores = [self.paths(i)["store"] for i in shard_ids if os.path.exists(self.paths(i)["store"])]
+            stats.update(render_debug_pdf(
+                self.input_pdf,
+                debug_path(output_pdf),
+                itertools.chain.from_iterable(iter_store_pages(path, wanted) for path in stores),
+                pages=selected,
+                dpi=dpi,
+                font_path=font_path,
+                subset_fonts=subset_fonts,
+            ))
+        return stats
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+from progress import ProgressSink
+
+T = TypeVar("T")
+
+_POLL_SEC = 0.1
+
+
+class _End:
+    """Queue marker signalling that the producer finished normally."""
+
+
+class _Failure:
+    """Queue marker carrying an exception raised inside a stage thread."""
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class StageCancelled(Exception):
+    """Raised inside a stage when the pipeline has been cancelled."""
+
+
+def _put(q: queue.Queue, item, cancel: threading.Event) -> None:
+    """
+    Put into a bounded queue, giving up once ``cancel`` is set.
+
+    :param q: Target queue.
+    :param item: Item to enqueue.
+    :param cancel: Shared cancellation event.
+    :raises StageCancelled: If cancellation was requested while blocked.
+    """
+    while True:
+        if cancel.is_set():
+            raise StageCancelled()
+        try:
+            q.put(item, timeout=_POLL_SEC)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: queue.Queue, cancel: threading.Event, producer: Optional[threading.Thread] = None):
+    """
+    Get from a queue, giving up once ``cancel`` is set.
+
+    :param q: Source queue.
+    :param cancel: Shared cancellation event.
+    :param producer: Thread feeding ``q``. When given, waits for it to exit so a pending failure is not lost.
+    :return: Dequeued item.
+    :raises StageCancelled: If cancellation was requested while blocked.
+    """
+    while True:
+        try:
+            return q.get(timeout=_POLL_SEC)
+        except queue.Empty:
+            if cancel.is_set() and (producer is None or not producer.is_alive()):
+                try:
+                    return q.get_nowait()
+                except queue.Empty:
+                    raise StageCancelled() from None
+
+
+class ThreadedStage(Generic[T]):
+    """
+    Drive an iterator on a background thread and expose it through a bounded queue.
+
+    The producer blocks once ``depth`` items are waiting, which propagates backpressure
+    upstream. Exceptions raised by the producer are re-raised in the consuming thread.
+    """
+
+    def __init__(
+            self,
+            source: Iterable[T],
+            *,
+            depth: int,
+            cancel: threading.Event,
+            name: str,
+            sink: Optional[ProgressSink] = None
+    ) -> None:
+        """
+        Start the producer thread.
+
+        :param source: Iterable to drain on the background thread.
+        :param depth: Maximum number of items buffered between producer and consumer.
+        :param cancel: Shared cancellation event for the whole pipeline.
+        :param name: Thread name, used for diagnostics.
+        :param sink: Optional progress sink receiving the consumer's waits as ``"wait:<name>"`` timings.
+        """
+        self._source = source
+        self._cancel = cancel
+        self._sink = sink
+        self._wait_stage = f"wait:{name}"
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, depth))
+        self._thread = threading.Thread(target=self._produce, name=name, daemon=True)
+        self._thread.start()
+
+    def _produce(self) -> None:
+        """Producer loop executed on the stage thread."""
+        it = iter(self._source)
+        try:
+            for item in it:
+                _put(self._q, item, self._cancel)
+            _put(self._q, _End(), self._cancel)
+        except StageCancelled:
+            pass
+        except BaseException as exc:
+            self._cancel.set()
+            try:
+                self._q.put_nowait(_Failure(exc))
+            except queue.Full:
+                self._drain()
+                self._q.put_nowait(_Failure(exc))
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    def _drain(self) -> None:
+        """Discard buffered items so a failure marker can always be delivered."""
+        while True:
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                return
+
+    def __iter__(self) -> Iterator[T]:
+        while True:
+            t0 = time.perf_counter()
+            item = _get(self._q, self._cancel, self._thread)
+            if isinstance(item, _End):
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            if self._sink is not None:
+                self._sink.on_timing(self._wait_stage, time.perf_counter() - t0)
+            yield item
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the producer thread to exit.
+
+        :param timeout: Optional timeout in seconds.
+        """
+        self._thread.join(timeout)
+
+
+class ThreadedConsumer(Generic[T]):
+    """
+    Apply a callable to items on a background thread fed by a bounded queue.
+
+    ``put`` blocks while the queue is full. Any exception raised by the callable is
+    re-raised from the next ``put`` or from ``finish``.
+    """
+
+    def __init__(
+            self,
+            fn: Callable[[T], None],
+            *,
+            depth: int,
+            cancel: threading.Event,
+            name: str,
+            sink: Optional[ProgressSink] = None
+    ) -> None:
+        """
+        Start the consumer thread.
+
+        :param fn: Callable invoked once per item.
+        :param depth: Maximum number of items waiting to be consumed.
+        :param cancel: Shared cancellation event for the whole pipeline.
+        :param name: Thread name, used for diagnostics.
+        :param sink: Optional progress sink receiving time blocked in :meth:`put` as ``"wait:<name>"`` timings.
+        """
+        self._fn = fn
+        self._cancel = cancel
+        self._sink = sink
+        self._wait_stage = f"wait:{name}"
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, depth))
+        self._exc: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._consume, name=name, daemon=True)
+        self._thread.start()
+
+    def _consume(self) -> None:
+        """Consumer loop executed on the stage thread."""
+        try:
+            while True:
+                item = _get(self._q, self._cancel)
+                if isinstance(item, _End):
+                    return
+                self._fn(item)
+        except StageCancelled:
+            pass
+        except BaseException as exc:
+            self._exc = exc
+            self._cancel.set()
+
+    def _raise_if_failed(self) -> None:
+        if self._exc is not None:
+            raise self._exc
+
+    def put(self, item: T) -> None:
+        """
+        Enqueue one item for the consumer thread.
+
+        :param item: Item to hand over.
+        """
+        self._raise_if_failed()
+        t0 = time.perf_counter()
+        try:
+            _put(self._q, item, self._cancel)
+        except StageCancelled:
+            self._raise_if_failed()
+            raise
+        if self._sink is not None:
+            self._sink.on_timing(self._wait_stage, time.perf_counter() - t0)
+
+    def finish(self) -> None:
+        """Signal end of input, wait for the consumer to drain, and surface its error if any."""
+        try:
+            _put(self._q, _End(), self._cancel)
+        except StageCancelled:
+            pass
+        self._thread.join()
+        self._raise_if_failed()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the consumer thread to exit.
+
+        :param timeout: Optional timeout in seconds.
+        """
+        self._thread.join(timeout)
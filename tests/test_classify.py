@@ -0,0 +1,35 @@
+import pymupdf
+
+from benchmark import SyntheticOcrEngine, make_synthetic_pdf
+from overlay_writer import PAGE_MARKER
+from pdf_streamer import PAGE_IMAGE, PAGE_MIXED, PAGE_TEXT, PdfStreamer
+from pipeline import OCRPipeline
+from progress import NullProgressSink
+
+
+def _ocr(src, out):
+    OCRPipeline(src, out, dpi=100, ocr=SyntheticOcrEngine(), sink=NullProgressSink()).run()
+
+
+def test_own_output_is_not_recognized_again(tmp_path):
+    src = make_synthetic_pdf(str(tmp_path / "scan.pdf"), pages=2, dpi=100, lines=5)
+    first, second = str(tmp_path / "first.pdf"), str(tmp_path / "second.pdf")
+    assert set(PdfStreamer(src).classify_pages(range(2)).values()) == {PAGE_IMAGE}
+    _ocr(src, first)
+    assert set(PdfStreamer(first).classify_pages(range(2)).values()) == {PAGE_TEXT}
+    _ocr(first, second)
+    with pymupdf.open(first) as a, pymupdf.open(second) as b:
+        for pa, pb in zip(a, b):
+            assert pb.get_text() == pa.get_text()
+
+
+def test_invisible_text_over_scan_counts_as_text(tmp_path):
+    src = make_synthetic_pdf(str(tmp_path / "scan.pdf"), pages=1, dpi=100, lines=5)
+    out = str(tmp_path / "out.pdf")
+    _ocr(src, out)
+    with pymupdf.open(out) as doc:
+        page = doc[0]
+        doc.xref_set_key(page.xref, PAGE_MARKER, "null")
+        assert PdfStreamer.classify_page(page) == PAGE_TEXT
+        page.insert_text((72, 72), "visible caption over the scan")
+        assert PdfStreamer.classify_page(page) == PAGE_MIXED
@@ -0,0 +1,41 @@
+import pymupdf
+import pytest
+
+from batch_runner import BatchRunner
+from benchmark import SyntheticOcrEngine, make_synthetic_pdf
+from pipeline import OCRPipeline
+from progress import NullProgressSink
+
+
+class StatsSink(NullProgressSink):
+    def __init__(self):
+        self.stats = {}
+
+    def on_stats(self, stats):
+        self.stats.update(stats)
+
+
+@pytest.mark.parametrize("budget_mb", [100, 30])
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_peak_stays_within_budget(tmp_path, budget_mb, concurrent):
+    pdf = make_synthetic_pdf(str(tmp_path / "in.pdf"), pages=12, dpi=100, lines=5)
+    sink = StatsSink()
+    OCRPipeline(pdf, str(tmp_path / "out.pdf"), dpi=300, batch_size=8, ocr=SyntheticOcrEngine(),
+                skip_text_pages=False, mem_budget_mb=budget_mb, concurrent=concurrent, sink=sink).run()
+    assert sink.stats["mem_peak_mb"] <= budget_mb
+
+
+def test_batch_with_pages_larger_than_budget_does_not_hang(tmp_path):
+    jobs = []
+    for i in range(3):
+        doc = pymupdf.open()
+        for k in range(4):
+            width, height = (1190, 1684) if (i + k) % 3 == 0 else (595, 842)
+            doc.new_page(width=width, height=height).insert_text((50, 80), f"doc {i} page {k}", fontsize=14)
+        src = str(tmp_path / f"in{i}.pdf")
+        doc.save(src)
+        jobs.append((src, str(tmp_path / f"out{i}.pdf")))
+    runner = BatchRunner(jobs, SyntheticOcrEngine(), docs_in_flight=3, batch_size=8, mem_budget_mb=20, dpi=200,
+                         skip_text_pages=False)
+    assert runner.run() == {}
+    assert runner.governor.total == 0
@@ -0,0 +1,28 @@
+import pytest
+
+from benchmark import SyntheticOcrEngine, make_synthetic_pdf
+from ocr_service import OcrService
+
+
+@pytest.fixture
+def service(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    make_synthetic_pdf(str(root / "in.pdf"), pages=1, dpi=100, lines=2)
+    make_synthetic_pdf(str(tmp_path / "outside.pdf"), pages=1, dpi=100, lines=2)
+    svc = OcrService(SyntheticOcrEngine(), root=str(root), defaults={"skip_text_pages": False})
+    yield svc
+    svc.shutdown()
+
+
+@pytest.mark.parametrize("input_pdf", ["../outside.pdf", "{tmp}/outside.pdf"])
+def test_input_outside_root_is_rejected(service, tmp_path, input_pdf):
+    with pytest.raises(ValueError, match="outside the service root"):
+        service.submit(input_pdf.format(tmp=tmp_path), "out.pdf")
+
+
+def test_relative_input_resolves_under_root(service):
+    job = service.submit("in.pdf", "out.pdf")
+    assert job.input_pdf == service.resolve_path("in.pdf")
+    assert job.done_event.wait(30)
+    assert job.to_dict()["state"] == "done"
@@ -0,0 +1,36 @@
+import numpy as np
+
+from page_filters import BlankPageDetector
+
+A4_300DPI = (3508, 2480)
+
+
+def _page(paper: int, noise: float = 1.0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    img = rng.normal(paper, noise, A4_300DPI)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _strokes(img: np.ndarray, top: int, left: int, width: int, value: int) -> None:
+    """Draw a line of 3 px wide vertical strokes, 38 px tall, like 9 pt text at 300 dpi."""
+    for x in range(left, left + width, 12):
+        img[top:top + 38, x:x + 3] = value
+
+
+def test_uniform_page_is_blank():
+    assert BlankPageDetector().is_blank(_page(245))
+
+
+def test_dark_page_with_light_text_is_not_blank():
+    img = _page(40)
+    for top in range(400, 3000, 120):
+        _strokes(img, top, 300, 1800, 230)
+    assert not BlankPageDetector().is_blank(img)
+
+
+def test_page_with_single_footer_line_is_not_blank():
+    img = _page(245)
+    _strokes(img, 3300, 300, 300, 20)
+    det = BlankPageDetector()
+    assert det.measure(img)["ink_ratio"] < det.ink_ratio
+    assert not det.is_blank(img)
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pymupdf
+
+from benchmark import SyntheticOcrEngine, make_synthetic_pdf
+from pipeline import OCRPipeline
+from progress import NullProgressSink
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CRASH = textwrap.dedent("""
+    import os, sys, time
+    sys.path.insert(0, {root!r})
+    from benchmark import SyntheticOcrEngine
+    from overlay_writer import IncrementalOverlayWriter
+    from pipeline import OCRPipeline
+    from progress import NullProgressSink
+
+    commit, write = IncrementalOverlayWriter.commit, OCRPipeline._write_results
+    commits = []
+
+    def crash_after_commits(self, sink=None):
+        commit(self, sink)
+        commits.append(1)
+        if len(commits) == 3:
+            os._exit(3)
+
+    def slow_page_two(self, page):
+        if page[0] == 1:
+            time.sleep(1.0)
+        write(self, page)
+
+    IncrementalOverlayWriter.commit = crash_after_commits
+    OCRPipeline._write_results = slow_page_two
+    OCRPipeline({pdf!r}, {out!r}, dpi=100, ocr=SyntheticOcrEngine(), save_ndjson={ndjson!r}, resume=True,
+                concurrent=True, commit_every={commit_every}, sink=NullProgressSink()).run()
+""")
+
+
+def _run_killed_then_resumed(tmp_path, commit_every):
+    pdf = make_synthetic_pdf(str(tmp_path / "in.pdf"), pages=6, dpi=100, lines=5)
+    out, ndjson = str(tmp_path / "out.pdf"), str(tmp_path / "out.ndjson")
+    code = CRASH.format(root=ROOT, pdf=pdf, out=out, ndjson=ndjson, commit_every=commit_every)
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 3
+    OCRPipeline(pdf, out, dpi=100, ocr=SyntheticOcrEngine(), save_ndjson=ndjson, resume=True, concurrent=True,
+                commit_every=commit_every, sink=NullProgressSink()).run()
+    return out, ndjson
+
+
+def _check_outputs(out, ndjson):
+    rows = [json.loads(line) for line in open(ndjson, encoding="utf-8")]
+    per_page = {}
+    for r in rows:
+        per_page[r["page"]] = per_page.get(r["page"], 0) + 1
+    assert [r["page"] for r in rows] == sorted(r["page"] for r in rows)
+    with pymupdf.open(out) as doc:
+        assert not doc.is_repaired
+        for i, page in enumerate(doc):
+            lines = [ln for ln in page.get_text().splitlines() if ln.strip()]
+            assert per_page.get(i + 1, 0) > 0
+            assert len(lines) == per_page[i + 1]
+
+
+def test_concurrent_kill_and_resume(tmp_path):
+    _check_outputs(*_run_killed_then_resumed(tmp_path, commit_every=1))
+
+
+def test_concurrent_kill_and_resume_batched_commits(tmp_path):
+    _check_outputs(*_run_killed_then_resumed(tmp_path, commit_every=2))
@@ -0,0 +1,44 @@
+from tiling import merge_tile_items, plan_tiles
+
+TEXT = "The quick brown fox jumps over the lazy dog while the tiles cut it apart"
+
+
+def _fragment(tile, x0, x1, y0, y1, text):
+    """OCR item for the part of a line inside ``tile``, keeping only characters that are fully visible."""
+    tx0, ty0, tx1, ty1 = tile
+    step = (x1 - x0) / len(text)
+    chars = [i for i in range(len(text)) if x0 + i * step >= tx0 and x0 + (i + 1) * step <= tx1]
+    if not chars or y0 < ty0 or y1 > ty1:
+        return None
+    fx0, fx1 = x0 + chars[0] * step, x0 + (chars[-1] + 1) * step
+    poly = [[fx0 - tx0, y0 - ty0], [fx1 - tx0, y0 - ty0], [fx1 - tx0, y1 - ty0], [fx0 - tx0, y1 - ty0]]
+    return {"text": text[chars[0]:chars[-1] + 1], "score": 0.9, "poly": poly}
+
+
+def _ocr_tiles(tiles, lines):
+    out = []
+    for tile in tiles:
+        items = [f for f in (_fragment(tile, *line) for line in lines) if f is not None]
+        out.append(((tile[0], tile[1]), items))
+    return out
+
+
+def test_line_spanning_grid_columns_is_joined():
+    tiles = plan_tiles(1240, 1754, 500_000, 200)
+    assert len({t[0] for t in tiles}) >= 2
+    y0 = next(t for t in tiles if t[1] > 0)[1] + 100
+    line = (101.0, 1082.0, y0, y0 + 30, TEXT)
+    merged = merge_tile_items(_ocr_tiles(tiles, [line]))
+    assert len(merged) == 1
+    xs = [p[0] for p in merged[0]["poly"]]
+    assert min(xs) == 101.0 and max(xs) == 1082.0
+    assert merged[0]["text"] == TEXT
+
+
+def test_line_cut_by_strip_edge_keeps_whole_copy():
+    whole = {"text": "whole line", "score": 0.9, "poly": [[100, 100], [600, 100], [600, 130], [100, 130]]}
+    cut = {"text": "whole line", "score": 0.5, "poly": [[100, 400], [600, 400], [600, 410], [100, 410]]}
+    merged = merge_tile_items([((0, 0), [cut]), ((0, 300), [whole])])
+    assert len(merged) == 1
+    assert merged[0]["score"] == 0.9
+    assert merged[0]["poly"][0] == [100.0, 400.0]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymupdf
+import unicodedata as _ud
+
+
+def poly_bbox(poly) -> Tuple[float, float, float, float]:
+    """
+    Compute bounding rectangle for a polygon.
+
+    :param poly: Sequence of ``(x, y)``.
+    :return: ``(x0, y0, x1, y1)``.
+    """
+    xs = [float(p[0]) for p in poly]
+    ys = [float(p[1]) for p in poly]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class TextLayerBuilder:
+    """
+    Lay out OCR items as a text layer and write a whole page in one operation.
+
+    Keeps a single loaded font and memoizes unit text widths, so the font file is parsed
+    once per writer instead of once per item.
+    """
+
+    MAX_MEMO = 65536
+
+    def __init__(self, font_path: Optional[str]) -> None:
+        """
+        Load the overlay font.
+
+        :param font_path: Font file path. ``None`` falls back to built-in Helvetica.
+        """
+        self.font_path = font_path
+        if font_path:
+            self.font = pymupdf.Font(fontname="ocrfont", fontfile=font_path)
+        else:
+            self.font = pymupdf.Font("helv")
+        asc, desc = self.font.ascender, self.font.descender
+        self._desc_ratio = desc / (asc - desc) if asc - desc != 0 else 0.0
+        self._widths: Dict[str, float] = {}
+
+    def text_width(self, text: str) -> float:
+        """
+        Return the width of ``text`` at font size 1, memoized.
+
+        :param text: NFC-normalized text.
+        :return: Width in points, never below ``1e-6``.
+        """
+        w = self._widths.get(text)
+        if w is None:
+            if len(self._widths) >= self.MAX_MEMO:
+                self._widths.clear()
+            w = max(1e-6, self.font.text_length(text, fontsize=1))
+            self._widths[text] = w
+        return w
+
+    def layout(self, items: List[Dict[str, Any]], scale: float) -> List[Tuple[pymupdf.Point, str, float]]:
+        """
+        Compute insertion point, text and font size for each item.
+
+        The font size stretches the text across its box width; the baseline sits on the box bottom,
+        raised by the font descender.
+
+        :param items: OCR items with ``poly`` in image pixels and ``text``.
+        :param scale: Pixels per PDF point.
+        :return: List of ``(point, text, font_size)``.
+        """
+        out: List[Tuple[pymupdf.Point, str, float]] = []
+        for it in items:
+            raw = it.get("text")
+            poly = it.get("poly")
+            if not raw or poly is None:
+                continue
+            text = _ud.normalize("NFC", raw)
+            x0, y0, x1, y1 = poly_bbox(poly)
+            x0_pt, x1_pt, y1_pt = x0 / scale, x1 / scale, y1 / scale
+            width_pt = max(0.1, x1_pt - x0_pt)
+            font_size = width_pt / self.text_width(text)
+            baseline_y = y1_pt + self._desc_ratio * font_size
+            out.append((pymupdf.Point(x0_pt, baseline_y), text, font_size))
+        return out
+
+    def write(self, page: pymupdf.Page, items: List[Dict[str, Any]], scale: float, visible: bool) -> int:
+        """
+        Write all items of one page through a single ``TextWriter``.
+
+        :param page: Target page.
+        :param items: OCR items list.
+        :param scale: Pixels per PDF point.
+        :param visible: Draw red visible text instead of invisible ``render_mode=3`` text.
+        :return: Number of lines written.
+        """
+        placed = self.layout(items, scale)
+        if not placed:
+            return 0
+        tw = pymupdf.TextWriter(page.rect)
+        for pt, text, size in placed:
+            tw.append(pt, text, font=self.font, fontsize=size)
+        tw.write_text(
+            page,
+            color=(1, 0, 0) if visible else None,
+            render_mode=0 if visible else 3,
+            overlay=True,
+        )
+        return len(placed)
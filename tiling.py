@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import math
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Tuple
+
+from text_layer import poly_bbox
+
+Tile = Tuple[int, int, int, int]
+
+
+def _axis(length: int, tile: int, overlap: int) -> List[Tuple[int, int]]:
+    """Split ``[0, length)`` into evenly spaced spans of ``tile`` pixels overlapping by at least ``overlap``."""
+    if length <= tile:
+        return [(0, length)]
+    n = math.ceil((length - overlap) / max(1, tile - overlap))
+    return [(round(i * (length - tile) / (n - 1)), round(i * (length - tile) / (n - 1)) + tile) for i in range(n)]
+
+
+def plan_tiles(width: int, height: int, max_pixels: int, overlap: int) -> List[Tile]:
+    """
+    Cover a ``width`` x ``height`` pixel page with overlapping tiles of at most ``max_pixels`` each.
+
+    Pages within the budget get a single tile. Otherwise the page is cut into full-width horizontal strips,
+    which never split a text line sideways, as long as a strip can be at least three overlaps tall; very
+    wide pages fall back to a grid of square tiles. Tiles are evenly spaced and neighbours share at least
+    ``overlap`` pixels, so a line cut by a horizontal tile edge appears whole in the neighbouring strip;
+    grid columns can split lines sideways, and :func:`merge_tile_items` joins those fragments again.
+
+    :param width: Page width in render pixels.
+    :param height: Page height in render pixels.
+    :param max_pixels: Pixel budget per tile.
+    :param overlap: Minimum overlap between neighbouring tiles, in pixels.
+    :return: Tiles as ``(x0, y0, x1, y1)`` in row-major order.
+    """
+    if width * height <= max_pixels:
+        return [(0, 0, width, height)]
+    if max_pixels // width >= 3 * overlap:
+        tw, th = width, max_pixels // width
+    else:
+        side = int(math.sqrt(max_pixels))
+        tw, th = min(width, side), min(height, side)
+        if th < side:
+            tw = min(width, max_pixels // th)
+    overlap = min(overlap, tw // 2, th // 2)
+    return [(x0, y0, x1, y1) for y0, y1 in _axis(height, th, overlap) for x0, x1 in _axis(width, tw, overlap)]
+
+
+def _join_text(left: str, lbox: Tuple[float, ...], right: str, rbox: Tuple[float, ...]) -> str:
+    """
+    Join the texts of two fragments of one line that overlap horizontally, dropping the repeated part.
+
+    Characters are assumed evenly spread over their box. The seam is the longest common run of the two texts
+    within the overlap; without one, the texts are cut at the middle of the overlap.
+
+    :param left: Text of the fragment that starts further left.
+    :param lbox: Its box ``(x0, y0, x1, y1)``.
+    :param right: Text of the other fragment.
+    :param rbox: Its box.
+    :return: Joined text.
+    """
+    if rbox[2] <= lbox[2] or not right:
+        return left
+    if rbox[0] <= lbox[0] or not left:
+        return right
+    ox0, ox1 = rbox[0], lbox[2]
+
+    def at(text: str, box: Tuple[float, ...], x: float) -> int:
+        return min(len(text), max(0, round(len(text) * (x - box[0]) / max(1e-9, box[2] - box[0]))))
+
+    slack = 2
+    ls = max(0, at(left, lbox, ox0) - slack)
+    re_ = min(len(right), at(right, rbox, ox1) + slack)
+    m = SequenceMatcher(None, left[ls:], right[:re_], autojunk=False).find_longest_match(0, len(left) - ls, 0, re_)
+    if m.size >= 2:
+        return left[:ls + m.a] + right[m.b:]
+    mid = (ox0 + ox1) / 2
+    return left[:at(left, lbox, mid)] + right[at(right, rbox, mid):]
+
+
+def _cells(box: Tuple[float, ...], cell: int) -> List[Tuple[int, int]]:
+    """Grid cells of size ``cell`` touched by ``box``."""
+    return [
+        (cx, cy)
+        for cx in range(int(box[0]) // cell, int(box[2]) // cell + 1)
+        for cy in range(int(box[1]) // cell, int(box[3]) // cell + 1)
+    ]
+
+
+def merge_tile_items(
+        tiles: List[Tuple[Tuple[int, int], List[Dict[str, Any]]]],
+        min_cover: float = 0.6,
+        cell: int = 256
+) -> List[Dict[str, Any]]:
+    """
+    Map per-tile OCR items into page coordinates, join lines split across tiles and drop duplicates.
+
+    Items are visited from the largest box down and compared with the kept items of other tiles. An item on
+    the same row as a kept one (sharing ``min_cover`` of the lower height) that overlaps it horizontally and
+    reaches more than half a line height past either end is a fragment of a line split by a grid column:
+    the two boxes are unioned and their texts joined over the overlap. Otherwise an item is a duplicate when
+    the kept item covers at least ``min_cover`` of the smaller box; the larger box is kept, since the
+    smaller one is usually a line cut by a tile edge. Merged and kept items take the earlier of the
+    positions so lines stay in reading order.
+
+    :param tiles: ``((x_offset, y_offset), items)`` per tile, in tile order.
+    :param min_cover: Overlap fraction of the smaller box above which two items are the same line.
+    :param cell: Grid cell size, in pixels, used to find neighbouring items.
+    :return: Items with page-pixel ``poly``, in tile order.
+    """
+    if len(tiles) == 1:
+        (ox, oy), items = tiles[0]
+        if ox == 0 and oy == 0:
+            return items
+    cands = []
+    for t, ((ox, oy), items) in enumerate(tiles):
+        for it in items:
+            poly = it.get("poly")
+            if poly is None:
+                continue
+            shifted = [[float(x) + ox, float(y) + oy] for x, y in poly]
+            box = poly_bbox(shifted)
+            area = max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+            cands.append((area, t, len(cands), box, dict(it, poly=shifted)))
+    if len(tiles) == 1:
+        return [c[4] for c in cands]
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    kept: List[List[Any]] = []
+    for area, t, order, box, item in sorted(cands, key=lambda c: (-c[0], c[2])):
+        x0, y0, x1, y1 = box
+        cells = _cells(box, cell)
+        dup = None
+        joined = False
+        for key in cells:
+            for k in grid.get(key, ()):
+                _, kt, (kx0, ky0, kx1, ky1), karea, _ = kept[k]
+                if kt == t:
+                    continue
+                iw = min(x1, kx1) - max(x0, kx0)
+                ih = min(y1, ky1) - max(y0, ky0)
+                if iw <= 0 or ih <= 0:
+                    continue
+                lh = min(y1 - y0, ky1 - ky0)
+                if ih >= min_cover * lh and (x0 < kx0 - lh / 2 or x1 > kx1 + lh / 2):
+                    dup, joined = k, True
+                    break
+                if iw * ih >= min_cover * max(1e-9, min(area, karea)):
+                    dup = k
+                    break
+            if dup is not None:
+                break
+        if dup is not None:
+            kept[dup][0] = min(kept[dup][0], order)
+            if joined:
+                kitem, kbox = kept[dup][4], kept[dup][2]
+                (la, lbox), (ra, rbox) = sorted([(kitem, kbox), (item, box)], key=lambda c: c[1][0])
+                ux0, uy0 = min(x0, kbox[0]), min(y0, kbox[1])
+                ux1, uy1 = max(x1, kbox[2]), max(y1, kbox[3])
+                lt, rt = la.get("text") or "", ra.get("text") or ""
+                score = (float(la.get("score", 0.0)) * len(lt) + float(ra.get("score", 0.0)) * len(rt)) / max(
+                    1, len(lt) + len(rt))
+                kept[dup][2] = (ux0, uy0, ux1, uy1)
+                kept[dup][3] = (ux1 - ux0) * (uy1 - uy0)
+                kept[dup][4] = dict(
+                    kitem,
+                    text=_join_text(lt, lbox, rt, rbox),
+                    score=score,
+                    poly=[[ux0, uy0], [ux1, uy0], [ux1, uy1], [ux0, uy1]],
+                )
+                for key in set(_cells(kept[dup][2], cell)) - set(_cells(kbox, cell)):
+                    grid.setdefault(key, []).append(dup)
+            continue
+        for key in cells:
+            grid.setdefault(key, []).append(len(kept))
+        kept.append([order, t, box, area, item])
+    kept.sort(key=lambda k: k[0])
+    return [k[4] for k in kept]